@@ -0,0 +1,180 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Mapping, Optional
+
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """
+    Extract a server-requested delay in seconds from rate limit headers
+
+    Understands retry-after-ms, Retry-After (seconds) and the
+    x-ratelimit-reset-* headers sent alongside an exhausted
+    x-ratelimit-remaining-* budget.
+    """
+    if not headers:
+        return None
+
+    def number(name: str) -> Optional[float]:
+        value = headers.get(name)
+        if value is None:
+            return None
+        try:
+            return float(str(value).rstrip("s"))
+        except ValueError:
+            return None
+
+    retry_after_ms = number("retry-after-ms")
+    if retry_after_ms is not None:
+        return retry_after_ms / 1000.0
+    retry_after = number("retry-after")
+    if retry_after is not None:
+        return retry_after
+
+    delays = []
+    for kind in ("requests", "tokens"):
+        remaining = number(f"x-ratelimit-remaining-{kind}")
+        if remaining is not None and remaining <= 0:
+            reset = number(f"x-ratelimit-reset-{kind}")
+            delays.append(reset if reset is not None else 1.0)
+    return max(delays) if delays else None
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limiter for upstream AI calls
+
+    The limit grows by roughly one slot per limit's worth of successful
+    calls made while it is saturated (every slot taken, or callers
+    queued), so quiet periods cannot raise it to a level the upstream has
+    never been tested at. It is multiplied by decrease_factor on overload
+    (429/5xx). At most
+    one decrease is applied per cooldown window so a burst of 429s from the
+    same wave of requests only cuts the limit once. A server-provided
+    Retry-After pauses new admissions until it elapses.
+
+    Usage:
+        async with limiter:
+            ...
+    """
+
+    def __init__(
+        self,
+        initial_limit: float,
+        min_limit: float = 1.0,
+        max_limit: float = 32.0,
+        increase_step: float = 1.0,
+        decrease_factor: float = 0.5,
+        decrease_cooldown_seconds: float = 2.0
+    ):
+        self.min_limit = max(1.0, float(min_limit))
+        self.max_limit = max(self.min_limit, float(max_limit))
+        self.limit = min(self.max_limit, max(self.min_limit, float(initial_limit)))
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown_seconds = decrease_cooldown_seconds
+
+        self.in_flight = 0
+        self.queued = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> None:
+        self.queued += 1
+        try:
+            while True:
+                pause = self._paused_until - time.monotonic()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+                    continue
+                if self.in_flight < int(self.limit):
+                    break
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiters.append(waiter)
+                try:
+                    await waiter
+                except BaseException:
+                    if waiter.done() and not waiter.cancelled():
+                        # We were woken but are leaving; pass the slot on
+                        self._wake_waiters()
+                    else:
+                        waiter.cancel()
+                    raise
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+
+    def try_acquire(self) -> bool:
+        """Take a slot only if one is free right now and nobody is queued for it"""
+        if self.queued or self.paused or self.in_flight >= int(self.limit):
+            return False
+        self.in_flight += 1
+        return True
+
+    @property
+    def paused(self) -> bool:
+        """True while a server-requested Retry-After holds new admissions back"""
+        return self._paused_until > time.monotonic()
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake_waiters()
+
+    async def __aenter__(self) -> "AdaptiveConcurrencyLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+    def _wake_waiters(self) -> None:
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def record_success(self, headers: Optional[Mapping[str, str]] = None) -> None:
+        """
+        Additive increase when saturated; also honors an exhausted x-ratelimit budget
+
+        Called while the successful call still holds its slot.
+        """
+        if self.in_flight >= int(self.limit) or self.queued:
+            self.limit = min(self.max_limit, self.limit + self.increase_step / max(self.limit, 1.0))
+        delay = parse_retry_after(headers)
+        if delay:
+            self._pause(delay)
+        self._wake_waiters()
+
+    def record_overload(self, headers: Optional[Mapping[str, str]] = None) -> Optional[float]:
+        """
+        Multiplicative decrease after a 429 or 5xx
+
+        Returns:
+            The server-requested delay in seconds, if any
+        """
+        now = time.monotonic()
+        if now - self._last_decrease >= self.decrease_cooldown_seconds:
+            self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+            self._last_decrease = now
+        delay = parse_retry_after(headers)
+        if delay:
+            self._pause(delay)
+        return delay
+
+    def _pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "limit_exact": round(self.limit, 3),
+            "min_limit": int(self.min_limit),
+            "max_limit": int(self.max_limit),
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "paused_for_seconds": round(max(0.0, self._paused_until - time.monotonic()), 3)
+        }
@@ -1,268 +1,633 @@
 import openai
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI
+import httpx
 import time
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from config import settings
+from analysis_cache import AnalysisCache, make_cache_key
+from adaptive_limiter import AdaptiveConcurrencyLimiter, parse_retry_after
+from deployment_pool import Deployment, DeploymentPool, parse_deployments
+from shared_limiter import create_shared_limiter
+from request_hedging import RequestHedger
+from request_trace import record_span
+from metrics import (
+    AI_HEDGES, AI_PARSE_FAILURES, AI_RATE_LIMITED, AI_RETRIES, AI_STRUCTURED_OUTPUT, AI_TIMEOUTS,
+    bind_limiter, observe_stage, stage_timer
+)
+from job_prompts import JobPrompt
+from structured_output import (
+    BATCH_RANKING_JSON_FORMAT, RankingAnalysis, ScreeningAnalysis, StructuredOutputError,
+    parse_batch_ranking, parse_model_output
+)
 import asyncio
+import logging
 import random
-import json
+
+logger = logging.getLogger(__name__)
 
 class AzureOpenAIClient:
     def __init__(self):
-        self._validate_config()
-        self.client = AzureOpenAI(
+        deployments = self._load_deployments()
+        # Shared, pooled keep-alive transport. Every request goes through the
+        # native async SDK path, so a timed out call is actually cancelled
+        # instead of leaving a worker thread running in the default executor.
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.ai_http_max_connections,
+                max_keepalive_connections=settings.ai_http_max_keepalive_connections,
+                keepalive_expiry=settings.ai_http_keepalive_expiry_seconds
+            ),
+            timeout=httpx.Timeout(settings.ai_request_timeout_seconds)
+        )
+        self.pool = self._build_pool(deployments)
+        bind_limiter(self.pool)
+        # Pooled deployments serve the same model, so the first one's name keys cached results
+        self.deployment_name = self.pool.deployments[0].deployment_name
+        # cheap, fast tier for cascade ranking (None when not configured)
+        fast_deployments = self._load_fast_deployments()
+        self.fast_pool = self._build_pool(fast_deployments) if fast_deployments else None
+        # content-addressed cache of parsed analysis results
+        self.cache = AnalysisCache(
+            max_entries=settings.analysis_cache_max_entries,
+            ttl_seconds=settings.analysis_cache_ttl_seconds,
+            cache_dir=settings.analysis_cache_dir or None,
+            max_disk_entries=settings.analysis_cache_disk_max_entries
+        ) if settings.analysis_cache_enabled else None
+        # global concurrency/token budget shared by all worker processes (None when not configured)
+        self.shared_limiter = create_shared_limiter(settings)
+        # duplicate calls that outlive the recent latency percentile (None when hedging is off)
+        self.hedger = RequestHedger(
+            percentile=settings.ai_hedge_percentile,
+            min_delay_seconds=settings.ai_hedge_min_delay_seconds,
+            min_samples=settings.ai_hedge_min_samples,
+            budget_ratio=settings.ai_hedge_budget_ratio,
+            budget_burst_tokens=settings.ai_hedge_budget_burst_tokens
+        ) if settings.ai_hedging_enabled else None
+
+    def _build_pool(self, deployments: List[Dict[str, Any]]) -> DeploymentPool:
+        """
+        One client and adaptive (AIMD) concurrency limiter per deployment;
+        AI_MAX_CONCURRENCY is each limiter's starting limit
+        """
+        return DeploymentPool(
+            [
+                Deployment(
+                    name=deployment["name"],
+                    deployment_name=deployment["deployment"],
+                    endpoint=deployment["endpoint"],
+                    weight=deployment["weight"],
+                    client=AsyncAzureOpenAI(
+                        api_key=deployment["api_key"],
+                        api_version=deployment["api_version"],
+                        azure_endpoint=deployment["endpoint"],
+                        http_client=self.http_client,
+                        # Retries are handled by _with_retries so backoff stays under our control
+                        max_retries=0
+                    ),
+                    limiter=AdaptiveConcurrencyLimiter(
+                        initial_limit=settings.ai_max_concurrency,
+                        min_limit=settings.ai_min_concurrency if settings.ai_adaptive_concurrency else settings.ai_max_concurrency,
+                        max_limit=settings.ai_concurrency_ceiling if settings.ai_adaptive_concurrency else settings.ai_max_concurrency,
+                        decrease_factor=settings.ai_concurrency_decrease_factor
+                    )
+                )
+                for deployment in deployments
+            ],
+            probe=self._ping,
+            eject_after_failures=settings.ai_pool_eject_after_failures,
+            eject_seconds=settings.ai_pool_eject_seconds,
+            max_eject_seconds=settings.ai_pool_max_eject_seconds
+        )
+
+    def _load_fast_deployments(self) -> List[Dict[str, Any]]:
+        """The cascade ranking tier from AZURE_OPENAI_FAST_DEPLOYMENTS or AZURE_OPENAI_FAST_DEPLOYMENT_NAME; empty when unset"""
+        if not settings.azure_openai_fast_deployments and not settings.azure_openai_fast_deployment_name:
+            return []
+        return parse_deployments(
+            settings.azure_openai_fast_deployments,
             api_key=settings.azure_openai_api_key,
+            endpoint=settings.azure_openai_endpoint,
             api_version=settings.azure_openai_api_version,
-            azure_endpoint=settings.azure_openai_endpoint
+            deployment_name=settings.azure_openai_fast_deployment_name,
+            setting="AZURE_OPENAI_FAST_DEPLOYMENTS"
+        )
+
+    def _load_deployments(self) -> List[Dict[str, Any]]:
+        """The deployment pool from AZURE_OPENAI_DEPLOYMENTS, or the single configured deployment"""
+        return parse_deployments(
+            settings.azure_openai_deployments,
+            api_key=settings.azure_openai_api_key,
+            endpoint=settings.azure_openai_endpoint,
+            api_version=settings.azure_openai_api_version,
+            deployment_name=settings.azure_openai_deployment_name
         )
-        self.deployment_name = settings.azure_openai_deployment_name
-        # concurrency limiter
-        self._semaphore = asyncio.Semaphore(settings.ai_max_concurrency)
-
-    def _validate_config(self) -> None:
-        missing = []
-        if not settings.azure_openai_api_key:
-            missing.append("AZURE_OPENAI_API_KEY")
-        if not settings.azure_openai_endpoint:
-            missing.append("AZURE_OPENAI_ENDPOINT")
-        if not settings.azure_openai_deployment_name:
-            missing.append("AZURE_OPENAI_DEPLOYMENT_NAME")
-        if missing:
-            raise ValueError(
-                f"Missing Azure OpenAI configuration values: {', '.join(missing)}. "
-                "Please set them in your .env file."
-            )
 
-    async def analyze_resume_for_ranking(self, resume_content: str, job_requirements: Dict[str, Any], criteria: List[str]) -> Dict[str, Any]:
+    async def analyze_resume_for_ranking(self, resume_content: str, job: JobPrompt) -> Dict[str, Any]:
         """
         Analyze a single resume for ranking purposes
+
+        job is the compiled ranking prompt for the job requirement
+        (job_prompts.get_job_prompt), shared by every resume of a request.
         """
-        prompt = self._create_ranking_prompt(resume_content, job_requirements, criteria)
+        cache_key = self._cache_key("ranking", resume_content, job)
+        cached = await self.cache.aget(cache_key) if self.cache else None
+        if cached is not None:
+            record_span("cache_hit", 0.0, operation="rank")
+            return cached
+
+        with stage_timer("prompt_build", "rank"):
+            messages = job.messages(resume_content)
         
         try:
-            response = await self._with_retries(lambda: self.client.chat.completions.create(
-                model=self.deployment_name,
-                messages=[
-                    {"role": "system", "content": "You are an expert HR recruiter and resume analyst. Analyze resumes objectively and provide detailed scoring."},
-                    {"role": "user", "content": prompt}
-                ]
-            ))
+            response = await self._with_retries(self._completion(messages, **self._json_options()), operation="rank", estimated_tokens=self._estimate_tokens(messages))
             
-            result = response.choices[0].message.content
-            return self._parse_ranking_response(result)
+            try:
+                with stage_timer("json_parse", "rank"):
+                    parsed = self._parse_ranking_response(response.choices[0].message.content)
+            except StructuredOutputError as e:
+                parsed = await self._reask_for_json(response.choices[0], e, job.json_format, self._parse_ranking_response, "rank", "ranking")
+            if self.cache:
+                await self.cache.aset(cache_key, parsed)
+            return parsed
             
         except Exception as e:
             raise Exception(f"Azure OpenAI ranking request failed: {str(e)}")
 
-    async def screen_resume(self, resume_content: str, job_requirements: Dict[str, Any], criteria: List[str]) -> Dict[str, Any]:
+    async def analyze_resumes_batch_for_ranking(self, resume_contents: List[str], job: JobPrompt) -> List[Optional[Dict[str, Any]]]:
+        """
+        Analyze several resumes for ranking in a single chat completion
+
+        Returns a list aligned with resume_contents. An entry is None when the
+        model's answer for that resume was missing or malformed, so the caller
+        can fall back to analyze_resume_for_ranking for just that resume.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(resume_contents)
+        cache_keys = [self._cache_key("ranking", content, job) for content in resume_contents]
+
+        pending = []
+        for idx, key in enumerate(cache_keys):
+            cached = await self.cache.aget(key) if self.cache else None
+            if cached is not None:
+                results[idx] = cached
+            else:
+                pending.append(idx)
+
+        if not pending:
+            return results
+        if len(pending) == 1:
+            idx = pending[0]
+            results[idx] = await self.analyze_resume_for_ranking(resume_contents[idx], job)
+            return results
+
+        with stage_timer("prompt_build", "rank_batch"):
+            messages = job.batch_messages([resume_contents[idx] for idx in pending])
+
+        try:
+            response = await self._with_retries(self._completion(messages, **self._json_options()), operation="rank_batch", estimated_tokens=self._estimate_tokens(messages, len(pending)))
+
+            parse_batch = lambda text, reasked=False: self._parse_batch_ranking_response(text, len(pending), reasked)
+            try:
+                with stage_timer("json_parse", "rank_batch"):
+                    entries = parse_batch(response.choices[0].message.content)
+            except StructuredOutputError as e:
+                try:
+                    entries = await self._reask_for_json(response.choices[0], e, BATCH_RANKING_JSON_FORMAT, parse_batch, "rank_batch", "batch ranking")
+                except Exception as reask_error:
+                    # every resume in the batch falls back to a single-resume call
+                    logger.warning(f"Batched ranking answer unusable, re-scoring individually: {str(reask_error)}")
+                    entries = {}
+            if len(entries) < len(pending):
+                AI_PARSE_FAILURES.labels(operation="rank_batch").inc(len(pending) - len(entries))
+        except Exception as e:
+            raise Exception(f"Azure OpenAI batch ranking request failed: {str(e)}")
+
+        for position, idx in enumerate(pending):
+            entry = entries.get(position)
+            if entry is not None:
+                results[idx] = entry
+                if self.cache:
+                    await self.cache.aset(cache_keys[idx], entry)
+        return results
+
+    async def analyze_resume_quick(self, resume_content: str, job: JobPrompt) -> Dict[str, Any]:
+        """
+        First-pass ranking score from the fast tier, for cascade ranking
+
+        Uses the short quick prompt on the fast deployment pool, with the
+        resume cut to RANKING_CASCADE_RESUME_CHARS and a small answer. An
+        unparseable answer is not re-asked; the caller escalates that resume
+        to the full analysis instead.
+        """
+        if self.fast_pool is None:
+            raise Exception("No fast deployment is configured for cascade ranking")
+        content = resume_content[:settings.ranking_cascade_resume_chars]
+        cache_key = make_cache_key("ranking_quick", content, job.job_requirements, job.criteria, self.fast_pool.deployments[0].deployment_name)
+        cached = await self.cache.aget(cache_key) if self.cache else None
+        if cached is not None:
+            record_span("cache_hit", 0.0, operation="rank_quick")
+            return cached
+
+        with stage_timer("prompt_build", "rank_quick"):
+            messages = job.quick_messages(content)
+
+        try:
+            response = await self._with_retries(
+                self._completion(messages, max_tokens=settings.ranking_cascade_max_tokens, **self._json_options()),
+                operation="rank_quick",
+                estimated_tokens=sum(len(m["content"]) for m in messages) // 4 + settings.ranking_cascade_max_tokens,
+                pool=self.fast_pool
+            )
+            try:
+                with stage_timer("json_parse", "rank_quick"):
+                    analysis, method = parse_model_output(response.choices[0].message.content, RankingAnalysis)
+            except StructuredOutputError:
+                AI_STRUCTURED_OUTPUT.labels(operation="rank_quick", method="failed").inc()
+                AI_PARSE_FAILURES.labels(operation="rank_quick").inc()
+                raise
+            AI_STRUCTURED_OUTPUT.labels(operation="rank_quick", method=method).inc()
+            parsed = analysis.model_dump()
+            if self.cache:
+                await self.cache.aset(cache_key, parsed)
+            return parsed
+
+        except Exception as e:
+            raise Exception(f"Azure OpenAI quick ranking request failed: {str(e)}")
+
+    async def screen_resume(self, resume_content: str, job: JobPrompt) -> Dict[str, Any]:
         """
         Screen a single resume for pass/fail decision
+
+        job is the compiled screening prompt for the job requirement.
         """
-        prompt = self._create_screening_prompt(resume_content, job_requirements, criteria)
+        cache_key = self._cache_key("screening", resume_content, job)
+        cached = await self.cache.aget(cache_key) if self.cache else None
+        if cached is not None:
+            record_span("cache_hit", 0.0, operation="screen")
+            return cached
+
+        with stage_timer("prompt_build", "screen"):
+            messages = job.messages(resume_content)
         
         try:
-            response = await self._with_retries(lambda: self.client.chat.completions.create(
-                model=self.deployment_name,
-                messages=[
-                    {"role": "system", "content": "You are an expert HR recruiter conducting initial resume screening. Be thorough but fair in your assessment."},
-                    {"role": "user", "content": prompt}
-                ]
-            ))
+            response = await self._with_retries(self._completion(messages, **self._json_options()), operation="screen", estimated_tokens=self._estimate_tokens(messages))
             
-            result = response.choices[0].message.content
-            return self._parse_screening_response(result)
+            try:
+                with stage_timer("json_parse", "screen"):
+                    parsed = self._parse_screening_response(response.choices[0].message.content)
+            except StructuredOutputError as e:
+                parsed = await self._reask_for_json(response.choices[0], e, job.json_format, self._parse_screening_response, "screen", "screening")
+            if self.cache:
+                await self.cache.aset(cache_key, parsed)
+            return parsed
             
         except Exception as e:
             raise Exception(f"Azure OpenAI screening request failed: {str(e)}")
 
-    def connectivity_check(self) -> Dict[str, Any]:
-        """Perform a lightweight connectivity check to Azure OpenAI."""
-        try:
-            resp = self.client.chat.completions.create(
-                model=self.deployment_name,
+    async def connectivity_check(self) -> Dict[str, Any]:
+        """
+        Perform a lightweight connectivity check to Azure OpenAI.
+
+        With a deployment pool every deployment is checked; the service is
+        reachable while at least one of them answers.
+        """
+        replies = await asyncio.gather(*(self._ping(deployment) for deployment in self.pool), return_exceptions=True)
+        results = {
+            deployment.name: {"ok": False, "error": str(reply)} if isinstance(reply, Exception) else {"ok": True, "reply": reply}
+            for deployment, reply in zip(self.pool, replies)
+        }
+        if len(results) == 1:
+            return next(iter(results.values()))
+        return {
+            "ok": any(result["ok"] for result in results.values()),
+            "deployments": results
+        }
+
+    async def _ping(self, deployment: Deployment) -> str:
+        """Smallest possible completion against one deployment; raises if it does not answer"""
+        resp = await asyncio.wait_for(
+            deployment.client.chat.completions.create(
+                model=deployment.deployment_name,
                 messages=[
                     {"role": "system", "content": "You are a healthy system checker."},
                     {"role": "user", "content": "Reply with OK"}
-                ]
-            )
-            content = resp.choices[0].message.content.strip()
-            return {
-                "ok": True,
-                "reply": content
-            }
-        except Exception as e:
-            return {
-                "ok": False,
-                "error": str(e)
-            }
-
-    def _create_ranking_prompt(self, resume_content: str, job_requirements: Dict[str, Any], criteria: List[str]) -> str:
-        # Provide safe defaults for missing fields
-        title = job_requirements.get('title', 'Position')
-        description = job_requirements.get('description', 'No description provided')
-        required_skills = job_requirements.get('required_skills', [])
-        preferred_skills = job_requirements.get('preferred_skills', [])
-        experience_years = job_requirements.get('experience_years', 'Not specified')
-        education_level = job_requirements.get('education_level', 'Not specified')
-        
-        # Convert skills to strings if they're lists
-        required_skills_str = ', '.join(required_skills) if required_skills else 'None specified'
-        preferred_skills_str = ', '.join(preferred_skills) if preferred_skills else 'None specified'
-        
-        return f"""
-Please analyze the following resume for ranking purposes based on the job requirements.
-
-JOB REQUIREMENTS:
-Title: {title}
-Description: {description}
-Required Skills: {required_skills_str}
-Preferred Skills: {preferred_skills_str}
-Experience Required: {experience_years} years
-Education Level: {education_level}
-
-RESUME CONTENT:
-{resume_content}
-
-RANKING CRITERIA: {', '.join(criteria)}
-
-Please provide a detailed analysis in the following JSON format:
-{{
-    "overall_score": <float between 0-100>,
-    "breakdown": {{
-        "skills_match": <float between 0-100>,
-        "experience": <float between 0-100>,
-        "education": <float between 0-100>,
-        "overall_fit": <float between 0-100>
-    }},
-    "reasoning": "<detailed explanation of the ranking>"
-}}
-
-Focus on:
-1. Skills match with required and preferred skills
-2. Relevant experience and years of experience
-3. Education level and relevance
-4. Overall fit for the position
-"""
-
-    def _create_screening_prompt(self, resume_content: str, job_requirements: Dict[str, Any], criteria: List[str]) -> str:
-        # Provide safe defaults for missing fields
-        title = job_requirements.get('title', 'Position')
-        description = job_requirements.get('description', 'No description provided')
-        required_skills = job_requirements.get('required_skills', [])
-        preferred_skills = job_requirements.get('preferred_skills', [])
-        experience_years = job_requirements.get('experience_years', 'Not specified')
-        education_level = job_requirements.get('education_level', 'Not specified')
-        
-        # Convert skills to strings if they're lists
-        required_skills_str = ', '.join(required_skills) if required_skills else 'None specified'
-        preferred_skills_str = ', '.join(preferred_skills) if preferred_skills else 'None specified'
-        
-        return f"""
-Please screen the following resume for the job position and provide a pass/fail decision with detailed analysis.
-
-JOB REQUIREMENTS:
-Title: {title}
-Description: {description}
-Required Skills: {required_skills_str}
-Preferred Skills: {preferred_skills_str}
-Experience Required: {experience_years} years
-Education Level: {education_level}
-
-RESUME CONTENT:
-{resume_content}
-
-SCREENING CRITERIA: {', '.join(criteria)}
-
-Please provide a detailed screening analysis in the following JSON format:
-{{
-    "passed": <boolean>,
-    "overall_score": <float between 0-100>,
-    "breakdown": {{
-        "skills_match": {{
-            "score": <float between 0-100>,
-            "matched_skills": ["skill1", "skill2"],
-            "missing_skills": ["skill1", "skill2"]
-        }},
-        "experience": {{
-            "score": <float between 0-100>,
-            "years_found": <int>,
-            "relevance": "<high/medium/low>"
-        }},
-        "education": {{
-            "score": <float between 0-100>,
-            "level": "<degree level>",
-            "relevance": "<high/medium/low>"
-        }},
-        "red_flags": {{
-            "found": <boolean>,
-            "issues": ["issue1", "issue2"]
-        }}
-    }},
-    "recommendations": ["recommendation1", "recommendation2"],
-    "red_flags": ["flag1", "flag2"],
-    "strengths": ["strength1", "strength2"]
-}}
-
-SCREENING GUIDELINES:
-- PASS if overall_score >= 60 AND no critical red flags AND meets basic education/skills requirements
-- FAIL only if overall_score < 60 OR has critical red flags OR completely lacks required qualifications
-- Be generous with borderline candidates - focus on potential and growth opportunities
-- Consider that skills can be learned and experience can be gained
-
-Focus on:
-1. Whether the candidate meets minimum requirements (be reasonable about experience gaps)
-2. Skills gap analysis (consider transferable skills)
-3. Experience relevance and duration (don't be overly strict on years if relevance is high)
-4. Education requirements (consider equivalent experience)
-5. Any red flags or concerns (focus on serious issues only)
-6. Candidate strengths and potential
-"""
-
-    def _parse_ranking_response(self, response: str) -> Dict[str, Any]:
-        try:
-            # Extract JSON from response
-            start_idx = response.find('{')
-            end_idx = response.rfind('}') + 1
-            json_str = response[start_idx:end_idx]
-            
-            data = json.loads(json_str)
-            return data
-        except Exception as e:
-            raise Exception(f"Error parsing ranking response: {str(e)}")
+                ],
+                max_tokens=1
+            ),
+            timeout=settings.ai_request_timeout_seconds
+        )
+        return resp.choices[0].message.content.strip()
+
+    @staticmethod
+    def _completion(messages: List[Dict[str, str]], **options: Any):
+        """Request factory for _with_retries: the chat completion, against whichever deployment it is given"""
+        return lambda deployment: deployment.client.chat.completions.with_raw_response.create(
+            model=deployment.deployment_name,
+            messages=messages,
+            **options
+        )
+
+    async def invalidate_cached_analysis(self, kind: str, resume_content: str, job: JobPrompt) -> bool:
+        """Drop a single cached ranking/screening result. Returns True if one was removed."""
+        if not self.cache:
+            return False
+        return await self.cache.ainvalidate(self._cache_key(kind, resume_content, job))
+
+    def _cache_key(self, kind: str, resume_content: str, job: JobPrompt) -> str:
+        return make_cache_key(kind, resume_content, job.job_requirements, job.criteria, self.deployment_name)
+
+    @staticmethod
+    def _estimate_tokens(messages: List[Dict[str, str]], answers: int = 1) -> int:
+        """Rough token cost of a call for the shared token budget (about four characters per token)"""
+        prompt_chars = sum(len(m["content"]) for m in messages)
+        return prompt_chars // 4 + settings.ai_expected_completion_tokens * answers
+
+    def _json_options(self) -> Dict[str, Any]:
+        """Extra completion arguments that constrain the answer to a JSON object"""
+        return {"response_format": {"type": "json_object"}} if settings.ai_json_mode else {}
+
+    def _parse_ranking_response(self, response: str, reasked: bool = False) -> Dict[str, Any]:
+        analysis, method = parse_model_output(response, RankingAnalysis)
+        AI_STRUCTURED_OUTPUT.labels(operation="rank", method="reasked" if reasked else method).inc()
+        return analysis.model_dump()
+
+    def _parse_batch_ranking_response(self, response: str, expected: int, reasked: bool = False) -> Dict[int, Dict[str, Any]]:
+        """
+        Parse a batched ranking answer into {zero-based position: analysis}
+
+        Entries that are missing, duplicated, out of range or malformed are
+        left out so the caller can re-score those resumes one at a time.
+        """
+        entries, method = parse_batch_ranking(response, expected)
+        AI_STRUCTURED_OUTPUT.labels(operation="rank_batch", method="reasked" if reasked else method).inc()
+        return entries
+
+    def _parse_screening_response(self, response: str, reasked: bool = False) -> Dict[str, Any]:
+        analysis, method = parse_model_output(response, ScreeningAnalysis)
+        AI_STRUCTURED_OUTPUT.labels(operation="screen", method="reasked" if reasked else method).inc()
+        return analysis.model_dump()
+
+    async def _reask_for_json(self, choice, error: StructuredOutputError, json_format: str, parse, operation: str, kind: str):
+        """
+        Ask the model once to re-emit an unparseable answer as valid JSON
 
-    def _parse_screening_response(self, response: str) -> Dict[str, Any]:
+        The re-ask carries only the broken answer and the expected format,
+        not the resume or job text, so it costs far less than re-running the
+        analysis. Truncated answers are not re-asked since the missing part
+        would have to be invented.
+
+        Args:
+            choice: The completion choice whose content failed to parse
+            error: Why the tolerant parser gave up
+            json_format: The JSON format the original prompt asked for
+            parse: Parser for the answer, called with reasked=True
+            operation: Metrics label of the original call
+            kind: Human readable call type for the error message
+
+        Returns:
+            Whatever parse returns for the re-asked answer
+        """
         try:
-            # Extract JSON from response
-            start_idx = response.find('{')
-            end_idx = response.rfind('}') + 1
-            json_str = response[start_idx:end_idx]
-            
-            data = json.loads(json_str)
-            return data
+            if not settings.ai_json_reask_enabled or not choice.message.content or choice.finish_reason == "length":
+                raise error
+            messages = [
+                {"role": "system", "content": "You fix malformed JSON. Reply with the corrected JSON only."},
+                {"role": "user", "content": (
+                    f"The answer below was supposed to be JSON in this format:\n{json_format}\n\n"
+                    f"It could not be parsed ({str(error)}). Return the same content as valid JSON "
+                    f"in that format without changing any values.\n\nANSWER:\n{choice.message.content}"
+                )}
+            ]
+            response = await self._with_retries(self._completion(messages, temperature=0, **self._json_options()), operation=f"{operation}_reask", estimated_tokens=self._estimate_tokens(messages))
+            with stage_timer("json_parse", f"{operation}_reask"):
+                return parse(response.choices[0].message.content, reasked=True)
         except Exception as e:
-            raise Exception(f"Error parsing screening response: {str(e)}")
+            AI_STRUCTURED_OUTPUT.labels(operation=operation, method="failed").inc()
+            if operation != "rank_batch":
+                AI_PARSE_FAILURES.labels(operation=operation).inc()
+            raise Exception(f"Error parsing {kind} response: {str(e)}")
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP transport."""
+        await self.pool.close()
+        if self.fast_pool:
+            await self.fast_pool.close()
+        await self.http_client.aclose()
+        if self.shared_limiter:
+            await self.shared_limiter.close()
+
+    async def limiter_stats(self) -> Dict[str, Any]:
+        """Per-deployment adaptive limiter state and totals, plus the shared limiter's when configured"""
+        stats = self.pool.stats()
+        if self.fast_pool:
+            stats["fast_tier"] = self.fast_pool.stats()
+        if self.shared_limiter:
+            stats["shared"] = await self.shared_limiter.stats()
+        if self.hedger:
+            stats["hedging"] = self.hedger.stats()
+        return stats
 
-    async def _with_retries(self, func):
-        """Run a callable with concurrency limit and retries on 429/5xx."""
+    async def _with_retries(self, func, operation: str = "chat", estimated_tokens: int = 0, pool: Optional[DeploymentPool] = None):
+        """
+        Run a request factory with adaptive concurrency limit and retries on 429/5xx.
+
+        func is called with the pool deployment to use and must return a raw
+        API response (``with_raw_response``) so rate limit headers can feed
+        that deployment's limiter; the parsed body is returned. operation
+        labels the per-stage metrics. estimated_tokens is charged to the
+        shared token budget (if any) and corrected from the reported usage
+        once the call completes.
+
+        Each attempt goes to the least loaded deployment of pool (the main
+        pool by default). A retry after a 429/5xx skips the backoff when
+        another deployment can take it now, and a connection failure is
+        retried only if there is one. The shared limits only cover the main
+        pool.
+        """
+        pool = pool or self.pool
+        shared_limiter = self._shared_limiter_for(pool)
         retries = settings.ai_max_retries
         delay = settings.ai_retry_base_seconds
         timeout = settings.ai_request_timeout_seconds
-        async with self._semaphore:
-            for attempt in range(retries + 1):
+        for attempt in range(retries + 1):
+            attempt_start = time.perf_counter()
+            deployment = None
+            try:
+                deployment = await pool.acquire()
                 try:
-                    # Run potentially blocking sync call off the event loop and enforce timeout
-                    return await asyncio.wait_for(asyncio.to_thread(func), timeout=timeout)
-                except Exception as e:
-                    message = str(e)
-                    is_429 = '429' in message or 'Too Many Requests' in message
-                    is_5xx = any(code in message for code in ['500', '502', '503', '504'])
-                    is_timeout = isinstance(e, asyncio.TimeoutError) or 'TimeoutError' in message or 'timed out' in message
-                    if is_timeout:
-                        # On timeout, bubble up immediately (handled as 504 in FastAPI layer)
-                        raise
-                    if attempt < retries and (is_429 or is_5xx):
-                        # jittered exponential backoff
-                        backoff = delay * (2 ** attempt) + random.uniform(0, 0.5)
-                        await asyncio.sleep(backoff)
-                        continue
+                    lease = await shared_limiter.acquire(estimated_tokens) if shared_limiter else None
+                    observe_stage("limiter_wait", operation, time.perf_counter() - attempt_start, attempt=attempt)
+                    call_start = time.perf_counter()
+                    try:
+                        if self.hedger:
+                            raw = await self._hedged_call(func, pool, deployment, operation, timeout, estimated_tokens)
+                        else:
+                            # Native async call; wait_for cancels the in-flight request on timeout
+                            raw = await asyncio.wait_for(self._send(func, pool, deployment), timeout=timeout)
+                    finally:
+                        observe_stage("upstream_call", operation, time.perf_counter() - call_start, attempt=attempt, deployment=deployment.name)
+                        if lease is not None:
+                            await shared_limiter.release(lease)
+                finally:
+                    deployment.limiter.release()
+                record_span("attempt", time.perf_counter() - attempt_start, operation=operation, attempt=attempt, outcome="ok")
+                with stage_timer("response_decode", operation):
+                    parsed = raw.parse()
+                if shared_limiter:
+                    usage = getattr(parsed, "usage", None)
+                    await shared_limiter.record_usage(estimated_tokens, usage.total_tokens if usage else None)
+                return parsed
+            except Exception as e:
+                outcome = self._classify_error(e)
+                record_span("attempt", time.perf_counter() - attempt_start, operation=operation, attempt=attempt, outcome=outcome)
+                if outcome == "timeout":
+                    AI_TIMEOUTS.labels(operation=operation).inc()
+                    if isinstance(e, asyncio.TimeoutError) and deployment is not None:
+                        # wait_for cancelled the call, so _send could not account for it
+                        pool.record_failure(deployment, "timeout")
+                    # On timeout, bubble up immediately (handled as 504 in FastAPI layer)
                     raise
+                if outcome == "429":
+                    AI_RATE_LIMITED.labels(operation=operation).inc()
+                if outcome in ("429", "5xx"):
+                    response = getattr(e, 'response', None)
+                    retry_after = parse_retry_after(response.headers if response is not None else None)
+                    if retry_after and shared_limiter and len(pool) == 1:
+                        # one worker seeing Retry-After holds every worker off
+                        await shared_limiter.pause(retry_after)
+                    if attempt < retries:
+                        if deployment is None or not pool.has_alternative(deployment):
+                            # jittered exponential backoff, never shorter than the server asked for
+                            backoff = delay * (2 ** attempt) + random.uniform(0, 0.5)
+                            with stage_timer("backoff", operation):
+                                await asyncio.sleep(max(backoff, retry_after or 0.0))
+                        AI_RETRIES.labels(operation=operation).inc()
+                        continue
+                if outcome == "connection" and attempt < retries and deployment is not None and pool.has_alternative(deployment):
+                    # An unreachable deployment; another one can take the call
+                    AI_RETRIES.labels(operation=operation).inc()
+                    continue
+                raise
+
+    def _shared_limiter_for(self, pool: DeploymentPool):
+        """The cross-worker limiter guarding pool's calls, if any (only the main pool is shared)"""
+        return self.shared_limiter if pool is self.pool else None
+
+    @staticmethod
+    def _classify_error(e: Exception) -> str:
+        """Outcome label of a failed call: timeout, 429, 5xx, connection or error"""
+        message = str(e)
+        status = getattr(e, 'status_code', None)
+        if isinstance(e, (asyncio.TimeoutError, openai.APITimeoutError)) or 'TimeoutError' in message or 'timed out' in message:
+            return "timeout"
+        if status == 429 or '429' in message or 'Too Many Requests' in message:
+            return "429"
+        if (status is not None and status >= 500) or any(code in message for code in ['500', '502', '503', '504']):
+            return "5xx"
+        if isinstance(e, openai.APIConnectionError):
+            return "connection"
+        return "error"
+
+    async def _send(self, func, pool: DeploymentPool, deployment: Deployment):
+        """Make one call to one deployment and account its outcome to that deployment"""
+        start = time.perf_counter()
+        try:
+            raw = await func(deployment)
+        except asyncio.CancelledError:
+            # Timed out or lost a hedge race; the caller accounts for it
+            raise
+        except Exception as e:
+            response = getattr(e, 'response', None)
+            pool.record_failure(deployment, self._classify_error(e), response.headers if response is not None else None)
+            raise
+        pool.record_success(deployment, raw.headers, time.perf_counter() - start)
+        return raw
+
+    async def _hedged_call(self, func, pool: DeploymentPool, deployment: Deployment, operation: str, timeout: float, estimated_tokens: int):
+        """
+        Make one upstream attempt, sending a duplicate if it is slow
+
+        If the call has not answered after the hedger's delay for this
+        operation, a second copy is sent, as long as the hedge budget covers
+        it and a concurrency slot (and shared slot) is free right now,
+        preferably on another deployment of the pool. The first successful
+        answer wins and the other request is cancelled. If one copy fails,
+        the other is still awaited. Both copies share the attempt's timeout.
+        """
+        cost = max(1, estimated_tokens)
+        start = time.perf_counter()
+        deadline = start + timeout
+        delay = self.hedger.delay_for(operation)
+        primary = asyncio.ensure_future(self._send(func, pool, deployment))
+        pending = {primary}
+        hedge = None
+        hedge_deployment = None
+        hedge_lease = None
+        winner = None
+        timed_out = False
+        error = None
+        try:
+            while pending:
+                now = time.perf_counter()
+                wait = deadline - now
+                if hedge is None and delay is not None:
+                    wait = min(wait, start + delay - now)
+                done, pending = await asyncio.wait(pending, timeout=max(0.0, wait), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        return task.result()
+                    error = task.exception()
+                if done:
+                    continue
+                if time.perf_counter() >= deadline:
+                    timed_out = True
+                    raise asyncio.TimeoutError()
+                # Hedge delay reached with the primary still running
+                delay = None
+                hedge, hedge_deployment, hedge_lease = await self._start_hedge(func, pool, deployment, operation, cost, estimated_tokens)
+                if hedge is not None:
+                    pending.add(hedge)
+                    record_span("hedge", time.perf_counter() - start, operation=operation, deployment=hedge_deployment.name)
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            if hedge is not None:
+                hedge_deployment.limiter.release()
+                if hedge_lease is not None:
+                    await self._shared_limiter_for(pool).release(hedge_lease)
+                outcome = "won" if winner is hedge else "lost" if winner is primary else "failed"
+                AI_HEDGES.labels(operation=operation, outcome=outcome).inc()
+                if winner is hedge:
+                    self.hedger.won += 1
+            if winner is not None or timed_out:
+                # A primary cut short by its hedge or the timeout counts with the time it had run
+                self.hedger.record_primary(operation, time.perf_counter() - start, cost)
+
+    async def _start_hedge(self, func, pool: DeploymentPool, primary: Deployment, operation: str, cost: int, estimated_tokens: int):
+        """Send the duplicate of a slow call if budget and capacity allow; returns (task, deployment, shared lease)"""
+        shared_limiter = self._shared_limiter_for(pool)
+        reason = None
+        lease = None
+        deployment = None
+        if not self.hedger.budget.try_spend(cost):
+            reason = "budget"
+        else:
+            deployment = pool.try_acquire(exclude=primary)
+            if deployment is None:
+                reason = "capacity"
+            elif shared_limiter:
+                lease = await shared_limiter.try_acquire(estimated_tokens)
+                if lease is None:
+                    deployment.limiter.release()
+                    reason = "capacity"
+        if reason is not None:
+            if reason == "capacity":
+                self.hedger.budget.refund(cost)
+            self.hedger.skipped += 1
+            AI_HEDGES.labels(operation=operation, outcome=f"skipped_{reason}").inc()
+            return None, None, None
+        self.hedger.sent += 1
+        return asyncio.ensure_future(self._send(func, pool, deployment)), deployment, lease
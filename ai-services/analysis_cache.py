@@ -0,0 +1,293 @@
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_resume_text(content: str) -> str:
+    """Collapse whitespace so re-extracted copies of the same resume hash equally."""
+    return _WHITESPACE_RE.sub(" ", content or "").strip()
+
+
+def make_cache_key(kind: str, resume_content: str, job_requirements: Dict[str, Any], criteria: List[str], deployment_name: str) -> str:
+    """
+    Build a content-addressed key for an analysis result
+
+    Args:
+        kind: Analysis type ("ranking" or "screening")
+        resume_content: Raw resume text
+        job_requirements: Job requirement dict
+        criteria: Criteria list sent to the model
+        deployment_name: Azure OpenAI deployment that produced the result
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    payload = json.dumps(
+        {
+            "kind": kind,
+            "resume": hashlib.sha256(normalize_resume_text(resume_content).encode("utf-8")).hexdigest(),
+            "job": job_requirements,
+            "criteria": list(criteria),
+            "deployment": deployment_name,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Two-tier cache for AI analysis results
+
+    Entries live in an in-memory LRU with a TTL. When a cache directory is
+    configured, entries are also written to disk so they survive restarts;
+    a memory miss falls through to disk and promotes the entry back.
+
+    The async methods (aget, aset, ainvalidate, aclear) do their disk I/O
+    in a worker thread and are the ones to use from request handlers. Every
+    sweep_interval_seconds, aset also starts a sweep of the disk tier in
+    the background. The sweep deletes expired entries, then the oldest
+    ones beyond max_disk_entries.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 86400.0,
+        cache_dir: Optional[str] = None,
+        max_disk_entries: int = 100000,
+        sweep_interval_seconds: float = 3600.0
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_disk_entries = max_disk_entries
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.swept = 0
+        # Start with a sweep, so leftovers from before a restart are cleaned up
+        self._last_sweep = 0.0
+        self._sweep_task: Optional[asyncio.Future] = None
+
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached value, or None on miss or expiry."""
+        value = self._get_memory(key)
+        if value is not None:
+            return value
+        return self._get_disk(key)
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """get for async callers: a memory hit is answered inline, a disk lookup runs in a thread."""
+        value = self._get_memory(key)
+        if value is not None:
+            return value
+        if not self.cache_dir:
+            with self._lock:
+                self.misses += 1
+            return None
+        return await asyncio.to_thread(self._get_disk, key)
+
+    def _get_memory(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if now - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(value)
+                del self._entries[key]
+        return None
+
+    def _get_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        disk_entry = self._read_disk(key)
+        if disk_entry is not None:
+            stored_at, value = disk_entry
+            if now - stored_at <= self.ttl_seconds:
+                with self._lock:
+                    self._store_memory(key, stored_at, value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                return copy.deepcopy(value)
+            self._delete_disk(key)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a value in memory and, if enabled, on disk."""
+        stored_at = time.time()
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._store_memory(key, stored_at, value)
+        self._write_disk(key, stored_at, value)
+
+    async def aset(self, key: str, value: Dict[str, Any]) -> None:
+        """set for async callers: the disk write runs in a thread."""
+        stored_at = time.time()
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._store_memory(key, stored_at, value)
+        if not self.cache_dir:
+            return
+        await asyncio.to_thread(self._write_disk, key, stored_at, value)
+        self._maybe_sweep()
+
+    async def ainvalidate(self, key: str) -> bool:
+        """invalidate for async callers."""
+        return await asyncio.to_thread(self.invalidate, key)
+
+    async def aclear(self) -> int:
+        """clear for async callers."""
+        return await asyncio.to_thread(self.clear)
+
+    def invalidate(self, key: str) -> bool:
+        """Remove a single entry from both tiers. Returns True if anything was removed."""
+        with self._lock:
+            removed = self._entries.pop(key, None) is not None
+        return self._delete_disk(key) or removed
+
+    def clear(self) -> int:
+        """Remove every entry from both tiers and return how many were dropped."""
+        with self._lock:
+            removed = set(self._entries)
+            self._entries.clear()
+        if self.cache_dir:
+            for path in self.cache_dir.glob("*/*.json"):
+                try:
+                    path.unlink()
+                    removed.add(path.stem)
+                except OSError:
+                    pass
+        return len(removed)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "disk_enabled": self.cache_dir is not None,
+                "max_disk_entries": self.max_disk_entries,
+                "disk_entries_swept": self.swept,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+    def sweep_disk(self) -> int:
+        """
+        Delete expired disk entries, then the oldest beyond max_disk_entries
+
+        Entry age is taken from the file's modification time, which is when
+        it was written. Returns how many entries were deleted.
+        """
+        if not self.cache_dir:
+            return 0
+        now = time.time()
+        removed = 0
+        kept = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                mtime = path.stat().st_mtime
+                if now - mtime > self.ttl_seconds:
+                    path.unlink()
+                    removed += 1
+                else:
+                    kept.append((mtime, path))
+            except OSError:
+                # Deleted or replaced by another worker meanwhile
+                continue
+        if len(kept) > self.max_disk_entries:
+            kept.sort()
+            for _, path in kept[:len(kept) - self.max_disk_entries]:
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError:
+                    continue
+        with self._lock:
+            self.swept += removed
+        if removed:
+            logger.info(f"Swept {removed} analysis cache entries from {self.cache_dir}")
+        return removed
+
+    def _maybe_sweep(self) -> None:
+        now = time.time()
+        if (self._sweep_task is not None and not self._sweep_task.done()) or now - self._last_sweep < self.sweep_interval_seconds:
+            return
+        self._last_sweep = now
+        self._sweep_task = asyncio.ensure_future(asyncio.to_thread(self.sweep_disk))
+
+    def _store_memory(self, key: str, stored_at: float, value: Dict[str, Any]) -> None:
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str) -> Path:
+        # Shard by prefix so a single directory never holds every entry
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _read_disk(self, key: str) -> Optional[tuple]:
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data["stored_at"], data["value"]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {key}: {e}")
+            self._delete_disk(key)
+            return None
+
+    def _write_disk(self, key: str, stored_at: float, value: Dict[str, Any]) -> None:
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"stored_at": stored_at, "value": value}, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to persist cache entry {key}: {e}")
+
+    def _delete_disk(self, key: str) -> bool:
+        if not self.cache_dir:
+            return False
+        try:
+            self._disk_path(key).unlink()
+            return True
+        except OSError:
+            return False
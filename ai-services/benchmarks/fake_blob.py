@@ -0,0 +1,140 @@
+"""
+Local in-memory stand-in for Azure Blob Storage (an Azurite-style subset)
+
+Implements just what the service uses: block blob upload, staged blocks and
+block list commit, download (including ranged reads), properties, delete,
+container existence and paginated listing with metadata. Requests are not
+authenticated. Point AZURE_STORAGE_CONNECTION_STRING at it with
+BlobEndpoint=http://127.0.0.1:<port>/devstoreaccount1. Run standalone:
+
+    python -m benchmarks.fake_blob --port 10000 --latency-ms 15
+"""
+import argparse
+import asyncio
+import random
+import re
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+
+from aiohttp import web
+
+BLOCK_ID = re.compile(r"<(?:Latest|Uncommitted|Committed)>([^<]+)</")
+
+
+def _http_date() -> str:
+    return datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
+
+
+def build_app(latency_ms: float = 0.0, latency_jitter: float = 0.3, seed: int = None) -> web.Application:
+    blobs = {}
+    staged = {}
+    rng = random.Random(seed)
+
+    def headers(blob: dict = None) -> dict:
+        result = {"x-ms-version": "2023-11-03", "x-ms-request-id": "fake", "Date": _http_date(), "ETag": '"0x1"', "Last-Modified": _http_date()}
+        if blob is not None:
+            result["Content-Type"] = blob["content_type"] or "application/octet-stream"
+            result["x-ms-blob-type"] = "BlockBlob"
+            result["x-ms-creation-time"] = blob["created"]
+            for key, value in blob["metadata"].items():
+                result[f"x-ms-meta-{key}"] = value
+        return result
+
+    def request_metadata(request: web.Request) -> dict:
+        return {key[len("x-ms-meta-"):]: value for key, value in request.headers.items() if key.lower().startswith("x-ms-meta-")}
+
+    def store(name: str, data: bytes, request: web.Request) -> None:
+        blobs[name] = {
+            "data": data,
+            "content_type": request.headers.get("x-ms-blob-content-type"),
+            "metadata": request_metadata(request),
+            "created": _http_date()
+        }
+
+    def list_blobs(query) -> web.Response:
+        prefix = query.get("prefix", "")
+        marker = query.get("marker", "")
+        max_results = int(query.get("maxresults", 5000))
+        include_metadata = "metadata" in query.get("include", "")
+        names = sorted(name for name in blobs if name.startswith(prefix) and name > marker)
+        page, rest = names[:max_results], names[max_results:]
+        items = []
+        for name in page:
+            blob = blobs[name]
+            metadata = ""
+            if include_metadata and blob["metadata"]:
+                metadata = "<Metadata>" + "".join(f"<{k}>{escape(v)}</{k}>" for k, v in blob["metadata"].items()) + "</Metadata>"
+            items.append(
+                f"<Blob><Name>{escape(name)}</Name><Properties>"
+                f"<Creation-Time>{blob['created']}</Creation-Time><Last-Modified>{blob['created']}</Last-Modified>"
+                f"<Etag>0x1</Etag><Content-Length>{len(blob['data'])}</Content-Length>"
+                f"<Content-Type>{escape(blob['content_type'] or '')}</Content-Type><BlobType>BlockBlob</BlobType>"
+                f"</Properties>{metadata}</Blob>"
+            )
+        next_marker = page[-1] if rest else ""
+        body = (
+            '<?xml version="1.0" encoding="utf-8"?><EnumerationResults ContainerName="fake">'
+            f"<Prefix>{escape(prefix)}</Prefix><MaxResults>{max_results}</MaxResults>"
+            f"<Blobs>{''.join(items)}</Blobs><NextMarker>{escape(next_marker)}</NextMarker></EnumerationResults>"
+        )
+        return web.Response(body=body, headers={**headers(), "Content-Type": "application/xml"})
+
+    async def handle(request: web.Request) -> web.Response:
+        if latency_ms:
+            await asyncio.sleep(latency_ms * rng.lognormvariate(0, latency_jitter) / 1000.0)
+        parts = request.path.strip("/").split("/", 2)
+        query = request.query
+        if len(parts) < 2:
+            return web.Response(status=400, headers=headers())
+        if len(parts) == 2:
+            if query.get("comp") == "list":
+                return list_blobs(query)
+            return web.Response(status=200, headers=headers())
+
+        name = parts[2]
+        if request.method == "PUT":
+            data = await request.read()
+            comp = query.get("comp")
+            if comp == "block":
+                staged[(name, query["blockid"])] = data
+            elif comp == "blocklist":
+                block_ids = BLOCK_ID.findall(data.decode("utf-8"))
+                store(name, b"".join(staged.pop((name, block_id)) for block_id in block_ids), request)
+            else:
+                store(name, data, request)
+            return web.Response(status=201, headers=headers())
+
+        blob = blobs.get(name)
+        if blob is None:
+            return web.Response(status=404, headers={**headers(), "x-ms-error-code": "BlobNotFound"})
+        if request.method == "DELETE":
+            del blobs[name]
+            return web.Response(status=202, headers=headers())
+        if request.method == "HEAD":
+            return web.Response(status=200, headers={**headers(blob), "Content-Length": str(len(blob["data"]))})
+
+        data = blob["data"]
+        byte_range = request.headers.get("x-ms-range") or request.headers.get("Range")
+        if byte_range:
+            start, end = (int(x) for x in byte_range.split("=")[1].split("-"))
+            end = min(end, len(data) - 1)
+            return web.Response(
+                status=206,
+                body=data[start:end + 1],
+                headers={**headers(blob), "Content-Range": f"bytes {start}-{end}/{len(data)}"}
+            )
+        return web.Response(body=data, headers=headers(blob))
+
+    app = web.Application(client_max_size=256 * 1024 * 1024)
+    app.router.add_route("*", "/{tail:.*}", handle)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=10000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Median latency per storage request")
+    parser.add_argument("--latency-jitter", type=float, default=0.3, help="Lognormal sigma applied to the latency")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    web.run_app(build_app(args.latency_ms, args.latency_jitter, args.seed), host="127.0.0.1", port=args.port, print=None)
@@ -0,0 +1,257 @@
+"""
+Local stand-in for the Azure OpenAI chat completions API
+
+Answers ranking, batched ranking, screening, JSON re-ask and health-check
+prompts with well-formed JSON, with configurable latency, straggler, error,
+429 and malformed-answer injection and a completion-size distribution. Any
+deployment name is accepted; --deployment-capacity gives each one a quota of
+concurrent calls, answering 429 beyond it, and --deployment-latency gives
+named deployments their own median latency (e.g. a small, fast model).
+Answers honor max_tokens. Run standalone:
+
+    python -m benchmarks.fake_openai --port 9100 --latency-ms 300 --rate-limit-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+
+from aiohttp import web
+
+BATCH_MARKER = re.compile(r"=== RESUME (\d+) START ===")
+RESUME_ID = re.compile(r'"resume_id":\s*(\d+)')
+
+
+class FakeOpenAIConfig:
+    def __init__(
+        self,
+        latency_ms: float = 200.0,
+        latency_jitter: float = 0.3,
+        ms_per_completion_token: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        straggler_rate: float = 0.0,
+        straggler_ms: float = 5000.0,
+        retry_after_ms: int = 500,
+        deployment_capacity: int = 0,
+        deployment_latency_ms: dict = None,
+        completion_tokens_min: int = 60,
+        completion_tokens_max: int = 240,
+        seed: int = None
+    ):
+        self.latency_ms = latency_ms
+        self.latency_jitter = latency_jitter
+        self.ms_per_completion_token = ms_per_completion_token
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.malformed_rate = malformed_rate
+        self.straggler_rate = straggler_rate
+        self.straggler_ms = straggler_ms
+        self.retry_after_ms = retry_after_ms
+        self.deployment_capacity = deployment_capacity
+        self.deployment_latency_ms = deployment_latency_ms or {}
+        self.completion_tokens_min = completion_tokens_min
+        self.completion_tokens_max = max(completion_tokens_min, completion_tokens_max)
+        self.random = random.Random(seed)
+
+
+def _filler(tokens: int) -> str:
+    # Roughly four characters per token
+    return ("candidate shows relevant experience " * (tokens // 5 + 1))[: tokens * 4].strip()
+
+
+def _ranking_analysis(rng: random.Random, tokens: int, resume_id: int = None) -> dict:
+    analysis = {
+        "overall_score": round(rng.uniform(20, 95), 1),
+        "breakdown": {
+            "skills_match": round(rng.uniform(20, 95), 1),
+            "experience": round(rng.uniform(20, 95), 1),
+            "education": round(rng.uniform(20, 95), 1),
+            "overall_fit": round(rng.uniform(20, 95), 1)
+        },
+        "reasoning": _filler(tokens)
+    }
+    if resume_id is not None:
+        analysis = {"resume_id": resume_id, **analysis}
+    return analysis
+
+
+def _screening_result(rng: random.Random, tokens: int) -> dict:
+    score = round(rng.uniform(30, 95), 1)
+    return {
+        "passed": score >= 60,
+        "overall_score": score,
+        "breakdown": {
+            "skills_match": {"score": score, "details": _filler(tokens // 3)},
+            "experience": {"score": score, "details": "meets requirements"},
+            "education": {"score": score, "details": "relevant degree"},
+            "red_flags": {"found": False, "details": "none"}
+        },
+        "recommendations": ["Proceed to interview"] if score >= 60 else ["Not a fit"],
+        "red_flags": [],
+        "strengths": ["Relevant experience"]
+    }
+
+
+def _malform(rng: random.Random, content: str) -> str:
+    """Damage a JSON answer the way chat models do: prose, fences, trailing commas or no JSON at all"""
+    kind = rng.choice(("prose", "fence", "trailing_comma", "truncated", "refusal"))
+    if kind == "prose":
+        return f"Here is the analysis {{as requested}}:\n{content}\nLet me know if you need more detail."
+    if kind == "fence":
+        return f"```json\n{content}\n```"
+    if kind == "trailing_comma":
+        return content[:-1] + ",}" if content.endswith("}") else content[:-1] + ",]"
+    if kind == "truncated":
+        return content[: len(content) * 2 // 3]
+    return "I am unable to provide the analysis in the requested format."
+
+
+def build_app(config: FakeOpenAIConfig) -> web.Application:
+    stats = {"requests": 0, "rate_limited": 0, "errors": 0, "malformed": 0, "reasks": 0, "stragglers": 0, "peak_in_flight": 0, "deployments": {}}
+    in_flight = 0
+    deployment_in_flight = {}
+
+    async def chat_completions(request: web.Request) -> web.Response:
+        nonlocal in_flight
+        deployment = request.match_info["deployment"]
+        stats["requests"] += 1
+        stats["deployments"][deployment] = stats["deployments"].get(deployment, 0) + 1
+        if config.deployment_capacity and deployment_in_flight.get(deployment, 0) >= config.deployment_capacity:
+            # Deployment quota exhausted, like a TPM limit
+            stats["rate_limited"] += 1
+            return rate_limited()
+        in_flight += 1
+        deployment_in_flight[deployment] = deployment_in_flight.get(deployment, 0) + 1
+        stats["peak_in_flight"] = max(stats["peak_in_flight"], in_flight)
+        try:
+            return await answer(request)
+        finally:
+            in_flight -= 1
+            deployment_in_flight[deployment] -= 1
+
+    def rate_limited() -> web.Response:
+        return web.json_response(
+            {"error": {"code": "429", "message": "Requests to the deployment have exceeded the rate limit. Too Many Requests"}},
+            status=429,
+            headers={"retry-after-ms": str(config.retry_after_ms)}
+        )
+
+    async def answer(request: web.Request) -> web.Response:
+        body = await request.json()
+        rng = config.random
+
+        if rng.random() < config.rate_limit_rate:
+            stats["rate_limited"] += 1
+            return rate_limited()
+
+        tokens = rng.randint(config.completion_tokens_min, config.completion_tokens_max)
+        if body.get("max_tokens"):
+            tokens = min(tokens, body["max_tokens"])
+        latency_ms = config.deployment_latency_ms.get(request.match_info["deployment"], config.latency_ms)
+        delay = latency_ms * max(0.0, rng.lognormvariate(0, config.latency_jitter)) if config.latency_jitter else latency_ms
+        if rng.random() < config.straggler_rate:
+            # A slow replica or queue: the tail that hedged requests go after
+            stats["stragglers"] += 1
+            delay += config.straggler_ms
+        await asyncio.sleep((delay + tokens * config.ms_per_completion_token) / 1000.0)
+
+        if rng.random() < config.error_rate:
+            stats["errors"] += 1
+            return web.json_response({"error": {"code": "500", "message": "Internal server error"}}, status=500)
+
+        messages = body.get("messages", [])
+        system = " ".join(m.get("content") or "" for m in messages if m.get("role") == "system").lower()
+        prompt = " ".join(m.get("content") or "" for m in messages if m.get("role") != "system")
+        batch_ids = [int(i) for i in BATCH_MARKER.findall(prompt)]
+
+        if "reply with ok" in prompt.lower():
+            content = "OK"
+        elif "malformed json" in system:
+            # Re-ask: rebuild a clean answer of whatever kind the format asks for
+            stats["reasks"] += 1
+            if '"results"' in prompt:
+                ids = sorted({int(i) for i in RESUME_ID.findall(prompt)}) or [1]
+                content = json.dumps({"results": [_ranking_analysis(rng, tokens, resume_id) for resume_id in ids]})
+            elif '"passed"' in prompt:
+                content = json.dumps(_screening_result(rng, tokens))
+            else:
+                content = json.dumps(_ranking_analysis(rng, tokens))
+        else:
+            if len(batch_ids) > 1:
+                content = json.dumps({"results": [_ranking_analysis(rng, tokens, resume_id) for resume_id in batch_ids]})
+            elif "screening" in system:
+                content = json.dumps(_screening_result(rng, tokens))
+            else:
+                content = json.dumps(_ranking_analysis(rng, tokens))
+            if rng.random() < config.malformed_rate:
+                stats["malformed"] += 1
+                content = _malform(rng, content)
+
+        prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+        return web.json_response({
+            "id": f"chatcmpl-fake-{stats['requests']}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": request.match_info["deployment"],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": tokens, "total_tokens": prompt_tokens + tokens}
+        }, headers={"x-ratelimit-remaining-requests": "1000", "x-ratelimit-remaining-tokens": "1000000"})
+
+    async def get_stats(request: web.Request) -> web.Response:
+        snapshot = {**stats, "deployments": dict(stats["deployments"])}
+        if request.query.get("reset_peak"):
+            # lets each benchmark scenario report its own peak concurrency
+            stats["peak_in_flight"] = in_flight
+        return web.json_response(snapshot)
+
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_post("/openai/deployments/{deployment}/chat/completions", chat_completions)
+    app.router.add_get("/_stats", get_stats)
+    return app
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Median upstream latency")
+    parser.add_argument("--latency-jitter", type=float, default=0.3, help="Lognormal sigma applied to the latency")
+    parser.add_argument("--ms-per-completion-token", type=float, default=0.0, help="Extra latency per generated token")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of calls answered with 429")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Fraction of answers returned as damaged JSON")
+    parser.add_argument("--straggler-rate", type=float, default=0.0, help="Fraction of calls delayed by --straggler-ms")
+    parser.add_argument("--straggler-ms", type=float, default=5000.0, help="Extra latency of a straggling call")
+    parser.add_argument("--retry-after-ms", type=int, default=500, help="retry-after-ms sent with injected 429s")
+    parser.add_argument("--deployment-capacity", type=int, default=0, help="Concurrent calls each deployment accepts before answering 429 (0 = unlimited)")
+    parser.add_argument("--deployment-latency", action="append", default=[], metavar="NAME=MS", help="Median latency of one deployment, overriding --latency-ms")
+    parser.add_argument("--completion-tokens", default="60:240", help="min:max completion tokens per answer")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args: argparse.Namespace) -> FakeOpenAIConfig:
+    low, _, high = args.completion_tokens.partition(":")
+    return FakeOpenAIConfig(
+        latency_ms=args.latency_ms,
+        latency_jitter=args.latency_jitter,
+        ms_per_completion_token=args.ms_per_completion_token,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        malformed_rate=args.malformed_rate,
+        straggler_rate=args.straggler_rate,
+        straggler_ms=args.straggler_ms,
+        retry_after_ms=args.retry_after_ms,
+        deployment_capacity=args.deployment_capacity,
+        deployment_latency_ms={name: float(ms) for name, _, ms in (v.partition("=") for v in args.deployment_latency)},
+        completion_tokens_min=int(low),
+        completion_tokens_max=int(high or low),
+        seed=args.seed
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9100)
+    add_arguments(parser)
+    args = parser.parse_args()
+    web.run_app(build_app(config_from_args(args)), host="127.0.0.1", port=args.port, print=None)
@@ -0,0 +1,491 @@
+"""
+Benchmark the AI services end to end against local fake backends
+
+Starts the fake Azure OpenAI and blob servers, launches the FastAPI app with
+uvicorn pointed at them, then drives /rank, /screen and /upload at a fixed
+concurrency. Reports throughput, latency percentiles, error counts and
+peak memory of the app process, and writes the results as JSON so two runs
+can be diffed.
+
+Examples:
+    python -m benchmarks.run_benchmark --concurrency 16 --requests 200
+    python -m benchmarks.run_benchmark --scenarios rank --resumes-per-rank 20 \\
+        --latency-ms 400 --rate-limit-rate 0.05 --app-env AI_MAX_CONCURRENCY=8
+    python -m benchmarks.run_benchmark --scenarios rank --deployment-capacity 8 --deployments 3
+    python -m benchmarks.run_benchmark --scenarios screen,screen_bulk --resumes-per-screen 25
+    python -m benchmarks.run_benchmark --scenarios rank --resumes-per-rank 50 --deployment-latency fast=150 \\
+        --app-env AZURE_OPENAI_FAST_DEPLOYMENT_NAME=fast --app-env RANKING_CASCADE_ENABLED=True
+    python -m benchmarks.run_benchmark --compare results/before.json results/after.json
+
+Run from the ai-services directory.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.fake_openai import add_arguments as add_fake_openai_arguments
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_RESULTS_DIR = Path(__file__).resolve().parent / "results"
+SCENARIOS = ("rank", "screen", "screen_bulk", "upload")
+DEFAULT_SCENARIOS = ("rank", "screen", "upload")
+# Azurite's well-known development account
+DEV_ACCOUNT_KEY = "Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr/KBHBeksoGMGw=="
+
+JOB_REQUIREMENTS = {
+    "title": "Senior Backend Engineer",
+    "description": "Design and operate Python services on Azure with a focus on reliability and performance",
+    "required_skills": ["Python", "FastAPI", "SQL", "Docker", "Azure"],
+    "preferred_skills": ["Kubernetes", "Redis", "Terraform"],
+    "experience_years": 5,
+    "education_level": "Bachelor's"
+}
+
+_VOCABULARY = (
+    "python fastapi django flask sql postgresql docker kubernetes azure aws redis terraform react java "
+    "led designed built migrated optimized scaled mentored delivered reduced improved automated "
+    "services platform pipeline latency throughput reliability team customers data api backend "
+    "university bachelor master degree certification years experience project production"
+).split()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def synthetic_resume(rng: random.Random, words: int) -> str:
+    """Unique resume-like text, so benchmark traffic never hits the analysis cache or upload dedup"""
+    body = " ".join(rng.choice(_VOCABULARY) for _ in range(words))
+    return f"Candidate {uuid.uuid4().hex}\n{rng.randint(1, 15)} years of experience\n{body}"
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    # Nearest-rank percentile
+    index = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def read_memory_kb(pid: int) -> Dict[str, Optional[int]]:
+    """Current (VmRSS) and peak (VmHWM) resident memory of a process; Linux only"""
+    values: Dict[str, Optional[int]] = {"rss_kb": None, "peak_rss_kb": None}
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    values["rss_kb"] = int(line.split()[1])
+                elif line.startswith("VmHWM:"):
+                    values["peak_rss_kb"] = int(line.split()[1])
+    except OSError:
+        pass
+    return values
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SERVICE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Stack:
+    """Fake backends plus the app under test, as child processes"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.processes: List[subprocess.Popen] = []
+        self.data_dir = tempfile.TemporaryDirectory(prefix="peoplenexus-bench-")
+        self.openai_port = free_port()
+        self.blob_port = free_port()
+        self.app_port = free_port()
+        self.app: Optional[subprocess.Popen] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.app_port}"
+
+    def _spawn(self, command: List[str], env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+        process = subprocess.Popen(command, cwd=SERVICE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=None if self.args.verbose else subprocess.DEVNULL)
+        self.processes.append(process)
+        return process
+
+    def app_env(self) -> Dict[str, str]:
+        data = Path(self.data_dir.name)
+        env = {
+            **os.environ,
+            "AZURE_OPENAI_API_KEY": "benchmark",
+            "AZURE_OPENAI_ENDPOINT": f"http://127.0.0.1:{self.openai_port}",
+            "AZURE_OPENAI_DEPLOYMENT_NAME": "benchmark",
+            "AZURE_STORAGE_CONNECTION_STRING": (
+                f"DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;AccountKey={DEV_ACCOUNT_KEY};"
+                f"BlobEndpoint=http://127.0.0.1:{self.blob_port}/devstoreaccount1;"
+            ),
+            "RESUME_INDEX_PATH": str(data / "resume_index.jsonl"),
+            "RANKING_JOBS_DB_PATH": str(data / "ranking_jobs.sqlite3"),
+            "RESUME_METADATA_DB_PATH": str(data / "resume_metadata.sqlite3"),
+            "AI_SHARED_LIMITER_PATH": str(data / "ai_limiter.sqlite3"),
+            "ANALYSIS_CACHE_DIR": "",
+            "DEBUG": "False"
+        }
+        if self.args.deployments > 1:
+            env["AZURE_OPENAI_DEPLOYMENTS"] = json.dumps([
+                {"name": f"benchmark-{i}", "deployment": f"benchmark-{i}"} for i in range(1, self.args.deployments + 1)
+            ])
+        for override in self.args.app_env:
+            key, _, value = override.partition("=")
+            env[key] = value
+        return env
+
+    async def start(self) -> None:
+        await self.start_backends()
+        await self.start_app()
+
+    async def start_backends(self) -> None:
+        fake_openai_args = [
+            "--latency-ms", str(self.args.latency_ms),
+            "--latency-jitter", str(self.args.latency_jitter),
+            "--ms-per-completion-token", str(self.args.ms_per_completion_token),
+            "--error-rate", str(self.args.error_rate),
+            "--rate-limit-rate", str(self.args.rate_limit_rate),
+            "--malformed-rate", str(self.args.malformed_rate),
+            "--straggler-rate", str(self.args.straggler_rate),
+            "--straggler-ms", str(self.args.straggler_ms),
+            "--retry-after-ms", str(self.args.retry_after_ms),
+            "--deployment-capacity", str(self.args.deployment_capacity),
+            "--completion-tokens", self.args.completion_tokens
+        ]
+        for deployment_latency in self.args.deployment_latency:
+            fake_openai_args += ["--deployment-latency", deployment_latency]
+        if self.args.seed is not None:
+            fake_openai_args += ["--seed", str(self.args.seed)]
+        self._spawn([sys.executable, "-m", "benchmarks.fake_openai", "--port", str(self.openai_port), *fake_openai_args])
+        self._spawn([sys.executable, "-m", "benchmarks.fake_blob", "--port", str(self.blob_port), "--latency-ms", str(self.args.storage_latency_ms)])
+        await self._wait_for(f"http://127.0.0.1:{self.openai_port}/_stats")
+        await self._wait_for(f"http://127.0.0.1:{self.blob_port}/devstoreaccount1/resumes?restype=container")
+
+    async def start_app(self, env: Optional[Dict[str, str]] = None, poll_seconds: float = 0.1) -> None:
+        self.app = self._spawn(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(self.app_port), "--log-level", "warning", "--workers", str(self.args.workers)],
+            env=env or self.app_env()
+        )
+        await self._wait_for(f"{self.base_url}/health/live", timeout=60.0, poll_seconds=poll_seconds)
+
+    def stop_app(self) -> None:
+        """Stop the app under test, leaving the fake backends running"""
+        if self.app is None:
+            return
+        self.app.terminate()
+        try:
+            self.app.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.app.kill()
+        self.processes.remove(self.app)
+        self.app = None
+
+    async def _wait_for(self, url: str, timeout: float = 20.0, poll_seconds: float = 0.1) -> None:
+        deadline = time.monotonic() + timeout
+        async with httpx.AsyncClient() as client:
+            while time.monotonic() < deadline:
+                try:
+                    if (await client.get(url)).status_code < 500:
+                        return
+                except httpx.TransportError:
+                    pass
+                for process in self.processes:
+                    if process.poll() is not None:
+                        raise RuntimeError(f"{' '.join(process.args)} exited with code {process.returncode}")
+                await asyncio.sleep(poll_seconds)
+        raise RuntimeError(f"Timed out waiting for {url}")
+
+    async def upstream_stats(self, reset_peak: bool = False) -> Dict[str, Any]:
+        async with httpx.AsyncClient() as client:
+            params = {"reset_peak": "1"} if reset_peak else None
+            return (await client.get(f"http://127.0.0.1:{self.openai_port}/_stats", params=params)).json()
+
+    def stop(self) -> None:
+        for process in reversed(self.processes):
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self.data_dir.cleanup()
+
+
+def request_factory(scenario: str, args: argparse.Namespace, rng: random.Random) -> Callable[[httpx.AsyncClient], Awaitable[httpx.Response]]:
+    def job() -> Dict[str, Any]:
+        # Vary the title so analysis cache keys never repeat across requests
+        return {**JOB_REQUIREMENTS, "title": f"{JOB_REQUIREMENTS['title']} {uuid.uuid4().hex[:8]}"}
+
+    if scenario == "rank":
+        async def rank(client: httpx.AsyncClient) -> httpx.Response:
+            resumes = [
+                {"content": synthetic_resume(rng, args.resume_words), "filename": f"resume_{i}.txt", "format": "text"}
+                for i in range(args.resumes_per_rank)
+            ]
+            payload: Dict[str, Any] = {"resumes": resumes, "job_requirements": job()}
+            if args.batch_mode is not None:
+                payload["batch_mode"] = args.batch_mode
+            return await client.post("/api/v1/resume/rank", json=payload)
+        return rank
+
+    if scenario == "screen":
+        async def screen(client: httpx.AsyncClient) -> httpx.Response:
+            resume = {"content": synthetic_resume(rng, args.resume_words), "filename": "resume.txt", "format": "text"}
+            return await client.post("/api/v1/resume/screen", json={"resume": resume, "job_requirements": job()})
+        return screen
+
+    if scenario == "screen_bulk":
+        async def screen_bulk(client: httpx.AsyncClient) -> httpx.Response:
+            resumes = [
+                {"content": synthetic_resume(rng, args.resume_words), "filename": f"resume_{i}.txt", "format": "text"}
+                for i in range(args.resumes_per_screen)
+            ]
+            return await client.post("/api/v1/resume/screen/bulk", json={"resumes": resumes, "job_requirements": job()})
+        return screen_bulk
+
+    async def upload(client: httpx.AsyncClient) -> httpx.Response:
+        text = synthetic_resume(rng, max(1, args.upload_kb * 1024 // 7)).encode("utf-8")[: args.upload_kb * 1024]
+        return await client.post("/api/v1/resume/upload", files={"file": (f"{uuid.uuid4().hex}.txt", text, "text/plain")})
+    return upload
+
+
+def is_success(scenario: str, response: httpx.Response) -> bool:
+    if response.status_code != 200:
+        return False
+    if scenario == "upload":
+        return bool(response.json().get("success"))
+    if scenario == "rank":
+        # Failed analyses are still returned (scored 0), so look inside
+        return not any(
+            r["ranking"]["reasoning"].startswith("Analysis failed")
+            for r in response.json()["ranked_resumes"]
+        )
+    if scenario == "screen_bulk":
+        # Per-resume failures are reported inline with a 200
+        return response.json()["failed"] == 0
+    return True
+
+
+def resumes_per_request(scenario: str, args: argparse.Namespace) -> Optional[int]:
+    return {"rank": args.resumes_per_rank, "screen": 1, "screen_bulk": args.resumes_per_screen}.get(scenario)
+
+
+async def run_scenario(stack: Stack, scenario: str, args: argparse.Namespace) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    make_request = request_factory(scenario, args, rng)
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    failures = 0
+    remaining = args.requests
+    peak_rss_kb = 0
+    sampling = True
+
+    async def sample_memory() -> None:
+        nonlocal peak_rss_kb
+        while sampling:
+            rss = read_memory_kb(stack.app.pid)["rss_kb"]
+            if rss:
+                peak_rss_kb = max(peak_rss_kb, rss)
+            await asyncio.sleep(0.05)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=stack.base_url, timeout=args.request_timeout, limits=limits) as client:
+        for _ in range(args.warmup):
+            await make_request(client)
+
+        async def worker() -> None:
+            nonlocal remaining, failures
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                try:
+                    response = await make_request(client)
+                    key = str(response.status_code)
+                    ok = is_success(scenario, response)
+                except httpx.HTTPError as e:
+                    key = type(e).__name__
+                    ok = False
+                latencies.append(time.perf_counter() - start)
+                statuses[key] = statuses.get(key, 0) + 1
+                if not ok:
+                    failures += 1
+
+        upstream_before = await stack.upstream_stats(reset_peak=True)
+        sampler = asyncio.create_task(sample_memory())
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        sampling = False
+        await sampler
+        upstream_after = await stack.upstream_stats()
+
+    ordered = sorted(latencies)
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value * 1000, 2) if value is not None else None
+
+    return {
+        "requests": len(latencies),
+        "failures": failures,
+        "status_counts": statuses,
+        "duration_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 3) if elapsed else None,
+        "resumes_per_second": (
+            round(len(latencies) * resumes_per_request(scenario, args) / elapsed, 3)
+            if elapsed and resumes_per_request(scenario, args) else None
+        ),
+        "latency_ms": {
+            "mean": ms(sum(ordered) / len(ordered)) if ordered else None,
+            "p50": ms(percentile(ordered, 50)),
+            "p95": ms(percentile(ordered, 95)),
+            "p99": ms(percentile(ordered, 99)),
+            "max": ms(ordered[-1]) if ordered else None
+        },
+        "peak_rss_kb": peak_rss_kb or None,
+        "upstream": {
+            key: value if key == "peak_in_flight" else (
+                {name: count - upstream_before.get(key, {}).get(name, 0) for name, count in value.items()}
+                if isinstance(value, dict) else value - upstream_before.get(key, 0)
+            )
+            for key, value in upstream_after.items()
+        }
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    stack = Stack(args)
+    try:
+        await stack.start()
+        results = {}
+        for scenario in args.scenarios:
+            print(f"Running {scenario}: {args.requests} requests at concurrency {args.concurrency}...", flush=True)
+            results[scenario] = await run_scenario(stack, scenario, args)
+        memory = read_memory_kb(stack.app.pid)
+        async with httpx.AsyncClient(base_url=stack.base_url) as client:
+            limiter = (await client.get("/api/v1/ai/concurrency")).json()
+    finally:
+        stack.stop()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "arguments": {k: v for k, v in vars(args).items() if k not in ("compare", "output")},
+        },
+        "app": {
+            "peak_rss_kb": memory["peak_rss_kb"],
+            "final_rss_kb": memory["rss_kb"],
+            "ai_concurrency": limiter
+        },
+        "scenarios": results
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n{'scenario':<11} {'reqs':>6} {'fail':>5} {'rps':>9} {'resumes/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak MB':>8}")
+    for name, result in report["scenarios"].items():
+        latency = result["latency_ms"]
+        peak = f"{result['peak_rss_kb'] / 1024:.1f}" if result["peak_rss_kb"] else "-"
+        resumes = result.get("resumes_per_second") or "-"
+        print(
+            f"{name:<11} {result['requests']:>6} {result['failures']:>5} {result['throughput_rps']:>9} {resumes:>9} "
+            f"{latency['p50']:>9} {latency['p95']:>9} {latency['p99']:>9} {peak:>8}"
+        )
+    if report["app"]["peak_rss_kb"]:
+        print(f"\nApp peak RSS: {report['app']['peak_rss_kb'] / 1024:.1f} MB")
+
+
+def compare(before_path: str, after_path: str) -> None:
+    before = json.loads(Path(before_path).read_text())
+    after = json.loads(Path(after_path).read_text())
+    print(f"{before_path} ({before['meta'].get('git_revision')}) -> {after_path} ({after['meta'].get('git_revision')})")
+
+    def delta(old, new) -> str:
+        if old in (None, 0) or new is None:
+            return f"{old} -> {new}"
+        return f"{old} -> {new} ({(new - old) / old * 100:+.1f}%)"
+
+    for name in sorted(set(before["scenarios"]) | set(after["scenarios"])):
+        old, new = before["scenarios"].get(name), after["scenarios"].get(name)
+        if old is None or new is None:
+            print(f"\n{name}: only in {'after' if old is None else 'before'}")
+            continue
+        print(f"\n{name}")
+        print(f"  throughput_rps  {delta(old['throughput_rps'], new['throughput_rps'])}")
+        if old.get("resumes_per_second") is not None or new.get("resumes_per_second") is not None:
+            print(f"  resumes_per_s   {delta(old.get('resumes_per_second'), new.get('resumes_per_second'))}")
+        for key in ("p50", "p95", "p99"):
+            print(f"  {key + '_ms':<15} {delta(old['latency_ms'][key], new['latency_ms'][key])}")
+        print(f"  failures        {old['failures']} -> {new['failures']}")
+        print(f"  peak_rss_kb     {delta(old['peak_rss_kb'], new['peak_rss_kb'])}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Diff two saved result files and exit")
+    parser.add_argument("--scenarios", default=",".join(DEFAULT_SCENARIOS), help=f"Comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent client requests")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests per scenario")
+    parser.add_argument("--request-timeout", type=float, default=120.0)
+    parser.add_argument("--resumes-per-rank", type=int, default=5)
+    parser.add_argument("--resumes-per-screen", type=int, default=20, help="Resumes per screen_bulk request")
+    parser.add_argument("--resume-words", type=int, default=400, help="Resume length in words")
+    parser.add_argument("--batch-mode", type=lambda v: v.lower() == "true", default=None, help="Force batch_mode on /rank (true/false)")
+    parser.add_argument("--upload-kb", type=int, default=64, help="Upload size in KiB")
+    parser.add_argument("--storage-latency-ms", type=float, default=5.0, help="Median fake blob storage latency")
+    parser.add_argument("--workers", type=int, default=1, help="App worker processes (uvicorn --workers)")
+    parser.add_argument("--deployments", type=int, default=1, help="Pool this many fake deployments (AZURE_OPENAI_DEPLOYMENTS)")
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE", help="Extra app settings, e.g. AI_MAX_CONCURRENCY=8")
+    parser.add_argument("--output", default=None, help="Result file (default: benchmarks/results/benchmark-<timestamp>.json)")
+    parser.add_argument("--verbose", action="store_true", help="Show app and fake server logs")
+    add_fake_openai_arguments(parser)
+    args = parser.parse_args(argv)
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    output = Path(args.output) if args.output else DEFAULT_RESULTS_DIR / f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Measure cold start of the AI services against local fake backends
+
+Each run starts a fresh app process (with its own empty data files) and
+records:
+
+    import_ms           importing main in a bare interpreter
+    ready_ms            process spawn until /health/live answers
+    first_templates_ms  first GET /api/v1/job-templates (needs no upstream)
+    first_screen_ms     first POST /api/v1/resume/screen (includes building
+                        the AI client unless the warm-up got there first)
+
+A final degraded run removes the storage configuration and reports whether
+the app still starts and what job templates, screening and upload return.
+Results are written as JSON so two runs can be diffed.
+
+Examples:
+    python -m benchmarks.startup_time --runs 10
+    python -m benchmarks.startup_time --app-env SERVICE_WARMUP=False
+    python -m benchmarks.startup_time --compare results/startup-before.json results/startup-after.json
+
+Run from the ai-services directory.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.fake_openai import add_arguments as add_fake_openai_arguments
+from benchmarks.run_benchmark import (
+    DEFAULT_RESULTS_DIR, JOB_REQUIREMENTS, SERVICE_DIR, Stack, git_revision, synthetic_resume
+)
+
+# Reported by the import probe when loaded by "import main"
+HEAVY_MODULES = ("openai", "azure.storage.blob", "numpy", "scipy")
+DATA_PATH_SETTINGS = ("RESUME_INDEX_PATH", "RANKING_JOBS_DB_PATH", "RESUME_METADATA_DB_PATH", "AI_SHARED_LIMITER_PATH")
+
+_IMPORT_PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({{"import_ms": elapsed * 1000, "heavy_modules": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def run_env(stack: Stack, run: str) -> Dict[str, str]:
+    """App settings for one run, with data files in a fresh directory"""
+    env = stack.app_env()
+    data = Path(stack.data_dir.name) / run
+    data.mkdir()
+    for key in DATA_PATH_SETTINGS:
+        env[key] = str(data / Path(env[key]).name)
+    return env
+
+
+def measure_import(env: Dict[str, str]) -> Dict[str, Any]:
+    result = subprocess.run([sys.executable, "-c", _IMPORT_PROBE], cwd=SERVICE_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        return {"import_ms": None, "heavy_modules": None, "error": result.stderr.strip().splitlines()[-1:]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def screen_payload(rng: random.Random, args: argparse.Namespace) -> Dict[str, Any]:
+    resume = {"content": synthetic_resume(rng, args.resume_words), "filename": "resume.txt", "format": "text"}
+    return {"resume": resume, "job_requirements": JOB_REQUIREMENTS}
+
+
+async def timed(request) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        response = await request
+    except httpx.HTTPError as e:
+        return {"status": type(e).__name__, "ms": round((time.perf_counter() - start) * 1000, 1)}
+    return {"status": response.status_code, "ms": round((time.perf_counter() - start) * 1000, 1)}
+
+
+async def cold_start(stack: Stack, env: Dict[str, str], args: argparse.Namespace, rng: random.Random) -> Dict[str, Any]:
+    result: Dict[str, Any] = measure_import(env)
+    start = time.perf_counter()
+    try:
+        await stack.start_app(env, poll_seconds=0.01)
+    except RuntimeError as e:
+        stack.stop_app()
+        result.update({"started": False, "error": str(e)})
+        return result
+    result.update({"started": True, "ready_ms": round((time.perf_counter() - start) * 1000, 1)})
+    try:
+        async with httpx.AsyncClient(base_url=stack.base_url, timeout=args.request_timeout) as client:
+            templates = await timed(client.get("/api/v1/job-templates"))
+            screen = await timed(client.post("/api/v1/resume/screen", json=screen_payload(rng, args)))
+            upload = await timed(client.post(
+                "/api/v1/resume/upload",
+                files={"file": ("startup.txt", synthetic_resume(rng, 200).encode("utf-8"), "text/plain")}
+            ))
+    finally:
+        stack.stop_app()
+    result.update({
+        "first_templates_ms": templates["ms"],
+        "first_screen_ms": screen["ms"],
+        "status": {"job_templates": templates["status"], "screen": screen["status"], "upload": upload["status"]}
+    })
+    return result
+
+
+def summarize(values: List[Optional[float]]) -> Optional[Dict[str, float]]:
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    return {
+        "median": round(statistics.median(values), 1),
+        "min": round(min(values), 1),
+        "max": round(max(values), 1)
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    stack = Stack(args)
+    rng = random.Random(args.seed)
+    try:
+        await stack.start_backends()
+        runs = []
+        for i in range(args.runs):
+            print(f"Cold start {i + 1}/{args.runs}...", flush=True)
+            runs.append(await cold_start(stack, run_env(stack, f"run-{i}"), args, rng))
+        print("Degraded start without storage configuration...", flush=True)
+        degraded_env = run_env(stack, "degraded")
+        for key in ("AZURE_STORAGE_CONNECTION_STRING", "AZURE_STORAGE_ACCOUNT_NAME", "AZURE_STORAGE_ACCOUNT_KEY"):
+            degraded_env[key] = ""
+        degraded = await cold_start(stack, degraded_env, args, rng)
+    finally:
+        stack.stop()
+
+    started = [r for r in runs if r["started"]]
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "arguments": {k: v for k, v in vars(args).items() if k not in ("compare", "output")},
+        },
+        "summary": {
+            key: summarize([r.get(key) for r in runs])
+            for key in ("import_ms", "ready_ms", "first_templates_ms", "first_screen_ms")
+        },
+        "heavy_modules_at_import": runs[0].get("heavy_modules") if runs else None,
+        "failed_starts": len(runs) - len(started),
+        "degraded": degraded,
+        "runs": runs
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n{'metric':<20} {'median':>9} {'min':>9} {'max':>9}")
+    for key, stats in report["summary"].items():
+        if stats is None:
+            print(f"{key:<20} {'-':>9} {'-':>9} {'-':>9}")
+        else:
+            print(f"{key:<20} {stats['median']:>9} {stats['min']:>9} {stats['max']:>9}")
+    print(f"\nSDK modules loaded by 'import main': {', '.join(report['heavy_modules_at_import'] or []) or 'none'}")
+    degraded = report["degraded"]
+    if degraded["started"]:
+        print(f"Without storage settings: started, status codes {degraded['status']}")
+    else:
+        print(f"Without storage settings: failed to start ({degraded['error']})")
+
+
+def compare(before_path: str, after_path: str) -> None:
+    before = json.loads(Path(before_path).read_text())
+    after = json.loads(Path(after_path).read_text())
+    print(f"{before_path} ({before['meta'].get('git_revision')}) -> {after_path} ({after['meta'].get('git_revision')})")
+    for key in sorted(set(before["summary"]) | set(after["summary"])):
+        old = (before["summary"].get(key) or {}).get("median")
+        new = (after["summary"].get(key) or {}).get("median")
+        change = f" ({(new - old) / old * 100:+.1f}%)" if old and new is not None else ""
+        print(f"  {key + ' median':<27} {old} -> {new}{change}")
+    for label, report in (("before", before), ("after", after)):
+        degraded = report["degraded"]
+        print(f"  degraded ({label}): {degraded['status'] if degraded['started'] else 'failed to start'}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Diff two saved result files and exit")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts to measure")
+    parser.add_argument("--request-timeout", type=float, default=60.0)
+    parser.add_argument("--resume-words", type=int, default=400, help="Resume length in words")
+    parser.add_argument("--storage-latency-ms", type=float, default=5.0, help="Median fake blob storage latency")
+    parser.add_argument("--workers", type=int, default=1, help="App worker processes (uvicorn --workers)")
+    parser.add_argument("--deployments", type=int, default=1, help="Pool this many fake deployments (AZURE_OPENAI_DEPLOYMENTS)")
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE", help="Extra app settings, e.g. SERVICE_WARMUP=False")
+    parser.add_argument("--output", default=None, help="Result file (default: benchmarks/results/startup-<timestamp>.json)")
+    parser.add_argument("--verbose", action="store_true", help="Show app and fake server logs")
+    add_fake_openai_arguments(parser)
+    parser.set_defaults(latency_ms=20.0)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    output = Path(args.output) if args.output else DEFAULT_RESULTS_DIR / f"startup-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
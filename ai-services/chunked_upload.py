@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLargeError(ValueError):
+    """Raised as soon as an upload stream crosses the size limit"""
+
+    def __init__(self, max_bytes: int, received: int):
+        self.max_bytes = max_bytes
+        self.received = received
+        super().__init__(f"File too large. Maximum size is {max_bytes} bytes. Received at least {received} bytes")
+
+
+async def stream_resume_to_blob(
+    storage_client,
+    chunks: AsyncIterator[bytes],
+    original_filename: str,
+    content_type: Optional[str],
+    max_bytes: int,
+    block_size: int = 4 * 1024 * 1024,
+    concurrency: int = 4,
+    find_duplicate: Optional[Callable[[str], Awaitable[Optional[Dict[str, Any]]]]] = None
+) -> Dict[str, Any]:
+    """
+    Pipe an upload stream into a block blob without buffering the whole file
+
+    Incoming chunks are cut into fixed-size blocks that are staged
+    concurrently (at most `concurrency` in flight, so peak memory stays
+    around block_size * concurrency). The stream is hashed as it goes and the
+    upload is abandoned the moment it exceeds max_bytes; uncommitted blocks
+    are discarded by the storage service.
+
+    If find_duplicate returns an existing upload result for the content hash,
+    nothing is committed: a file that fits in one block is never written at
+    all, and the staged blocks of a larger file are left to expire.
+
+    Returns:
+        Dict with "upload_result" (same shape as upload_resume), "content_hash",
+        "content" (the file bytes when it fit in a single block, else None)
+        and "duplicate" (True if an existing blob was returned)
+    """
+    blob_name = storage_client.new_resume_blob_name(original_filename)
+    hasher = hashlib.sha256()
+    buffer = bytearray()
+    block_ids: List[str] = []
+    in_flight: Set[asyncio.Task] = set()
+    slots = asyncio.Semaphore(max(1, concurrency))
+    received = 0
+
+    async def stage(block_id: str, data: bytes) -> None:
+        try:
+            await storage_client.stage_block(blob_name, block_id, data)
+        finally:
+            slots.release()
+
+    async def flush(data: bytes) -> None:
+        await slots.acquire()
+        block_id = f"{len(block_ids):08d}"
+        block_ids.append(block_id)
+        task = asyncio.create_task(stage(block_id, data))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            received += len(chunk)
+            if received > max_bytes:
+                raise UploadTooLargeError(max_bytes, received)
+            hasher.update(chunk)
+            buffer.extend(chunk)
+            while len(buffer) >= block_size:
+                await flush(bytes(buffer[:block_size]))
+                del buffer[:block_size]
+            # Surface staging failures early instead of after the whole stream
+            for task in [t for t in in_flight if t.done()]:
+                task.result()
+
+        file_hash = hasher.hexdigest()
+        single_block = bytes(buffer) if not block_ids else None
+        existing = None
+        if single_block is not None and find_duplicate is not None:
+            existing = await find_duplicate(file_hash)
+        if existing is None and (buffer or not block_ids):
+            await flush(bytes(buffer))
+        buffer.clear()
+        await asyncio.gather(*in_flight)
+        if existing is None and single_block is None and find_duplicate is not None:
+            existing = await find_duplicate(file_hash)
+    except BaseException:
+        for task in in_flight:
+            task.cancel()
+        raise
+
+    if existing is not None:
+        return {
+            "upload_result": existing,
+            "content_hash": file_hash,
+            "content": single_block,
+            "duplicate": True
+        }
+
+    upload_result = await storage_client.commit_blocks(
+        blob_name,
+        block_ids,
+        original_filename,
+        content_type,
+        received,
+        {"content_sha256": file_hash}
+    )
+    return {
+        "upload_result": upload_result,
+        "content_hash": file_hash,
+        "content": single_block,
+        "duplicate": False
+    }
@@ -14,11 +14,18 @@ class Settings(BaseSettings):
     azure_openai_endpoint: str = os.getenv("AZURE_OPENAI_ENDPOINT", "")
     azure_openai_api_version: str = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
     azure_openai_deployment_name: str = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "")
+    # Optional pool of deployments (JSON list) to spread calls over several
+    # TPM quotas; entries fall back to the values above for missing fields
+    azure_openai_deployments: str = os.getenv("AZURE_OPENAI_DEPLOYMENTS", "")
+    # Optional cheap, fast deployment (or JSON pool, same format) for the
+    # first tier of cascade ranking; fields fall back to the values above
+    azure_openai_fast_deployment_name: str = os.getenv("AZURE_OPENAI_FAST_DEPLOYMENT_NAME", "")
+    azure_openai_fast_deployments: str = os.getenv("AZURE_OPENAI_FAST_DEPLOYMENTS", "")
     
     # Server Configuration
     host: str = os.getenv("HOST", "0.0.0.0")
     port: int = int(os.getenv("PORT", "8000"))
-    debug: bool = os.getenv("DEBUG", "True").lower() == "true"
+    debug: bool = os.getenv("DEBUG", "False").lower() == "true"
     
     # CORS Configuration
     allowed_origins_str: str = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000")
@@ -28,16 +35,142 @@ class Settings(BaseSettings):
     azure_storage_container_name: str = os.getenv("AZURE_STORAGE_CONTAINER_NAME", "resumes")
     azure_storage_account_name: str = os.getenv("AZURE_STORAGE_ACCOUNT_NAME", "")
     azure_storage_account_key: str = os.getenv("AZURE_STORAGE_ACCOUNT_KEY", "")
+    # Async storage client HTTP connection pool
+    storage_max_connections: int = int(os.getenv("STORAGE_MAX_CONNECTIONS", "64"))
+    storage_keepalive_seconds: float = float(os.getenv("STORAGE_KEEPALIVE_SECONDS", "30.0"))
 
     # AI Client throttling/retry
     ai_max_concurrency: int = int(os.getenv("AI_MAX_CONCURRENCY", "2"))
     ai_max_retries: int = int(os.getenv("AI_MAX_RETRIES", "3"))
     ai_retry_base_seconds: float = float(os.getenv("AI_RETRY_BASE_SECONDS", "2.0"))
     ai_request_timeout_seconds: float = float(os.getenv("AI_REQUEST_TIMEOUT_SECONDS", "25.0"))
+
+    # Adaptive (AIMD) concurrency: AI_MAX_CONCURRENCY is the starting limit,
+    # which then moves between AI_MIN_CONCURRENCY and AI_CONCURRENCY_CEILING
+    ai_adaptive_concurrency: bool = os.getenv("AI_ADAPTIVE_CONCURRENCY", "True").lower() == "true"
+    ai_min_concurrency: int = int(os.getenv("AI_MIN_CONCURRENCY", "1"))
+    ai_concurrency_ceiling: int = int(os.getenv("AI_CONCURRENCY_CEILING", "32"))
+    ai_concurrency_decrease_factor: float = float(os.getenv("AI_CONCURRENCY_DECREASE_FACTOR", "0.5"))
+
+    # Limits shared by every worker process (and host, with Redis). The
+    # settings above apply per process; these cap the total. 0 disables a limit
+    ai_shared_max_concurrency: int = int(os.getenv("AI_SHARED_MAX_CONCURRENCY", "0"))
+    ai_shared_tokens_per_minute: int = int(os.getenv("AI_SHARED_TOKENS_PER_MINUTE", "0"))
+    ai_expected_completion_tokens: int = int(os.getenv("AI_EXPECTED_COMPLETION_TOKENS", "400"))
+    # Leave the Redis URL empty to share state through a local SQLite file (single host)
+    ai_shared_limiter_redis_url: str = os.getenv("AI_SHARED_LIMITER_REDIS_URL", "")
+    ai_shared_limiter_key: str = os.getenv("AI_SHARED_LIMITER_KEY", "peoplenexus:ai-limiter")
+    ai_shared_limiter_path: str = os.getenv("AI_SHARED_LIMITER_PATH", str(Path(__file__).resolve().parent / "data" / "ai_limiter.sqlite3"))
+
+    # Request hedging: a call still unanswered after the given percentile of
+    # recent latency gets a duplicate, and the first answer wins. The budget
+    # caps hedges at a fraction of the primary calls' estimated tokens
+    ai_hedging_enabled: bool = os.getenv("AI_HEDGING_ENABLED", "False").lower() == "true"
+    ai_hedge_percentile: float = float(os.getenv("AI_HEDGE_PERCENTILE", "95"))
+    ai_hedge_min_delay_seconds: float = float(os.getenv("AI_HEDGE_MIN_DELAY_SECONDS", "0.5"))
+    ai_hedge_min_samples: int = int(os.getenv("AI_HEDGE_MIN_SAMPLES", "20"))
+    ai_hedge_budget_ratio: float = float(os.getenv("AI_HEDGE_BUDGET_RATIO", "0.05"))
+    ai_hedge_budget_burst_tokens: int = int(os.getenv("AI_HEDGE_BUDGET_BURST_TOKENS", "20000"))
+
+    # Deployment pool: a deployment with this many consecutive 429/5xx/timeout
+    # outcomes is ejected, then reinstated once a probe call succeeds. The
+    # ejection doubles after each failed probe, up to the maximum
+    ai_pool_eject_after_failures: int = int(os.getenv("AI_POOL_EJECT_AFTER_FAILURES", "3"))
+    ai_pool_eject_seconds: float = float(os.getenv("AI_POOL_EJECT_SECONDS", "10"))
+    ai_pool_max_eject_seconds: float = float(os.getenv("AI_POOL_MAX_EJECT_SECONDS", "120"))
+
+    # Production server (python start.py --production)
+    server_workers: int = int(os.getenv("SERVER_WORKERS", "4"))
+
+    # AI Client HTTP connection pool
+    ai_http_max_connections: int = int(os.getenv("AI_HTTP_MAX_CONNECTIONS", "100"))
+    ai_http_max_keepalive_connections: int = int(os.getenv("AI_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    ai_http_keepalive_expiry_seconds: float = float(os.getenv("AI_HTTP_KEEPALIVE_EXPIRY_SECONDS", "30.0"))
+
+    # Structured model output: request JSON mode (turn off for deployments
+    # that reject response_format) and allow one re-ask for unparseable answers
+    ai_json_mode: bool = os.getenv("AI_JSON_MODE", "True").lower() == "true"
+    ai_json_reask_enabled: bool = os.getenv("AI_JSON_REASK_ENABLED", "True").lower() == "true"
+
+    # Batched ranking prompts
+    ranking_batch_enabled: bool = os.getenv("RANKING_BATCH_ENABLED", "False").lower() == "true"
+    ranking_batch_max_resumes: int = int(os.getenv("RANKING_BATCH_MAX_RESUMES", "8"))
+    ranking_batch_max_chars: int = int(os.getenv("RANKING_BATCH_MAX_CHARS", "24000"))
+
+    # Cascade ranking: the fast deployment scores every resume with a short
+    # prompt and only the top N are re-scored in full on the main deployment.
+    # Used for requests with at least RANKING_CASCADE_MIN_RESUMES resumes
+    ranking_cascade_enabled: bool = os.getenv("RANKING_CASCADE_ENABLED", "False").lower() == "true"
+    ranking_cascade_top_n: int = int(os.getenv("RANKING_CASCADE_TOP_N", "10"))
+    ranking_cascade_min_resumes: int = int(os.getenv("RANKING_CASCADE_MIN_RESUMES", "20"))
+    # Resume text sent to the fast tier, and its answer size
+    ranking_cascade_resume_chars: int = int(os.getenv("RANKING_CASCADE_RESUME_CHARS", "6000"))
+    ranking_cascade_max_tokens: int = int(os.getenv("RANKING_CASCADE_MAX_TOKENS", "200"))
+
+    # Bulk screening: resumes per request, and how many of one request's
+    # resumes may be waiting on or in the AI limiter at once, so a large
+    # batch does not queue ahead of every interactive request
+    screening_bulk_max_resumes: int = int(os.getenv("SCREENING_BULK_MAX_RESUMES", "500"))
+    screening_bulk_concurrency: int = int(os.getenv("SCREENING_BULK_CONCURRENCY", "16"))
+
+    # Analysis result cache
+    analysis_cache_enabled: bool = os.getenv("ANALYSIS_CACHE_ENABLED", "True").lower() == "true"
+    analysis_cache_max_entries: int = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "2048"))
+    analysis_cache_ttl_seconds: float = float(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", "86400"))
+    # Optional on-disk tier; leave empty to keep the cache in memory only
+    analysis_cache_dir: str = os.getenv("ANALYSIS_CACHE_DIR", "")
+    # Disk entries kept by the hourly sweep (expired entries always go first)
+    analysis_cache_disk_max_entries: int = int(os.getenv("ANALYSIS_CACHE_DISK_MAX_ENTRIES", "100000"))
+
+    # Local resume search index (JSONL log); leave empty to keep it in memory only
+    resume_index_path: str = os.getenv("RESUME_INDEX_PATH", str(Path(__file__).resolve().parent / "data" / "resume_index.jsonl"))
+
+    # Background health probing (health endpoints serve the cached result)
+    health_probe_interval_seconds: float = float(os.getenv("HEALTH_PROBE_INTERVAL_SECONDS", "30"))
+    health_probe_timeout_seconds: float = float(os.getenv("HEALTH_PROBE_TIMEOUT_SECONDS", "10"))
+    # 0 means three probe intervals
+    health_stale_after_seconds: float = float(os.getenv("HEALTH_STALE_AFTER_SECONDS", "0"))
+    # Comma-separated probes (azure_openai, azure_storage) that must pass for /health/ready;
+    # empty means readiness only waits for the first probe cycle
+    health_ready_probes_str: str = os.getenv("HEALTH_READY_PROBES", "")
+
+    # Service initialization: clients are built on first use; warm-up builds
+    # them in the background right after startup. A failed initialization
+    # is retried on use after SERVICE_INIT_RETRY_SECONDS
+    service_warmup: bool = os.getenv("SERVICE_WARMUP", "True").lower() == "true"
+    service_init_retry_seconds: float = float(os.getenv("SERVICE_INIT_RETRY_SECONDS", "30"))
+
+    # Debug endpoints (runtime profiler, stored request traces) are closed
+    # unless DEBUG_TOKEN is set; then they require a matching X-Debug-Token
+    debug_token: str = os.getenv("DEBUG_TOKEN", "")
+
+    # Local resume metadata index (SQLite) backing paginated listing
+    resume_metadata_db_path: str = os.getenv("RESUME_METADATA_DB_PATH", str(Path(__file__).resolve().parent / "data" / "resume_metadata.sqlite3"))
+    resume_list_max_page_size: int = int(os.getenv("RESUME_LIST_MAX_PAGE_SIZE", "1000"))
+
+    # Resume uploads
+    upload_max_bytes: int = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+    upload_chunk_size_bytes: int = int(os.getenv("UPLOAD_CHUNK_SIZE_BYTES", str(256 * 1024)))
+    upload_block_size_bytes: int = int(os.getenv("UPLOAD_BLOCK_SIZE_BYTES", str(4 * 1024 * 1024)))
+    upload_stage_concurrency: int = int(os.getenv("UPLOAD_STAGE_CONCURRENCY", "4"))
+
+    # Server-side resume text extraction
+    extraction_workers: int = int(os.getenv("EXTRACTION_WORKERS", "2"))
+
+    # Background ranking jobs
+    ranking_jobs_db_path: str = os.getenv("RANKING_JOBS_DB_PATH", str(Path(__file__).resolve().parent / "data" / "ranking_jobs.sqlite3"))
+    ranking_job_workers: int = int(os.getenv("RANKING_JOB_WORKERS", "4"))
+    ranking_job_max_resumes: int = int(os.getenv("RANKING_JOB_MAX_RESUMES", "10000"))
+    ranking_job_lease_seconds: float = float(os.getenv("RANKING_JOB_LEASE_SECONDS", "120"))
+    ranking_job_resolve_concurrency: int = int(os.getenv("RANKING_JOB_RESOLVE_CONCURRENCY", "8"))
     
     @property
     def cors_origins(self) -> List[str]:
         return [o.strip() for o in self.allowed_origins_str.split(",") if o.strip()]
+
+    @property
+    def health_ready_probes(self) -> List[str]:
+        return [p.strip() for p in self.health_ready_probes_str.split(",") if p.strip()]
     
     # Pydantic v2 settings configuration
     model_config = SettingsConfigDict(
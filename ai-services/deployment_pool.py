@@ -0,0 +1,282 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Mapping, Optional
+from urllib.parse import urlparse
+
+from adaptive_limiter import AdaptiveConcurrencyLimiter
+from metrics import AI_DEPLOYMENT_EJECTIONS, AI_DEPLOYMENT_REQUESTS, AI_DEPLOYMENT_SECONDS, bind_deployment
+
+logger = logging.getLogger(__name__)
+
+# Outcomes that say something about the deployment itself; plain client
+# errors (bad request, content filter) never count towards ejection
+UNHEALTHY_OUTCOMES = ("429", "5xx", "timeout", "connection")
+
+
+def parse_deployments(
+    raw: str,
+    api_key: str,
+    endpoint: str,
+    api_version: str,
+    deployment_name: str,
+    setting: str = "AZURE_OPENAI_DEPLOYMENTS"
+) -> List[Dict[str, Any]]:
+    """
+    Read a deployment pool setting (AZURE_OPENAI_DEPLOYMENTS by default)
+    into deployment entries
+
+    raw is a JSON list of objects with a "deployment" name and optionally
+    "name", "endpoint", "api_key", "api_version" and "weight". Missing
+    fields fall back to the single-deployment AZURE_OPENAI_* settings, so a
+    pool of deployments on one resource only needs their names. An empty
+    raw value yields the single configured deployment.
+
+    Raises:
+        ValueError: If the setting is malformed or an entry is incomplete
+    """
+    if not raw.strip():
+        entries = [{}]
+    else:
+        try:
+            entries = json.loads(raw)
+        except ValueError as e:
+            raise ValueError(f"{setting} is not valid JSON: {str(e)}")
+        if not isinstance(entries, list) or not entries or not all(isinstance(entry, dict) for entry in entries):
+            raise ValueError(f"{setting} must be a non-empty JSON list of objects")
+
+    deployments = []
+    for position, entry in enumerate(entries):
+        deployment = {
+            "deployment": entry.get("deployment") or deployment_name,
+            "endpoint": entry.get("endpoint") or endpoint,
+            "api_key": entry.get("api_key") or api_key,
+            "api_version": entry.get("api_version") or api_version
+        }
+        missing = [
+            name for name, key in (
+                ("AZURE_OPENAI_API_KEY", "api_key"),
+                ("AZURE_OPENAI_ENDPOINT", "endpoint"),
+                ("AZURE_OPENAI_DEPLOYMENT_NAME", "deployment")
+            ) if not deployment[key]
+        ]
+        if missing:
+            where = f" for {setting} entry {position}" if raw.strip() else ""
+            raise ValueError(
+                f"Missing Azure OpenAI configuration values{where}: {', '.join(missing)}. "
+                "Please set them in your .env file."
+            )
+        try:
+            deployment["weight"] = float(entry.get("weight", 1))
+        except (TypeError, ValueError):
+            raise ValueError(f"{setting} entry {position} has a non-numeric weight")
+        if deployment["weight"] <= 0:
+            raise ValueError(f"{setting} entry {position} needs a positive weight")
+        deployment["name"] = entry.get("name") or f"{urlparse(deployment['endpoint']).hostname}/{deployment['deployment']}"
+        deployments.append(deployment)
+
+    names = [deployment["name"] for deployment in deployments]
+    if len(set(names)) != len(names):
+        raise ValueError(f"{setting} entries need distinct names")
+    return deployments
+
+
+class Deployment:
+    """One Azure OpenAI deployment in the pool, with its own client and AIMD limiter"""
+
+    def __init__(self, name: str, deployment_name: str, endpoint: str, weight: float, client: Any, limiter: AdaptiveConcurrencyLimiter):
+        self.name = name
+        self.deployment_name = deployment_name
+        self.endpoint = endpoint
+        self.weight = weight
+        self.client = client
+        self.limiter = limiter
+        self.consecutive_failures = 0
+        # Set while the deployment is out of rotation
+        self.ejected_until: Optional[float] = None
+        self.eject_seconds = 0.0
+        self.probing = False
+
+    @property
+    def serving(self) -> bool:
+        return self.ejected_until is None
+
+    @property
+    def load(self) -> float:
+        """Outstanding requests (in flight plus queued) relative to the deployment's weight"""
+        return (self.limiter.in_flight + self.limiter.queued + 1) / self.weight
+
+    def stats(self) -> Dict[str, Any]:
+        if self.serving:
+            state = "serving"
+        elif self.probing:
+            state = "probing"
+        else:
+            state = "ejected"
+        return {
+            "name": self.name,
+            "deployment": self.deployment_name,
+            "endpoint": urlparse(self.endpoint).hostname,
+            "weight": self.weight,
+            "state": state,
+            "consecutive_failures": self.consecutive_failures,
+            "ejected_for_seconds": round(max(0.0, self.ejected_until - time.monotonic()), 3) if self.ejected_until else 0.0,
+            **self.limiter.stats()
+        }
+
+
+class DeploymentPool:
+    """
+    Routes AI calls across several deployments of the same model
+
+    Each call goes to the serving deployment with the fewest outstanding
+    requests per unit of weight; a deployment paused by Retry-After is only
+    used when every other one is paused too. Each deployment has its own
+    AIMD limiter, so a 429 from one quota does not slow the others down.
+
+    After eject_after_failures consecutive 429, 5xx, timeout or connection
+    failures a deployment is taken out of rotation for eject_seconds (or as
+    long as the server asked, if longer). Once that has passed, a single
+    probe call decides whether it is reinstated; a failed probe ejects it
+    again for twice as long, up to max_eject_seconds. A pool of one never
+    ejects, and if every deployment is ejected calls are spread over all of
+    them rather than failed outright.
+    """
+
+    def __init__(
+        self,
+        deployments: List[Deployment],
+        probe: Callable[[Deployment], Awaitable[Any]],
+        eject_after_failures: int = 3,
+        eject_seconds: float = 10.0,
+        max_eject_seconds: float = 120.0
+    ):
+        self.deployments = deployments
+        self.probe = probe
+        self.eject_after_failures = max(1, eject_after_failures)
+        self.eject_seconds = max(0.0, eject_seconds)
+        self.max_eject_seconds = max(self.eject_seconds, max_eject_seconds)
+        self._probes = set()
+        for deployment in deployments:
+            bind_deployment(deployment)
+
+    def __len__(self) -> int:
+        return len(self.deployments)
+
+    def __iter__(self) -> Iterator[Deployment]:
+        return iter(self.deployments)
+
+    # Totals over the pool, so it can stand in for a single limiter in bind_limiter
+    @property
+    def in_flight(self) -> int:
+        return sum(d.limiter.in_flight for d in self.deployments)
+
+    @property
+    def queued(self) -> int:
+        return sum(d.limiter.queued for d in self.deployments)
+
+    @property
+    def limit(self) -> int:
+        return sum(int(d.limiter.limit) for d in self.deployments)
+
+    def _candidates(self) -> List[Deployment]:
+        now = time.monotonic()
+        for deployment in self.deployments:
+            if not deployment.serving and not deployment.probing and now >= deployment.ejected_until:
+                self._start_probe(deployment)
+        serving = [d for d in self.deployments if d.serving]
+        return serving or self.deployments
+
+    def _ranked(self, exclude: Optional[Deployment] = None) -> List[Deployment]:
+        """Candidates, best first; exclude (if given) goes last"""
+        return sorted(self._candidates(), key=lambda d: (d is exclude, d.limiter.paused, d.load))
+
+    async def acquire(self) -> Deployment:
+        """Take a concurrency slot on the least loaded deployment, waiting for one if needed"""
+        deployment = self._ranked()[0]
+        await deployment.limiter.acquire()
+        return deployment
+
+    def try_acquire(self, exclude: Optional[Deployment] = None) -> Optional[Deployment]:
+        """Take a slot that is free right now, preferring deployments other than exclude"""
+        for deployment in self._ranked(exclude):
+            if deployment.limiter.try_acquire():
+                return deployment
+        return None
+
+    def has_alternative(self, deployment: Deployment) -> bool:
+        """Whether another serving, unpaused deployment could take a retry straight away"""
+        return any(d is not deployment and d.serving and not d.limiter.paused for d in self.deployments)
+
+    def record_success(self, deployment: Deployment, headers: Optional[Mapping[str, str]], seconds: float) -> None:
+        deployment.limiter.record_success(headers)
+        deployment.consecutive_failures = 0
+        AI_DEPLOYMENT_REQUESTS.labels(deployment=deployment.name, outcome="ok").inc()
+        AI_DEPLOYMENT_SECONDS.labels(deployment=deployment.name).observe(seconds)
+
+    def record_failure(self, deployment: Deployment, outcome: str, headers: Optional[Mapping[str, str]] = None) -> Optional[float]:
+        """
+        Account a failed call against its deployment
+
+        Args:
+            deployment: The deployment that answered (or failed to)
+            outcome: "429", "5xx", "timeout", "connection" or "error"
+            headers: Response headers, for Retry-After
+
+        Returns:
+            The server-requested delay in seconds, if any
+        """
+        AI_DEPLOYMENT_REQUESTS.labels(deployment=deployment.name, outcome=outcome).inc()
+        retry_after = deployment.limiter.record_overload(headers) if outcome in ("429", "5xx") else None
+        if outcome not in UNHEALTHY_OUTCOMES:
+            return retry_after
+        deployment.consecutive_failures += 1
+        if len(self.deployments) > 1 and deployment.serving and deployment.consecutive_failures >= self.eject_after_failures:
+            self._eject(deployment, max(self.eject_seconds, retry_after or 0.0))
+        return retry_after
+
+    def _eject(self, deployment: Deployment, seconds: float) -> None:
+        deployment.eject_seconds = seconds
+        deployment.ejected_until = time.monotonic() + seconds
+        AI_DEPLOYMENT_EJECTIONS.labels(deployment=deployment.name).inc()
+        logger.warning(
+            f"Ejected AI deployment {deployment.name} for {seconds:.1f}s "
+            f"after {deployment.consecutive_failures} consecutive failures"
+        )
+
+    def _start_probe(self, deployment: Deployment) -> None:
+        deployment.probing = True
+        task = asyncio.ensure_future(self._run_probe(deployment))
+        self._probes.add(task)
+        task.add_done_callback(self._probes.discard)
+
+    async def _run_probe(self, deployment: Deployment) -> None:
+        try:
+            await self.probe(deployment)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Probe of ejected AI deployment {deployment.name} failed: {str(e)}")
+            self._eject(deployment, min(self.max_eject_seconds, max(deployment.eject_seconds * 2, self.eject_seconds)))
+        else:
+            deployment.ejected_until = None
+            deployment.consecutive_failures = 0
+            deployment.eject_seconds = 0.0
+            logger.info(f"Reinstated AI deployment {deployment.name}")
+        finally:
+            deployment.probing = False
+
+    async def close(self) -> None:
+        for task in list(self._probes):
+            task.cancel()
+        if self._probes:
+            await asyncio.gather(*self._probes, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "deployments": [d.stats() for d in self.deployments]
+        }
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A probe returns (healthy, details)
+Probe = Callable[[], Awaitable[Tuple[bool, Dict[str, Any]]]]
+
+
+class HealthMonitor:
+    """
+    Probes upstream dependencies in the background and caches the result
+
+    Health endpoints read the cached snapshot, so orchestrator polling never
+    turns into Azure traffic. Probes run concurrently every interval_seconds;
+    a snapshot older than stale_after_seconds (e.g. the prober is stuck)
+    counts as not ready.
+
+    Only the probes named in required (all of them by default) decide
+    readiness. The others are still reported, and a failing one turns the
+    status to "degraded" without making the service unready.
+    """
+
+    def __init__(
+        self,
+        probes: Dict[str, Probe],
+        interval_seconds: float = 30.0,
+        timeout_seconds: float = 10.0,
+        stale_after_seconds: Optional[float] = None,
+        required: Optional[Iterable[str]] = None
+    ):
+        self.probes = probes
+        self.interval_seconds = max(1.0, interval_seconds)
+        self.timeout_seconds = timeout_seconds
+        self.stale_after_seconds = stale_after_seconds or self.interval_seconds * 3
+        self.required = list(probes) if required is None else [name for name in required if name in probes]
+        for name in set(required or []) - set(probes):
+            logger.warning(f"Ignoring unknown required health probe {name}")
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._checked_at: Optional[float] = None
+        self._checked_at_iso: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Health probe cycle failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def refresh(self) -> None:
+        """Run every probe once and replace the cached results"""
+        names = list(self.probes)
+        outcomes = await asyncio.gather(*(self._probe(self.probes[name]) for name in names))
+        self._results = dict(zip(names, outcomes))
+        self._checked_at = time.monotonic()
+        self._checked_at_iso = datetime.now().isoformat()
+
+    async def _probe(self, probe: Probe) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            healthy, details = await asyncio.wait_for(probe(), timeout=self.timeout_seconds)
+        except asyncio.TimeoutError:
+            healthy, details = False, {"error": f"probe timed out after {self.timeout_seconds}s"}
+        except Exception as e:
+            healthy, details = False, {"error": str(e)}
+        return {
+            "healthy": healthy,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "details": details
+        }
+
+    def age_seconds(self) -> Optional[float]:
+        if self._checked_at is None:
+            return None
+        return time.monotonic() - self._checked_at
+
+    def is_ready(self) -> bool:
+        age = self.age_seconds()
+        return (
+            age is not None
+            and age <= self.stale_after_seconds
+            and all(self._results[name]["healthy"] for name in self.required if name in self._results)
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        age = self.age_seconds()
+        if age is None:
+            status = "unknown"
+        elif age > self.stale_after_seconds:
+            status = "stale"
+        elif not self.is_ready():
+            status = "unhealthy"
+        elif all(result["healthy"] for result in self._results.values()):
+            status = "healthy"
+        else:
+            status = "degraded"
+        return {
+            "status": status,
+            "ready": self.is_ready(),
+            "required": self.required,
+            "checked_at": self._checked_at_iso,
+            "age_seconds": round(age, 3) if age is not None else None,
+            "probe_interval_seconds": self.interval_seconds,
+            "services": self._results
+        }
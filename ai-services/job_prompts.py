@@ -0,0 +1,183 @@
+import json
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List
+
+from structured_output import BATCH_RANKING_JSON_FORMAT, QUICK_RANKING_JSON_FORMAT, RANKING_JSON_FORMAT, SCREENING_JSON_FORMAT
+
+RANKING_CRITERIA = ["skills_match", "experience", "education", "overall_fit"]
+SCREENING_CRITERIA = ["skills_match", "experience", "education", "red_flags"]
+
+RANKING_SYSTEM_MESSAGE = "You are an expert HR recruiter and resume analyst. Analyze resumes objectively and provide detailed scoring."
+BATCH_RANKING_SYSTEM_MESSAGE = "You are an expert HR recruiter and resume analyst. Analyze resumes objectively and independently, and provide detailed scoring for each one."
+QUICK_RANKING_SYSTEM_MESSAGE = "You are an HR recruiter giving quick first-pass resume scores. Be brief."
+SCREENING_SYSTEM_MESSAGE = "You are an expert HR recruiter conducting initial resume screening. Be thorough but fair in your assessment."
+
+_RANKING_FOCUS = """Focus on:
+1. Skills match with required and preferred skills
+2. Relevant experience and years of experience
+3. Education level and relevance
+4. Overall fit for the position"""
+
+_SCREENING_GUIDELINES = """SCREENING GUIDELINES:
+- PASS if overall_score >= 60 AND no critical red flags AND meets basic education/skills requirements
+- FAIL only if overall_score < 60 OR has critical red flags OR completely lacks required qualifications
+- Be generous with borderline candidates - focus on potential and growth opportunities
+- Consider that skills can be learned and experience can be gained
+
+Focus on:
+1. Whether the candidate meets minimum requirements (be reasonable about experience gaps)
+2. Skills gap analysis (consider transferable skills)
+3. Experience relevance and duration (don't be overly strict on years if relevance is high)
+4. Education requirements (consider equivalent experience)
+5. Any red flags or concerns (focus on serious issues only)
+6. Candidate strengths and potential"""
+
+
+def _job_block(job_requirements: Dict[str, Any]) -> str:
+    # Provide safe defaults for missing fields
+    title = job_requirements.get('title') or 'Position'
+    description = job_requirements.get('description') or 'No description provided'
+    required_skills = job_requirements.get('required_skills') or []
+    preferred_skills = job_requirements.get('preferred_skills') or []
+    experience_years = job_requirements.get('experience_years')
+    if experience_years is None:
+        experience_years = 'Not specified'
+    education_level = job_requirements.get('education_level') or 'Not specified'
+
+    return f"""JOB REQUIREMENTS:
+Title: {title}
+Description: {description}
+Required Skills: {', '.join(required_skills) or 'None specified'}
+Preferred Skills: {', '.join(preferred_skills) or 'None specified'}
+Experience Required: {experience_years} years
+Education Level: {education_level}"""
+
+
+class JobPrompt:
+    """
+    Prompt text for one job requirement, built once and reused per resume
+
+    Everything that depends only on the job (instructions, requirements,
+    criteria, output format and guidelines) sits in a static prefix, and
+    resume text is only ever appended after it. Identical leading tokens
+    across calls for the same job let Azure OpenAI's prompt caching reuse
+    the prefix, and no job text is re-formatted per resume.
+    """
+
+    def __init__(self, kind: str, job_requirements: Dict[str, Any], criteria: List[str]):
+        if kind not in ("ranking", "screening"):
+            raise ValueError(f"Unknown prompt kind {kind!r}")
+        self.kind = kind
+        self.job_requirements = job_requirements
+        self.criteria = list(criteria)
+        job_block = _job_block(job_requirements)
+        criteria_line = ', '.join(self.criteria)
+
+        if kind == "ranking":
+            self.system_message = RANKING_SYSTEM_MESSAGE
+            self.json_format = RANKING_JSON_FORMAT
+            self.prefix = f"""Please analyze the resume at the end of this message for ranking purposes based on the job requirements.
+
+{job_block}
+
+RANKING CRITERIA: {criteria_line}
+
+Please provide a detailed analysis in the following JSON format:
+{RANKING_JSON_FORMAT}
+
+{_RANKING_FOCUS}
+"""
+            self.batch_prefix = f"""Please analyze each of the resumes at the end of this message for ranking purposes based on the job requirements.
+Score every resume independently; do not compare candidates against each other.
+
+{job_block}
+
+RANKING CRITERIA: {criteria_line}
+
+Respond with a JSON object whose "results" array contains exactly one object per resume, in the following format:
+{BATCH_RANKING_JSON_FORMAT}
+
+{_RANKING_FOCUS}
+"""
+            # First tier of cascade ranking: same answer format, short instructions and reasoning
+            self.quick_prefix = f"""Give a quick first-pass score for the resume at the end of this message against the job requirements. The highest scoring candidates are assessed in detail later.
+
+{job_block}
+
+Respond with this JSON object only:
+{QUICK_RANKING_JSON_FORMAT}
+"""
+        else:
+            self.system_message = SCREENING_SYSTEM_MESSAGE
+            self.json_format = SCREENING_JSON_FORMAT
+            self.prefix = f"""Please screen the resume at the end of this message for the job position and provide a pass/fail decision with detailed analysis.
+
+{job_block}
+
+SCREENING CRITERIA: {criteria_line}
+
+Please provide a detailed screening analysis in the following JSON format:
+{SCREENING_JSON_FORMAT}
+
+{_SCREENING_GUIDELINES}
+"""
+            self.batch_prefix = None
+            self.quick_prefix = None
+
+    def messages(self, resume_content: str) -> List[Dict[str, str]]:
+        """Chat messages for a single resume: static system + prefix, resume last"""
+        return [
+            {"role": "system", "content": self.system_message},
+            {"role": "user", "content": f"{self.prefix}\nRESUME CONTENT:\n{resume_content}\n"}
+        ]
+
+    def quick_messages(self, resume_content: str) -> List[Dict[str, str]]:
+        """Chat messages for the fast first-pass score of cascade ranking (ranking only)"""
+        if self.quick_prefix is None:
+            raise ValueError("Quick prompts are only available for ranking")
+        return [
+            {"role": "system", "content": QUICK_RANKING_SYSTEM_MESSAGE},
+            {"role": "user", "content": f"{self.quick_prefix}\nRESUME CONTENT:\n{resume_content}\n"}
+        ]
+
+    def batch_messages(self, resume_contents: List[str]) -> List[Dict[str, str]]:
+        """Chat messages scoring several resumes in one completion (ranking only)"""
+        if self.batch_prefix is None:
+            raise ValueError("Batched prompts are only available for ranking")
+        resumes_block = "\n\n".join(
+            f"=== RESUME {i} START ===\n{content}\n=== RESUME {i} END ==="
+            for i, content in enumerate(resume_contents, 1)
+        )
+        return [
+            {"role": "system", "content": BATCH_RANKING_SYSTEM_MESSAGE},
+            {"role": "user", "content": f"{self.batch_prefix}\nRESUMES ({len(resume_contents)}):\n{resumes_block}\n"}
+        ]
+
+
+def _job_key(kind: str, job_requirements: Dict[str, Any], criteria: Iterable[str]) -> str:
+    return json.dumps({"kind": kind, "job": job_requirements, "criteria": list(criteria)}, sort_keys=True, default=str)
+
+
+# Template prompts are compiled at startup and never evicted
+_pinned: Dict[str, JobPrompt] = {}
+
+
+@lru_cache(maxsize=256)
+def _cached_job_prompt(job_key: str) -> JobPrompt:
+    data = json.loads(job_key)
+    return JobPrompt(data["kind"], data["job"], data["criteria"])
+
+
+def get_job_prompt(kind: str, job_requirements: Dict[str, Any], criteria: List[str]) -> JobPrompt:
+    """Return the compiled prompt for a job requirement, building it at most once."""
+    job_key = _job_key(kind, job_requirements, criteria)
+    pinned = _pinned.get(job_key)
+    return pinned if pinned is not None else _cached_job_prompt(job_key)
+
+
+def precompile_job_prompts(templates: Dict[str, Dict[str, Any]]) -> None:
+    """Compile and pin the ranking and screening prompts of every job template"""
+    for job_requirements in templates.values():
+        for kind, criteria in (("ranking", RANKING_CRITERIA), ("screening", SCREENING_CRITERIA)):
+            job_key = _job_key(kind, job_requirements, criteria)
+            _pinned[job_key] = JobPrompt(kind, json.loads(job_key)["job"], criteria)
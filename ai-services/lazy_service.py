@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ServiceUnavailableError(Exception):
+    """A dependency could not be initialized (missing configuration, SDK or upstream)"""
+
+    def __init__(self, name: str, reason: str):
+        super().__init__(f"{name} is unavailable: {reason}")
+        self.name = name
+        self.reason = reason
+
+
+class LazyService(Generic[T]):
+    """
+    A dependency that is built on first use instead of at import time
+
+    The factory (and any heavy SDK import inside it) runs the first time
+    get() is awaited; concurrent callers share that one initialization. A
+    failure is remembered for retry_after_seconds, so a misconfigured or
+    unreachable dependency fails its own endpoints fast with
+    ServiceUnavailableError while the rest of the service keeps working,
+    and is retried once the window has passed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], Awaitable[T]],
+        closer: Optional[Callable[[T], Awaitable[None]]] = None,
+        retry_after_seconds: float = 30.0
+    ):
+        self.name = name
+        self.factory = factory
+        self.closer = closer
+        self.retry_after_seconds = retry_after_seconds
+        self._instance: Optional[T] = None
+        self._lock = asyncio.Lock()
+        self._error: Optional[str] = None
+        self._failed_at: Optional[float] = None
+        self._init_seconds: Optional[float] = None
+
+    def peek(self) -> Optional[T]:
+        """The instance if it has already been built, without building it"""
+        return self._instance
+
+    async def get(self) -> T:
+        if self._instance is not None:
+            return self._instance
+        async with self._lock:
+            if self._instance is not None:
+                return self._instance
+            if self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_after_seconds:
+                raise ServiceUnavailableError(self.name, self._error)
+            start = time.perf_counter()
+            try:
+                instance = await self.factory()
+            except Exception as e:
+                self._error = str(e) or type(e).__name__
+                self._failed_at = time.monotonic()
+                logger.error(f"Failed to initialize {self.name}: {self._error}")
+                raise ServiceUnavailableError(self.name, self._error) from e
+            self._init_seconds = time.perf_counter() - start
+            self._instance = instance
+            self._error = None
+            self._failed_at = None
+            logger.info(f"Initialized {self.name} in {self._init_seconds * 1000:.0f} ms")
+            return instance
+
+    async def close(self) -> None:
+        instance, self._instance = self._instance, None
+        if instance is not None and self.closer is not None:
+            try:
+                await self.closer(instance)
+            except Exception as e:
+                logger.warning(f"Failed to close {self.name}: {e}")
+
+    def status(self) -> Dict[str, Any]:
+        if self._instance is not None:
+            state = "ready"
+        elif self._failed_at is not None:
+            state = "failed"
+        else:
+            state = "not_initialized"
+        return {
+            "state": state,
+            "init_ms": round(self._init_seconds * 1000, 1) if self._init_seconds is not None else None,
+            "error": self._error
+        }
@@ -1,19 +1,36 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Query, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response, PlainTextResponse
 import logging
-from typing import List, Optional
+import os
+import secrets
+from typing import Dict, List, Optional
 import json
+import time
+import asyncio
+from datetime import date
+from functools import partial
 
 from config import settings
 from models import (
     ResumeRankingRequest, ResumeScreeningRequest, ResumeRankingResponse, 
-    ResumeScreeningResponse, ErrorResponse, FileUploadResponse, ResumeStorageInfo
+    ResumeScreeningResponse, ErrorResponse, FileUploadResponse, ResumeStorageInfo,
+    ResumeSearchRequest, ResumeSearchResponse, RankingJobRequest, RankingJobStatus,
+    RankingJobResultsPage, ResumeRankingResult, ResumeListResponse, ProfilerSettings,
+    BulkScreeningRequest, BulkScreeningResponse
 )
 from resume_ranker import ResumeRanker
 from resume_screener import ResumeScreener
-from storage_client import AzureBlobStorageClient
-from ai_client import AzureOpenAIClient
+from ranking_jobs import RankingJobStore, RankingJobManager
+from resume_metadata_index import ResumeMetadataIndex
+from health_monitor import HealthMonitor
+from metrics import CONTENT_TYPE_LATEST, render_latest
+from request_trace import TraceStore, start_trace
+from profiler import RequestProfiler
+from text_extraction import ResumeTextService
+from chunked_upload import stream_resume_to_blob, UploadTooLargeError
+from job_prompts import precompile_job_prompts
+from lazy_service import LazyService, ServiceUnavailableError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -35,16 +52,161 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services
-try:
-    ai_client = AzureOpenAIClient()
-    resume_ranker = ResumeRanker(ai_client)
-    resume_screener = ResumeScreener(ai_client)
-    storage_client = AzureBlobStorageClient()
-    logger.info("All services initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize services: {e}")
-    raise
+# Services are built on first use (or by the background warm-up after
+# startup) rather than at import time: the SDK imports stay off the cold
+# start path, and a missing setting or unreachable upstream only fails the
+# endpoints that need that dependency
+resume_metadata = ResumeMetadataIndex(settings.resume_metadata_db_path)
+ranking_job_store = RankingJobStore(settings.ranking_jobs_db_path)
+_background_tasks = set()
+
+def run_in_background(coro) -> None:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+def _new_ai_client():
+    from ai_client import AzureOpenAIClient
+    return AzureOpenAIClient()
+
+def _new_storage_client():
+    from storage_client import AsyncAzureBlobStorageClient
+    return AsyncAzureBlobStorageClient()
+
+def _new_search_index():
+    from search_index import ResumeSearchIndex
+    return ResumeSearchIndex(settings.resume_index_path or None)
+
+async def build_ai_client():
+    return await asyncio.to_thread(_new_ai_client)
+
+async def build_storage_client():
+    client = await asyncio.to_thread(_new_storage_client)
+    if await asyncio.to_thread(len, resume_metadata) == 0:
+        run_in_background(backfill_resume_metadata(client))
+    return client
+
+async def build_search_index():
+    return await asyncio.to_thread(_new_search_index)
+
+async def build_resume_ranker():
+    return ResumeRanker(await ai_client_service.get())
+
+async def build_resume_screener():
+    return ResumeScreener(await ai_client_service.get())
+
+async def build_text_service():
+    return ResumeTextService(await storage_client_service.get(), workers=settings.extraction_workers)
+
+async def load_resume_text(blob_name: str) -> Optional[str]:
+    text_service = await text_extraction_service.get()
+    return await text_service.text_for_blob(blob_name)
+
+async def build_ranking_jobs():
+    manager = RankingJobManager(
+        ranking_job_store,
+        await resume_ranker_service.get(),
+        workers=settings.ranking_job_workers,
+        lease_seconds=settings.ranking_job_lease_seconds,
+        resolve_text=load_resume_text,
+        resolve_concurrency=settings.ranking_job_resolve_concurrency
+    )
+    await manager.start()
+    return manager
+
+async def close_text_service(text_service) -> None:
+    text_service.shutdown()
+
+_retry = settings.service_init_retry_seconds
+ai_client_service = LazyService("azure_openai", build_ai_client, lambda client: client.aclose(), _retry)
+storage_client_service = LazyService("azure_storage", build_storage_client, lambda client: client.close(), _retry)
+search_index_service = LazyService("search_index", build_search_index, retry_after_seconds=_retry)
+resume_ranker_service = LazyService("resume_ranker", build_resume_ranker, retry_after_seconds=_retry)
+resume_screener_service = LazyService("resume_screener", build_resume_screener, retry_after_seconds=_retry)
+text_extraction_service = LazyService("text_extraction", build_text_service, close_text_service, _retry)
+ranking_jobs_service = LazyService("ranking_jobs", build_ranking_jobs, lambda manager: manager.stop(), _retry)
+SERVICES = [
+    ai_client_service, storage_client_service, search_index_service, resume_ranker_service,
+    resume_screener_service, text_extraction_service, ranking_jobs_service
+]
+
+async def require_service(service: LazyService):
+    """Resolve a lazily built service, or fail the request with 503 if it is unavailable"""
+    try:
+        return await service.get()
+    except ServiceUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+def service_dependency(service: LazyService):
+    async def dependency():
+        return await require_service(service)
+    return dependency
+
+get_ai_client = service_dependency(ai_client_service)
+get_storage_client = service_dependency(storage_client_service)
+get_search_index = service_dependency(search_index_service)
+get_resume_ranker = service_dependency(resume_ranker_service)
+get_resume_screener = service_dependency(resume_screener_service)
+get_text_service = service_dependency(text_extraction_service)
+get_ranking_jobs = service_dependency(ranking_jobs_service)
+
+async def probe_azure_openai():
+    ai_client = await ai_client_service.get()
+    result = await ai_client.connectivity_check()
+    return result.get("ok", False), result
+
+async def probe_azure_storage():
+    storage_client = await storage_client_service.get()
+    result = await storage_client.health_check()
+    return result.get("status") == "healthy", result
+
+health_monitor = HealthMonitor(
+    {
+        "azure_openai": probe_azure_openai,
+        "azure_storage": probe_azure_storage
+    },
+    interval_seconds=settings.health_probe_interval_seconds,
+    timeout_seconds=settings.health_probe_timeout_seconds,
+    stale_after_seconds=settings.health_stale_after_seconds or None,
+    required=settings.health_ready_probes
+)
+
+@app.on_event("startup")
+async def startup_services():
+    """Start health probing and warm up services in the background without waiting on any upstream"""
+    await health_monitor.start()
+    if settings.service_warmup:
+        run_in_background(warm_up_services())
+    elif await asyncio.to_thread(ranking_job_store.pending_work):
+        # Unfinished ranking jobs resume without waiting for the next submission
+        run_in_background(warm_up_services([ranking_jobs_service]))
+
+async def warm_up_services(services: Optional[List[LazyService]] = None) -> None:
+    """Build services ahead of their first request; failures are logged and retried on use"""
+    await asyncio.gather(*(service.get() for service in services or SERVICES), return_exceptions=True)
+
+async def backfill_resume_metadata(storage_client) -> None:
+    """Populate an empty resume metadata index from storage, one page at a time"""
+    token = None
+    indexed = 0
+    try:
+        while True:
+            records, token = await storage_client.list_resumes_page(page_size=1000, continuation_token=token)
+            indexed += await asyncio.to_thread(resume_metadata.upsert_many, records)
+            if not token:
+                break
+        logger.info(f"Resume metadata index backfilled with {indexed} resumes")
+    except Exception as e:
+        logger.warning(f"Resume metadata backfill stopped after {indexed} resumes: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_services():
+    """Stop background workers and release pooled upstream connections of the services that were built"""
+    await health_monitor.stop()
+    await ranking_jobs_service.close()
+    await ai_client_service.close()
+    await text_extraction_service.close()
+    await storage_client_service.close()
 
 # Job templates
 JOB_TEMPLATES = {
@@ -81,6 +243,18 @@ JOB_TEMPLATES = {
         "education_level": "Bachelor's Degree",
     },
 }
+# Template ranking/screening prompts are built once, not per request
+precompile_job_prompts(JOB_TEMPLATES)
+
+def resolve_job_requirements(job_requirements, template_id: Optional[str]) -> dict:
+    """Job requirement dict from an inline requirement or a JOB_TEMPLATES id"""
+    if job_requirements is not None:
+        return job_requirements.dict()
+    if template_id is not None:
+        if template_id not in JOB_TEMPLATES:
+            raise HTTPException(status_code=404, detail=f"Job template {template_id} not found")
+        return JOB_TEMPLATES[template_id]
+    raise HTTPException(status_code=400, detail="Either job_requirements or template_id must be provided")
 
 @app.get("/")
 async def root():
@@ -90,75 +264,285 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "health": "/health",
+            "liveness": "/health/live",
+            "readiness": "/health/ready",
+            "metrics": "/metrics",
             "resume_ranking": "/api/v1/resume/rank",
+            "resume_ranking_stream": "/api/v1/resume/rank/stream",
+            "ranking_jobs": "/api/v1/jobs/rank",
             "resume_screening": "/api/v1/resume/screen",
+            "resume_screening_bulk": "/api/v1/resume/screen/bulk",
             "file_upload": "/api/v1/resume/upload",
-            "job_templates": "/api/v1/job-templates"
+            "file_upload_stream": "/api/v1/resume/upload/stream",
+            "resume_search": "/api/v1/resume/search",
+            "job_templates": "/api/v1/job-templates",
+            "analysis_cache": "/api/v1/cache",
+            "ai_concurrency": "/api/v1/ai/concurrency"
         }
     }
 
+def health_report() -> Dict:
+    return {**health_monitor.snapshot(), "dependencies": {service.name: service.status() for service in SERVICES}}
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Health summary from the background prober's cached results (never calls upstream)"""
+    return health_report()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics: per-stage AI latency histograms, retry/429/timeout/parse counters, limiter gauges"""
+    return Response(content=render_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """
+    Readiness probe from the cached checks: 503 until the first probe cycle,
+    when the prober is stale, or when a required probe fails. Every other
+    dependency is reported in the body without changing the status code, so
+    an outage of one upstream does not pull every instance out of rotation.
+    """
+    return JSONResponse(status_code=200 if health_monitor.is_ready() else 503, content=health_report())
+
+ALLOWED_UPLOAD_TYPES = ["application/pdf", "application/vnd.openxmlformats-officedocument.wordprocessingml.document", "text/plain"]
+# Slack for multipart boundaries and form fields when checking Content-Length up front
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Reject uploads whose declared size is already over the limit before reading the body"""
+    if request.method == "POST" and request.url.path.startswith("/api/v1/resume/upload"):
+        declared = request.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > settings.upload_max_bytes + MULTIPART_OVERHEAD_BYTES:
+            return JSONResponse(
+                status_code=400,
+                content={"detail": f"File too large. Maximum size is {settings.upload_max_bytes} bytes. Declared size: {declared} bytes"}
+            )
+    return await call_next(request)
+
+TRACE_FLAG_VALUES = ("1", "true", "yes")
+trace_store = TraceStore()
+request_profiler = RequestProfiler()
+
+@app.middleware("http")
+async def trace_and_profile_requests(request: Request, call_next):
+    """
+    Opt-in diagnostics for a single request
+
+    Send X-Trace: 1 (or ?trace=1) to get a timing trace: JSON object
+    responses gain a "trace" field, and every traced response carries an
+    X-Trace-Id header for GET /api/v1/debug/traces/{trace_id} (streamed
+    responses are complete once the stream ends). When the runtime profiler
+    is switched on, sampled matching requests are profiled as well.
+    """
+    traced = (
+        request.headers.get("x-trace", "").lower() in TRACE_FLAG_VALUES
+        or request.query_params.get("trace", "").lower() in TRACE_FLAG_VALUES
+    )
+    profiled = request_profiler.should_profile(request.url.path)
+    if not traced and not profiled:
+        return await call_next(request)
+
+    trace = None
+    if traced:
+        trace = start_trace(request.method, request.url.path)
+        trace_store.add(trace)
+
+    if profiled:
+        async with request_profiler.capture(request.method, request.url.path):
+            response = await call_next(request)
+    else:
+        response = await call_next(request)
+
+    if trace is None:
+        return response
+    response.headers["X-Trace-Id"] = trace.trace_id
+    if not response.headers.get("content-type", "").startswith("application/json"):
+        body_iterator = response.body_iterator
+
+        async def finish_when_streamed():
+            try:
+                async for chunk in body_iterator:
+                    yield chunk
+            finally:
+                trace.finish()
+
+        response.body_iterator = finish_when_streamed()
+        return response
+
+    trace.finish()
+    body = b"".join([chunk async for chunk in response.body_iterator])
     try:
-        azure_health = ai_client.connectivity_check()
-        storage_health = storage_client.health_check()
-        
-        return {
-            "status": "healthy",
-            "services": {
-                "azure_openai": azure_health,
-                "azure_storage": storage_health
-            },
-            "timestamp": "2024-01-01T00:00:00Z"
-        }
+        content = json.loads(body)
+    except ValueError:
+        content = None
+    if not isinstance(content, dict):
+        return Response(content=body, status_code=response.status_code, headers=dict(response.headers), media_type=response.media_type)
+    content["trace"] = trace.to_dict()
+    headers = {k: v for k, v in response.headers.items() if k.lower() not in ("content-length", "content-type")}
+    return JSONResponse(status_code=response.status_code, content=content, headers=headers)
+
+async def store_resume_stream(chunks, filename: str, content_type: str, storage_client, text_service, search_index, extracted_text: Optional[str] = None) -> FileUploadResponse:
+    """Stream an upload into blob storage, then extract and index its text"""
+    try:
+        stored = await stream_resume_to_blob(
+            storage_client,
+            chunks,
+            filename,
+            content_type,
+            max_bytes=settings.upload_max_bytes,
+            block_size=settings.upload_block_size_bytes,
+            concurrency=settings.upload_stage_concurrency,
+            find_duplicate=partial(find_duplicate_upload, storage_client)
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    upload_result = stored["upload_result"]
+    blob_name = upload_result["blob_name"]
+    file_hash = stored["content_hash"]
+
+    if stored["duplicate"]:
+        # Same bytes are already stored: reuse that blob, its cached text and its
+        # analyses (the analysis cache is keyed by resume text, not blob name)
+        if blob_name not in search_index:
+            run_in_background(extract_and_index(blob_name, text_service, search_index))
+        return FileUploadResponse(
+            success=True,
+            blob_name=blob_name,
+            blob_url=upload_result["blob_url"],
+            original_filename=upload_result["original_filename"],
+            size=upload_result["size"],
+            uploaded_at=upload_result["uploaded_at"],
+            sas_url=upload_result["sas_url"],
+            content_hash=file_hash,
+            duplicate=True
+        )
+
+    index_text = extracted_text
+    if index_text is None and stored["content"] is not None:
+        try:
+            _, index_text = await text_service.extract(stored["content"], content_type, filename, file_hash)
+        except Exception as e:
+            # The file is stored; text can still be extracted on first use
+            logger.warning(f"Text extraction failed for {blob_name}: {e}")
+    elif index_text is None:
+        # Large file: extract from storage in the background instead of holding it in memory
+        run_in_background(extract_and_index(blob_name, text_service, search_index))
+    if index_text:
+        await asyncio.to_thread(search_index.add, blob_name, index_text)
+    await asyncio.to_thread(resume_metadata.upsert, {
+        "blob_name": blob_name,
+        "original_filename": upload_result["original_filename"],
+        "content_type": upload_result["content_type"],
+        "size": upload_result["size"],
+        "uploaded_at": upload_result["uploaded_at"],
+        "content_hash": file_hash
+    })
+
+    return FileUploadResponse(
+        success=True,
+        blob_name=blob_name,
+        blob_url=upload_result["blob_url"],
+        original_filename=upload_result["original_filename"],
+        size=upload_result["size"],
+        uploaded_at=upload_result["uploaded_at"],
+        sas_url=upload_result["sas_url"],
+        content_hash=file_hash,
+        extracted_text_length=len(index_text) if index_text is not None else None
+    )
+
+async def find_duplicate_upload(storage_client, file_hash: str) -> Optional[dict]:
+    """Upload result of an already stored resume with the same content hash, if any"""
+    record = await asyncio.to_thread(resume_metadata.find_by_hash, file_hash)
+    if record is None:
+        return None
+    if await storage_client.get_resume_properties(record["blob_name"]) is None:
+        # Deleted behind the index's back; drop the stale entry and store a new copy
+        await asyncio.to_thread(resume_metadata.remove, record["blob_name"])
+        return None
+    return storage_client.stored_resume_result(record)
+
+async def extract_and_index(blob_name: str, text_service, search_index) -> None:
+    try:
+        text = await text_service.text_for_blob(blob_name)
+        if text:
+            await asyncio.to_thread(search_index.add, blob_name, text)
     except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.warning(f"Background text extraction failed for {blob_name}: {e}")
 
 @app.post("/api/v1/resume/upload", response_model=FileUploadResponse)
-async def upload_resume(file: UploadFile = File(...)):
+async def upload_resume(
+    file: UploadFile = File(...),
+    extracted_text: Optional[str] = Form(None),
+    storage_client=Depends(get_storage_client),
+    text_service=Depends(get_text_service),
+    search_index=Depends(get_search_index)
+):
     """
     Upload a resume file to Azure Blob Storage
     
     Supported formats: PDF, DOCX, TXT
     Max file size: 10MB
+
+    The file is read in chunks and staged to storage block by block. Text is
+    extracted server-side (unless the client sends extracted_text), cached
+    next to the blob by content hash and added to the resume search index.
     """
     try:
         # Validate file type
-        allowed_types = ["application/pdf", "application/vnd.openxmlformats-officedocument.wordprocessingml.document", "text/plain"]
-        if file.content_type not in allowed_types:
+        if file.content_type not in ALLOWED_UPLOAD_TYPES:
             raise HTTPException(
                 status_code=400, 
-                detail=f"Unsupported file type. Allowed types: {', '.join(allowed_types)}"
-            )
-        
-        # Validate file size (10MB limit)
-        max_size = 10 * 1024 * 1024  # 10MB
-        file_content = await file.read()
-        if len(file_content) > max_size:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File too large. Maximum size is 10MB. Current size: {len(file_content)} bytes"
+                detail=f"Unsupported file type. Allowed types: {', '.join(ALLOWED_UPLOAD_TYPES)}"
             )
+
+        async def chunks():
+            while True:
+                chunk = await file.read(settings.upload_chunk_size_bytes)
+                if not chunk:
+                    break
+                yield chunk
+
+        return await store_resume_stream(chunks(), file.filename, file.content_type, storage_client, text_service, search_index, extracted_text)
         
-        # Upload to Azure Blob Storage
-        upload_result = storage_client.upload_resume(
-            file_content=file_content,
-            original_filename=file.filename,
-            content_type=file.content_type
-        )
-        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to upload resume: {e}")
         return FileUploadResponse(
-            success=True,
-            blob_name=upload_result["blob_name"],
-            blob_url=upload_result["blob_url"],
-            original_filename=upload_result["original_filename"],
-            size=upload_result["size"],
-            uploaded_at=upload_result["uploaded_at"],
-            sas_url=upload_result["sas_url"]
+            success=False,
+            error=str(e)
         )
-        
+
+@app.post("/api/v1/resume/upload/stream", response_model=FileUploadResponse)
+async def upload_resume_stream(
+    request: Request,
+    filename: str = Query(..., description="Original filename"),
+    storage_client=Depends(get_storage_client),
+    text_service=Depends(get_text_service),
+    search_index=Depends(get_search_index)
+):
+    """
+    Upload a resume as a raw request body (not multipart)
+
+    The body is consumed as it arrives, so oversized uploads are rejected as
+    soon as they cross the limit and memory stays bounded per upload. Send the
+    file's MIME type as Content-Type.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type not in ALLOWED_UPLOAD_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type. Allowed types: {', '.join(ALLOWED_UPLOAD_TYPES)}"
+        )
+    try:
+        return await store_resume_stream(request.stream(), filename, content_type, storage_client, text_service, search_index)
     except HTTPException:
         raise
     except Exception as e:
@@ -168,30 +552,62 @@ async def upload_resume(file: UploadFile = File(...)):
             error=str(e)
         )
 
-@app.get("/api/v1/resume/list", response_model=List[ResumeStorageInfo])
-async def list_resumes():
-    """List all uploaded resumes"""
+@app.get("/api/v1/resume/list", response_model=ResumeListResponse)
+async def list_resumes(
+    limit: int = Query(100, ge=1, le=settings.resume_list_max_page_size),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    uploaded_from: Optional[date] = Query(None, description="First upload date to include"),
+    uploaded_to: Optional[date] = Query(None, description="Last upload date to include"),
+    source: str = Query("index", pattern="^(index|storage)$", description="index (fast, local) or storage (authoritative scan)")
+):
+    """
+    List uploaded resumes one page at a time
+
+    Served from the local metadata index by default, newest first.
+    source=storage lists blob storage directly with continuation tokens,
+    in blob name order: oldest day first, and random (uuid) order within a
+    day. With a date range it only visits the resumes/YYYY/MM/DD/
+    partitions inside the range. Those are taken newest first, but a whole
+    month or year in the range is listed as one partition in name order.
+    """
+    storage_client = await require_service(storage_client_service) if source == "storage" else None
     try:
-        blobs = storage_client.list_resumes()
-        return [
-            ResumeStorageInfo(
-                blob_name=blob["name"],
-                original_filename=blob["name"].split("/")[-1],  # Extract filename from blob name
-                content_type=blob["content_type"],
-                size=blob["size"],
-                uploaded_at=blob["created"] or "2024-01-01T00:00:00Z"
-            )
-            for blob in blobs
-        ]
+        if source == "storage":
+            records, next_cursor = await storage_client.list_resumes_page(limit, cursor, uploaded_from, uploaded_to)
+            total = None
+        else:
+            date_from = uploaded_from.isoformat() if uploaded_from else None
+            date_to = uploaded_to.isoformat() if uploaded_to else None
+            records, next_cursor = await asyncio.to_thread(resume_metadata.page, limit, cursor, date_from, date_to)
+            total = await asyncio.to_thread(resume_metadata.count, date_from, date_to)
+        return ResumeListResponse(
+            resumes=[
+                ResumeStorageInfo(
+                    blob_name=record["blob_name"],
+                    original_filename=record["original_filename"],
+                    content_type=record["content_type"],
+                    size=record["size"],
+                    uploaded_at=record["uploaded_at"],
+                    content_hash=record["content_hash"]
+                )
+                for record in records
+            ],
+            next_cursor=next_cursor,
+            total=total
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to list resumes: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.delete("/api/v1/resume/{blob_name}")
-async def delete_resume(blob_name: str):
+@app.delete("/api/v1/resume/{blob_name:path}")
+async def delete_resume(blob_name: str, storage_client=Depends(get_storage_client), search_index=Depends(get_search_index)):
     """Delete a resume file from Azure Blob Storage"""
     try:
-        success = storage_client.delete_resume(blob_name)
+        success = await storage_client.delete_resume(blob_name)
+        await asyncio.to_thread(search_index.remove, blob_name)
+        await asyncio.to_thread(resume_metadata.remove, blob_name)
         if success:
             return {"message": f"Resume {blob_name} deleted successfully"}
         else:
@@ -202,16 +618,152 @@ async def delete_resume(blob_name: str):
         logger.error(f"Failed to delete resume {blob_name}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/v1/resume/search", response_model=ResumeSearchResponse)
+async def search_resumes(request: ResumeSearchRequest, search_index=Depends(get_search_index)):
+    """Find the stored resumes that best match a job requirement or job template"""
+    from search_index import build_job_query
+
+    start_time = time.time()
+    job_req_dict = resolve_job_requirements(request.job_requirements, request.template_id)
+
+    hits = await asyncio.to_thread(search_index.search, build_job_query(job_req_dict), request.top_n)
+    return ResumeSearchResponse(
+        results=hits,
+        total_indexed=len(search_index),
+        processing_time=time.time() - start_time
+    )
+
 @app.get("/api/v1/job-templates")
 async def get_job_templates():
     """Get available job templates"""
     return {"templates": JOB_TEMPLATES}
 
+@app.get("/api/v1/ai/concurrency")
+async def get_ai_concurrency(ai_client=Depends(get_ai_client)):
+    """Get the adaptive AI concurrency limiter state (current limit and queue depth)"""
+    return await ai_client.limiter_stats()
+
+@app.get("/api/v1/cache")
+async def get_cache_stats(ai_client=Depends(get_ai_client)):
+    """Get analysis cache statistics"""
+    if not ai_client.cache:
+        return {"enabled": False}
+    return {"enabled": True, **ai_client.cache.stats()}
+
+@app.delete("/api/v1/cache")
+async def clear_cache(ai_client=Depends(get_ai_client)):
+    """Invalidate every cached ranking and screening result"""
+    if not ai_client.cache:
+        return {"enabled": False, "removed": 0}
+    removed = await ai_client.cache.aclear()
+    return {"enabled": True, "removed": removed}
+
+def require_debug_access(request: Request) -> None:
+    """Debug endpoints are closed unless DEBUG_TOKEN is set and sent as X-Debug-Token"""
+    if not settings.debug_token:
+        raise HTTPException(status_code=403, detail="Debug endpoints are disabled. Set DEBUG_TOKEN to enable them")
+    if not secrets.compare_digest(request.headers.get("x-debug-token", ""), settings.debug_token):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Debug-Token")
+
+@app.get("/api/v1/debug/traces/{trace_id}")
+async def get_request_trace(trace_id: str, request: Request):
+    """Timing trace of a recent request sent with X-Trace: 1"""
+    require_debug_access(request)
+    trace = trace_store.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+    return trace.to_dict()
+
+@app.get("/api/v1/debug/profiler")
+async def get_profiler(request: Request):
+    """Runtime profiler settings and the most recent captured profiles"""
+    require_debug_access(request)
+    return {**request_profiler.settings(), "worker_pid": os.getpid(), "profiles": request_profiler.list_profiles()}
+
+@app.put("/api/v1/debug/profiler")
+async def configure_profiler(profiler_settings: ProfilerSettings, request: Request):
+    """
+    Switch the runtime profiler on or off (cProfile or stack sampling) without a redeploy
+
+    Profiler state lives in the worker process: with several server workers
+    this only reconfigures the one that served the request (see worker_pid).
+    """
+    require_debug_access(request)
+    try:
+        return {**request_profiler.configure(**profiler_settings.dict()), "worker_pid": os.getpid()}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/v1/debug/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile_output(profile_id: str, request: Request):
+    """Captured profile: pstats text (cprofile) or folded stacks (stack)"""
+    require_debug_access(request)
+    profile = request_profiler.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return profile["output"]
+
+def storage_http_error(blob_name: str, error: Exception) -> HTTPException:
+    """503 if blob storage could not be reached, 502 if it answered with an error"""
+    from azure.core.exceptions import ServiceRequestError
+
+    if isinstance(error, (ServiceRequestError, ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return HTTPException(status_code=503, detail=f"Blob storage is unreachable, could not load resume {blob_name}: {str(error)}")
+    return HTTPException(status_code=502, detail=f"Blob storage failed to return resume {blob_name}: {str(error)}")
+
+def require_content_or_blob(resume) -> None:
+    if not resume.content.strip() and not resume.blob_name:
+        raise HTTPException(status_code=400, detail=f"Resume {resume.filename} needs either content or blob_name")
+
+async def resolve_resume_content(resume) -> None:
+    """Fill in empty resume content from server-side extracted text of the referenced blob"""
+    require_content_or_blob(resume)
+    if resume.content.strip():
+        return
+    text_service = await require_service(text_extraction_service)
+    try:
+        text = await text_service.text_for_blob(resume.blob_name)
+    except Exception as e:
+        logger.error(f"Failed to load text of resume {resume.blob_name}: {e}")
+        raise storage_http_error(resume.blob_name, e)
+    if text is None:
+        raise HTTPException(status_code=404, detail=f"Resume {resume.blob_name} not found")
+    resume.content = text
+
+async def resolve_resume_contents(resumes: List) -> None:
+    """Resolve the content of every resume; the first failure fails the request"""
+    await asyncio.gather(*[resolve_resume_content(r) for r in resumes])
+
+async def resolve_resume_contents_partial(resumes: List) -> Dict[int, str]:
+    """Resolve the content of every resume, returning {index: error} for those that could not be resolved"""
+    async def resolve(resume):
+        try:
+            await resolve_resume_content(resume)
+        except HTTPException as e:
+            return e.detail
+        except Exception as e:
+            logger.warning(f"Failed to resolve content of resume {resume.filename}: {e}")
+            return f"Could not load resume content: {str(e)}"
+        return None
+
+    errors = await asyncio.gather(*[resolve(r) for r in resumes])
+    return {i: error for i, error in enumerate(errors) if error is not None}
+
 @app.post("/api/v1/resume/rank", response_model=ResumeRankingResponse)
-async def rank_resumes(request: ResumeRankingRequest):
-    """Rank multiple resumes based on job requirements"""
+async def rank_resumes(request: ResumeRankingRequest, resume_ranker=Depends(get_resume_ranker)):
+    """Rank multiple resumes based on job requirements or a job template"""
+    job_req_dict = resolve_job_requirements(request.job_requirements, request.template_id)
+    await resolve_resume_contents(request.resumes)
     try:
-        result = await resume_ranker.rank_resumes(request.resumes, request.job_requirements)
+        result = await resume_ranker.rank_resumes(
+            request.resumes,
+            job_req_dict,
+            batch_mode=request.batch_mode,
+            prefilter_top_k=request.prefilter_top_k,
+            prefilter_min_score=request.prefilter_min_score,
+            cascade_mode=request.cascade_mode,
+            cascade_top_n=request.cascade_top_n
+        )
         return result
     except Exception as e:
         logger.error(f"Resume ranking failed: {e}")
@@ -222,11 +774,135 @@ async def rank_resumes(request: ResumeRankingRequest):
             raise HTTPException(status_code=504, detail="AI request timed out. Please try again.")
         raise HTTPException(status_code=500, detail=msg)
 
+@app.post("/api/v1/resume/rank/stream")
+async def rank_resumes_stream(request: ResumeRankingRequest, resume_ranker=Depends(get_resume_ranker)):
+    """
+    Rank multiple resumes, streaming NDJSON events as each resume is scored
+
+    Emits one "result" line per resume (with provisional ranks) followed by a
+    final "summary" line matching the /api/v1/resume/rank response. Cascade
+    ranking is not streamed: finalists are only known once every quick score
+    is in.
+    """
+    if request.cascade_mode or request.cascade_top_n is not None:
+        raise HTTPException(
+            status_code=400,
+            detail="cascade_mode and cascade_top_n are not supported when streaming; use /api/v1/resume/rank"
+        )
+    job_req_dict = resolve_job_requirements(request.job_requirements, request.template_id)
+    await resolve_resume_contents(request.resumes)
+
+    async def event_lines():
+        try:
+            async for event in resume_ranker.rank_resumes_stream(
+                request.resumes,
+                job_req_dict,
+                batch_mode=request.batch_mode,
+                prefilter_top_k=request.prefilter_top_k,
+                prefilter_min_score=request.prefilter_min_score
+            ):
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            logger.error(f"Streaming resume ranking failed: {e}")
+            yield json.dumps({"type": "error", "detail": str(e)}) + "\n"
+
+    return StreamingResponse(event_lines(), media_type="application/x-ndjson")
+
+def _ranking_job_status(job: dict) -> RankingJobStatus:
+    return RankingJobStatus.model_validate(job)
+
+@app.post("/api/v1/jobs/rank", response_model=RankingJobStatus, status_code=202)
+async def submit_ranking_job(request: RankingJobRequest, ranking_jobs=Depends(get_ranking_jobs)):
+    """Submit a background ranking job for a large pool of resumes"""
+    if not request.resumes:
+        raise HTTPException(status_code=400, detail="At least one resume must be provided")
+    if len(request.resumes) > settings.ranking_job_max_resumes:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximum {settings.ranking_job_max_resumes} resumes can be submitted in one job"
+        )
+    job_req_dict = resolve_job_requirements(request.job_requirements, request.template_id)
+    # Blob resumes are loaded by the job workers; those that cannot be are recorded as failed
+    for resume in request.resumes:
+        require_content_or_blob(resume)
+    job_id = await ranking_jobs.submit(
+        request.resumes,
+        job_req_dict,
+        prefilter_top_k=request.prefilter_top_k,
+        prefilter_min_score=request.prefilter_min_score,
+        batch_mode=request.batch_mode
+    )
+    job = await asyncio.to_thread(ranking_job_store.get_job, job_id)
+    return _ranking_job_status(job)
+
+@app.get("/api/v1/jobs/rank/{job_id}", response_model=RankingJobStatus)
+async def get_ranking_job(job_id: str):
+    """Get progress of a background ranking job"""
+    job = await asyncio.to_thread(ranking_job_store.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ranking job {job_id} not found")
+    return _ranking_job_status(job)
+
+@app.get("/api/v1/jobs/rank/{job_id}/events")
+async def stream_ranking_job_progress(job_id: str, interval: float = Query(1.0, ge=0.2, le=30.0)):
+    """Subscribe to progress of a background ranking job as NDJSON status lines"""
+    job = await asyncio.to_thread(ranking_job_store.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ranking job {job_id} not found")
+
+    async def status_lines():
+        last = None
+        current = job
+        while current is not None:
+            status = _ranking_job_status(current)
+            if status != last:
+                yield status.json() + "\n"
+                last = status
+            if status.status == "completed":
+                break
+            await asyncio.sleep(interval)
+            current = await asyncio.to_thread(ranking_job_store.get_job, job_id)
+
+    return StreamingResponse(status_lines(), media_type="application/x-ndjson")
+
+@app.get("/api/v1/jobs/rank/{job_id}/results", response_model=RankingJobResultsPage)
+async def get_ranking_job_results(job_id: str, offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500)):
+    """Fetch a page of ranked results; ranks are provisional until the job completes"""
+    job = await asyncio.to_thread(ranking_job_store.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ranking job {job_id} not found")
+    rows = await asyncio.to_thread(ranking_job_store.results_page, job_id, offset, limit)
+    return RankingJobResultsPage(
+        job_id=job_id,
+        status=job["status"],
+        offset=offset,
+        limit=limit,
+        completed=job["completed"],
+        ranked_resumes=[
+            ResumeRankingResult(
+                filename=row["filename"],
+                ranking=ResumeRanker._ranking_score(row["analysis"]),
+                rank=offset + i + 1
+            )
+            for i, row in enumerate(rows)
+        ]
+    )
+
+@app.delete("/api/v1/jobs/rank/{job_id}")
+async def delete_ranking_job(job_id: str):
+    """Cancel a background ranking job and delete its results"""
+    deleted = await asyncio.to_thread(ranking_job_store.delete_job, job_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"Ranking job {job_id} not found")
+    return {"message": f"Ranking job {job_id} deleted successfully"}
+
 @app.post("/api/v1/resume/screen", response_model=ResumeScreeningResponse)
-async def screen_resume(request: ResumeScreeningRequest):
-    """Screen a single resume based on job requirements"""
+async def screen_resume(request: ResumeScreeningRequest, resume_screener=Depends(get_resume_screener)):
+    """Screen a single resume based on job requirements or a job template"""
+    job_req_dict = resolve_job_requirements(request.job_requirements, request.template_id)
+    await resolve_resume_contents([request.resume])
     try:
-        result = await resume_screener.screen_resume(request.resume, request.job_requirements)
+        result = await resume_screener.screen_resume(request.resume, job_req_dict)
         return result
     except Exception as e:
         logger.error(f"Resume screening failed: {e}")
@@ -237,6 +913,20 @@ async def screen_resume(request: ResumeScreeningRequest):
             raise HTTPException(status_code=504, detail="AI request timed out. Please try again.")
         raise HTTPException(status_code=500, detail=msg)
 
+@app.post("/api/v1/resume/screen/bulk", response_model=BulkScreeningResponse)
+async def screen_resumes_bulk(request: BulkScreeningRequest, resume_screener=Depends(get_resume_screener)):
+    """Screen many resumes against one job requirement or job template; per-resume failures are reported inline"""
+    if not request.resumes:
+        raise HTTPException(status_code=400, detail="At least one resume must be provided")
+    if len(request.resumes) > settings.screening_bulk_max_resumes:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximum {settings.screening_bulk_max_resumes} resumes can be screened at once"
+        )
+    job_req_dict = resolve_job_requirements(request.job_requirements, request.template_id)
+    unresolved = await resolve_resume_contents_partial(request.resumes)
+    return await resume_screener.screen_resumes(request.resumes, job_req_dict, failed=unresolved)
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler"""
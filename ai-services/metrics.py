@@ -0,0 +1,114 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+from request_trace import record_span
+
+# Wide enough for both sub-millisecond local stages and slow upstream calls
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+AI_STAGE_SECONDS = Histogram(
+    "peoplenexus_ai_stage_seconds",
+    "Time spent in each stage of an AI-backed ranking or screening call",
+    ["stage", "operation"],
+    buckets=STAGE_BUCKETS
+)
+AI_RETRIES = Counter(
+    "peoplenexus_ai_retries_total",
+    "Upstream AI calls retried after a 429 or 5xx",
+    ["operation"]
+)
+AI_RATE_LIMITED = Counter(
+    "peoplenexus_ai_rate_limited_total",
+    "Upstream AI calls rejected with 429",
+    ["operation"]
+)
+AI_TIMEOUTS = Counter(
+    "peoplenexus_ai_timeouts_total",
+    "Upstream AI calls that timed out",
+    ["operation"]
+)
+AI_PARSE_FAILURES = Counter(
+    "peoplenexus_ai_parse_failures_total",
+    "Model answers that could not be parsed (batched answers count once per unusable entry)",
+    ["operation"]
+)
+AI_STRUCTURED_OUTPUT = Counter(
+    "peoplenexus_ai_structured_output_total",
+    "Model answers by how they were decoded (strict, extracted, repaired, reasked, failed)",
+    ["operation", "method"]
+)
+AI_HEDGES = Counter(
+    "peoplenexus_ai_hedges_total",
+    "Hedged upstream AI calls by outcome (won, lost, failed, skipped_budget, skipped_capacity)",
+    ["operation", "outcome"]
+)
+AI_DEPLOYMENT_REQUESTS = Counter(
+    "peoplenexus_ai_deployment_requests_total",
+    "Upstream AI calls per pool deployment by outcome (ok, 429, 5xx, timeout, connection, error)",
+    ["deployment", "outcome"]
+)
+AI_DEPLOYMENT_SECONDS = Histogram(
+    "peoplenexus_ai_deployment_call_seconds",
+    "Latency of successful upstream AI calls per pool deployment",
+    ["deployment"],
+    buckets=STAGE_BUCKETS
+)
+AI_DEPLOYMENT_EJECTIONS = Counter(
+    "peoplenexus_ai_deployment_ejections_total",
+    "Times a pool deployment was taken out of rotation (including failed reinstatement probes)",
+    ["deployment"]
+)
+AI_DEPLOYMENT_IN_FLIGHT = Gauge("peoplenexus_ai_deployment_in_flight", "Upstream AI calls in flight per pool deployment", ["deployment"])
+AI_DEPLOYMENT_LIMIT = Gauge("peoplenexus_ai_deployment_concurrency_limit", "Adaptive concurrency limit per pool deployment", ["deployment"])
+AI_DEPLOYMENT_SERVING = Gauge("peoplenexus_ai_deployment_serving", "1 while a pool deployment takes traffic, 0 while it is ejected", ["deployment"])
+RANKING_CASCADE_RESUMES = Counter(
+    "peoplenexus_ranking_cascade_resumes_total",
+    "Resumes in cascade rankings by tier (finalist, quick_only, escalated when the fast tier could not score them)",
+    ["tier"]
+)
+AI_IN_FLIGHT = Gauge("peoplenexus_ai_in_flight", "Upstream AI calls currently in flight")
+AI_QUEUED = Gauge("peoplenexus_ai_queued", "AI calls waiting for a concurrency slot")
+AI_CONCURRENCY_LIMIT = Gauge("peoplenexus_ai_concurrency_limit", "Current adaptive AI concurrency limit")
+
+
+def bind_limiter(limiter) -> None:
+    """Report the AI concurrency limiter's live state (or a pool's totals) through the gauges"""
+    AI_IN_FLIGHT.set_function(lambda: limiter.in_flight)
+    AI_QUEUED.set_function(lambda: limiter.queued)
+    AI_CONCURRENCY_LIMIT.set_function(lambda: int(limiter.limit))
+
+
+def bind_deployment(deployment) -> None:
+    """Report one pool deployment's live state through the per-deployment gauges"""
+    AI_DEPLOYMENT_IN_FLIGHT.labels(deployment=deployment.name).set_function(lambda: deployment.limiter.in_flight)
+    AI_DEPLOYMENT_LIMIT.labels(deployment=deployment.name).set_function(lambda: int(deployment.limiter.limit))
+    AI_DEPLOYMENT_SERVING.labels(deployment=deployment.name).set_function(lambda: 1 if deployment.serving else 0)
+
+
+def observe_stage(stage: str, operation: str, seconds: float, **trace_attrs: Any) -> None:
+    """Record a stage duration in the histogram and, if the request is traced, as a span"""
+    AI_STAGE_SECONDS.labels(stage=stage, operation=operation).observe(seconds)
+    record_span(stage, seconds, operation=operation, **trace_attrs)
+
+
+@contextmanager
+def stage_timer(stage: str, operation: str) -> Iterator[None]:
+    """
+    Time a block into the stage histogram (and the request trace, if any)
+
+    Usage:
+        with stage_timer("prompt_build", "rank"):
+            ...
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, operation, time.perf_counter() - start)
+
+
+def render_latest() -> bytes:
+    return generate_latest()
@@ -16,9 +16,10 @@ class JobRequirement(BaseModel):
     education_level: Optional[str] = Field(default=None, description="Required education level")
 
 class ResumeData(BaseModel):
-    content: str = Field(..., description="Resume content (text extracted from file)")
+    content: str = Field(default="", description="Resume content (text extracted from file); may be omitted when blob_name is given")
     filename: str = Field(..., description="Original filename")
     format: ResumeFormat = Field(..., description="Resume format")
+    blob_name: Optional[str] = Field(default=None, description="Uploaded resume blob; its server-side extracted text is used when content is empty")
 
 class FileUploadResponse(BaseModel):
     """Response model for file upload operations"""
@@ -29,6 +30,9 @@ class FileUploadResponse(BaseModel):
     size: Optional[int] = None
     uploaded_at: Optional[str] = None
     sas_url: Optional[str] = None
+    content_hash: Optional[str] = None
+    extracted_text_length: Optional[int] = None
+    duplicate: bool = False
     error: Optional[str] = None
 
 class ResumeStorageInfo(BaseModel):
@@ -39,25 +43,64 @@ class ResumeStorageInfo(BaseModel):
     size: int
     uploaded_at: str
     sas_url: Optional[str] = None
+    content_hash: Optional[str] = None
+
+class ResumeListResponse(BaseModel):
+    """One page of stored resumes"""
+    resumes: List[ResumeStorageInfo]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
 
 class ResumeRankingRequest(BaseModel):
     """Request model for resume ranking"""
     resumes: List[ResumeData]
-    job_requirements: JobRequirement
+    job_requirements: Optional[JobRequirement] = Field(default=None, description="Job requirements (or give template_id)")
+    template_id: Optional[str] = Field(default=None, description="Key of a job template to use instead of job_requirements")
     ranking_criteria: Optional[List[str]] = Field(
         default=["skills_match", "experience", "education", "overall_fit"],
         description="Criteria to use for ranking"
     )
+    batch_mode: Optional[bool] = Field(
+        default=None,
+        description="Pack several resumes into each AI request (defaults to server setting)"
+    )
+    prefilter_top_k: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Only send the K best keyword-matched resumes to the AI"
+    )
+    prefilter_min_score: Optional[float] = Field(
+        default=None,
+        ge=0,
+        le=100,
+        description="Only send resumes whose keyword-match score (0-100) is at least this value to the AI"
+    )
+    cascade_mode: Optional[bool] = Field(
+        default=None,
+        description="Score everyone with the fast deployment and re-score only the finalists in full (defaults to server setting)"
+    )
+    cascade_top_n: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Finalists re-scored by the main deployment in cascade mode (defaults to server setting)"
+    )
 
 class ResumeScreeningRequest(BaseModel):
     """Request model for resume screening"""
     resume: ResumeData
-    job_requirements: JobRequirement
+    job_requirements: Optional[JobRequirement] = Field(default=None, description="Job requirements (or give template_id)")
+    template_id: Optional[str] = Field(default=None, description="Key of a job template to use instead of job_requirements")
     screening_criteria: Optional[List[str]] = Field(
         default=["skills_match", "experience", "education", "red_flags"],
         description="Criteria to use for screening"
     )
 
+class BulkScreeningRequest(BaseModel):
+    """Request model for screening many resumes against one job"""
+    resumes: List[ResumeData]
+    job_requirements: Optional[JobRequirement] = Field(default=None, description="Job requirements (or give template_id)")
+    template_id: Optional[str] = Field(default=None, description="Key of a job template to use instead of job_requirements")
+
 class RankingScore(BaseModel):
     score: float = Field(..., description="Overall ranking score (0-100)")
     breakdown: Dict[str, float] = Field(..., description="Breakdown of scores by criteria")
@@ -85,6 +128,82 @@ class ResumeScreeningResponse(BaseModel):
     result: ScreeningResult = Field(..., description="Screening results")
     processing_time: float = Field(..., description="Processing time in seconds")
 
+class BulkScreeningItem(BaseModel):
+    index: int = Field(..., description="Position of the resume in the request")
+    filename: str = Field(..., description="Resume filename")
+    result: Optional[ScreeningResult] = Field(default=None, description="Screening results (missing if screening failed)")
+    error: Optional[str] = Field(default=None, description="Why this resume could not be screened")
+    retryable: bool = Field(default=False, description="Whether the failure was transient (rate limit or timeout) and worth retrying")
+
+class BulkScreeningResponse(BaseModel):
+    results: List[BulkScreeningItem] = Field(..., description="One entry per resume, in request order")
+    total_resumes: int = Field(..., description="Total number of resumes in the request")
+    passed: int = Field(..., description="Number of resumes that passed screening")
+    failed: int = Field(..., description="Number of resumes whose screening failed")
+    processing_time: float = Field(..., description="Processing time in seconds")
+
 class ErrorResponse(BaseModel):
     error: str = Field(..., description="Error message")
     details: Optional[str] = Field(default=None, description="Additional error details")
+
+class ResumeSearchRequest(BaseModel):
+    """Request model for searching stored resumes"""
+    job_requirements: Optional[JobRequirement] = Field(default=None, description="Job requirements to match against")
+    template_id: Optional[str] = Field(default=None, description="Key of a job template to match against")
+    top_n: int = Field(default=20, ge=1, le=500, description="Maximum number of matches to return")
+
+class ResumeSearchHit(BaseModel):
+    blob_name: str = Field(..., description="Stored resume blob name")
+    score: float = Field(..., description="BM25 relevance score")
+
+class ResumeSearchResponse(BaseModel):
+    results: List[ResumeSearchHit] = Field(..., description="Matching resumes, best first")
+    total_indexed: int = Field(..., description="Number of resumes in the search index")
+    processing_time: float = Field(..., description="Processing time in seconds")
+
+class RankingJobRequest(BaseModel):
+    """Request model for submitting a background ranking job"""
+    resumes: List[ResumeData]
+    job_requirements: Optional[JobRequirement] = Field(default=None, description="Job requirements (or give template_id)")
+    template_id: Optional[str] = Field(default=None, description="Key of a job template to use instead of job_requirements")
+    batch_mode: Optional[bool] = Field(
+        default=None,
+        description="Pack several resumes into each AI request (defaults to server setting)"
+    )
+    prefilter_top_k: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Only send the K best keyword-matched resumes to the AI"
+    )
+    prefilter_min_score: Optional[float] = Field(
+        default=None,
+        ge=0,
+        le=100,
+        description="Only send resumes whose keyword-match score (0-100) is at least this value to the AI"
+    )
+
+class RankingJobStatus(BaseModel):
+    job_id: str = Field(..., description="Ranking job id")
+    status: str = Field(..., description="resolving, queued, running or completed")
+    total: int = Field(..., description="Total number of resumes in the job")
+    completed: int = Field(..., description="Number of resumes scored so far")
+    failed: int = Field(..., description="Number of resumes whose analysis failed")
+    created_at: str = Field(..., description="Submission time")
+    updated_at: str = Field(..., description="Time of the last progress update")
+    finished_at: Optional[str] = Field(default=None, description="Completion time")
+
+class RankingJobResultsPage(BaseModel):
+    job_id: str = Field(..., description="Ranking job id")
+    status: str = Field(..., description="resolving, queued, running or completed")
+    offset: int = Field(..., description="Offset of the first result in this page")
+    limit: int = Field(..., description="Maximum page size")
+    completed: int = Field(..., description="Number of resumes scored so far; ranks are provisional until the job completes")
+    ranked_resumes: List[ResumeRankingResult] = Field(..., description="Ranked resumes in this page")
+
+class ProfilerSettings(BaseModel):
+    """Runtime profiler switch"""
+    enabled: bool
+    mode: Optional[str] = Field(None, description="cprofile or stack")
+    sample_rate: Optional[float] = Field(None, ge=0.0, le=1.0, description="Fraction of matching requests to profile")
+    paths: Optional[List[str]] = Field(None, description="Path prefixes to profile")
+    interval_ms: Optional[float] = Field(None, ge=1.0, description="Stack sampling interval")
@@ -0,0 +1,152 @@
+import cProfile
+import io
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+PROFILE_MODES = ("cprofile", "stack")
+
+
+class RequestProfiler:
+    """
+    Opt-in, runtime-switchable profiler for selected endpoints
+
+    When enabled, a sampled fraction of matching requests is profiled either
+    with cProfile or with a stack sampler thread that snapshots the event
+    loop thread every interval_ms and reports folded stacks (flame graph
+    input). Only one request is profiled at a time; both modes observe the
+    whole event loop thread, so concurrent requests show up in the output.
+    """
+
+    def __init__(self, max_profiles: int = 20):
+        self.enabled = False
+        self.mode = "stack"
+        self.sample_rate = 1.0
+        self.paths: List[str] = ["/api/v1/resume/rank", "/api/v1/resume/screen"]
+        self.interval_ms = 5.0
+        self._busy = threading.Lock()
+        self._profiles: Deque[Dict[str, Any]] = deque(maxlen=max_profiles)
+
+    def configure(self, enabled: bool, mode: Optional[str] = None, sample_rate: Optional[float] = None, paths: Optional[List[str]] = None, interval_ms: Optional[float] = None) -> Dict[str, Any]:
+        if mode is not None:
+            if mode not in PROFILE_MODES:
+                raise ValueError(f"Unknown profiler mode {mode!r}. Use one of: {', '.join(PROFILE_MODES)}")
+            self.mode = mode
+        if sample_rate is not None:
+            self.sample_rate = min(1.0, max(0.0, sample_rate))
+        if paths is not None:
+            self.paths = paths
+        if interval_ms is not None:
+            self.interval_ms = max(1.0, interval_ms)
+        self.enabled = enabled
+        return self.settings()
+
+    def settings(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "mode": self.mode,
+            "sample_rate": self.sample_rate,
+            "paths": self.paths,
+            "interval_ms": self.interval_ms
+        }
+
+    def should_profile(self, path: str) -> bool:
+        return (
+            self.enabled
+            and any(path.startswith(prefix) for prefix in self.paths)
+            and random.random() < self.sample_rate
+            and not self._busy.locked()
+        )
+
+    @asynccontextmanager
+    async def capture(self, method: str, path: str) -> AsyncIterator[None]:
+        """Profile the enclosed block; skipped if another capture is running"""
+        if not self._busy.acquire(blocking=False):
+            yield
+            return
+        mode = self.mode
+        started_at = datetime.now().isoformat()
+        start = time.perf_counter()
+        try:
+            if mode == "cprofile":
+                profile = cProfile.Profile()
+                profile.enable()
+                try:
+                    yield
+                finally:
+                    profile.disable()
+                output = self._format_cprofile(profile)
+            else:
+                sampler = _StackSampler(threading.get_ident(), self.interval_ms / 1000.0)
+                sampler.start()
+                try:
+                    yield
+                finally:
+                    sampler.stop()
+                output = sampler.folded()
+            self._profiles.appendleft({
+                "profile_id": uuid.uuid4().hex,
+                "method": method,
+                "path": path,
+                "mode": mode,
+                "started_at": started_at,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                "output": output
+            })
+        finally:
+            self._busy.release()
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        return [{k: v for k, v in p.items() if k != "output"} for p in self._profiles]
+
+    def get_profile(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        return next((p for p in self._profiles if p["profile_id"] == profile_id), None)
+
+    @staticmethod
+    def _format_cprofile(profile: cProfile.Profile, limit: int = 60) -> str:
+        stream = io.StringIO()
+        pstats.Stats(profile, stream=stream).sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+
+class _StackSampler:
+    """Samples one thread's Python stack from a background thread"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def folded(self, limit: int = 500) -> str:
+        """Folded stacks ("frame;frame;frame count"), most frequent first"""
+        total = sum(self.samples.values())
+        lines = [f"# {total} samples every {self.interval * 1000:.1f}ms"]
+        lines.extend(f"{stack} {count}" for stack, count in self.samples.most_common(limit))
+        return "\n".join(lines)
@@ -0,0 +1,532 @@
+import asyncio
+import json
+import os
+import logging
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config import settings
+from job_prompts import JobPrompt, RANKING_CRITERIA, get_job_prompt
+from models import ResumeData
+from resume_ranker import ResumeRanker
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ranking_jobs (
+    job_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    job_requirements TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    finished_at TEXT,
+    batch_mode INTEGER NOT NULL DEFAULT 0,
+    prefilter TEXT
+);
+CREATE TABLE IF NOT EXISTS ranking_job_resumes (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    blob_name TEXT,
+    content TEXT,
+    status TEXT NOT NULL,
+    prefiltered INTEGER NOT NULL DEFAULT 0,
+    score REAL,
+    analysis TEXT,
+    lease_owner TEXT,
+    lease_expires REAL,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE INDEX IF NOT EXISTS idx_ranking_job_resumes_rank
+    ON ranking_job_resumes (job_id, status, prefiltered, score DESC, idx);
+"""
+
+# Resume rows a worker may lease: text still to load, or waiting to be scored
+_OPEN = "('resolving', 'pending')"
+
+
+class RankingJobStore:
+    """
+    SQLite persistence for background ranking jobs
+
+    A job row tracks progress counters; each resume is its own row so work
+    can resume from exactly where it stopped after a restart. Resume text is
+    dropped once a resume has been scored.
+
+    Workers claim pending resumes with a lease that they renew while they
+    work. A worker that dies stops renewing, its lease expires, and any
+    live worker sharing the database claims the resume again.
+
+    Resumes submitted by blob name start out "resolving" until a worker has
+    loaded their text. A job whose keyword pre-filter needs that text stays
+    "resolving" itself, and none of its resumes are scored, until every
+    text is in and the pre-filter has run.
+    """
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def create_job(
+        self,
+        job_requirements: Dict[str, Any],
+        resumes: List[Tuple[str, Optional[str], Optional[str]]],
+        prefiltered: Dict[int, Dict[str, Any]],
+        batch_mode: bool = False,
+        prefilter: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Persist a job of (filename, content, blob_name) resumes
+
+        Resumes without content are loaded from their blob by a worker. A
+        prefilter of {"top_k", "min_score"} holds scoring back until those
+        texts are in, then runs over every resume of the job.
+        """
+        job_id = str(uuid.uuid4())
+        now = datetime.now().isoformat()
+        rows = []
+        for idx, (filename, content, blob_name) in enumerate(resumes):
+            if idx in prefiltered:
+                analysis = prefiltered[idx]
+                rows.append((job_id, idx, filename, blob_name, None, "done", 1, analysis["overall_score"], json.dumps(analysis)))
+            else:
+                status = "resolving" if content is None else "pending"
+                rows.append((job_id, idx, filename, blob_name, content, status, 0, None, None))
+        status = "resolving" if prefilter is not None else "queued"
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO ranking_jobs (job_id, status, job_requirements, total, completed, created_at, updated_at, batch_mode, prefilter) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, status, json.dumps(job_requirements), len(resumes), len(prefiltered), now, now, int(batch_mode),
+                 json.dumps(prefilter) if prefilter is not None else None)
+            )
+            self._conn.executemany(
+                "INSERT INTO ranking_job_resumes (job_id, idx, filename, blob_name, content, status, prefiltered, score, analysis) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM ranking_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["job_requirements"] = json.loads(job["job_requirements"])
+        job["batch_mode"] = bool(job["batch_mode"])
+        job["prefilter"] = json.loads(job["prefilter"]) if job["prefilter"] else None
+        return job
+
+    def delete_job(self, job_id: str) -> bool:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM ranking_jobs WHERE job_id = ?", (job_id,))
+            self._conn.execute("DELETE FROM ranking_job_resumes WHERE job_id = ?", (job_id,))
+            self._conn.commit()
+        return cur.rowcount > 0
+
+    def pending_work(self) -> List[Tuple[str, int]]:
+        """Every (job_id, idx) still waiting to be loaded or scored, oldest job first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT r.job_id, r.idx FROM ranking_job_resumes r JOIN ranking_jobs j ON j.job_id = r.job_id "
+                f"WHERE r.status IN {_OPEN} ORDER BY j.created_at, r.idx"
+            ).fetchall()
+        return [(row["job_id"], row["idx"]) for row in rows]
+
+    def claim_work(self, owner: str, lease_seconds: float, max_batch: int) -> List[Dict[str, Any]]:
+        """
+        Lease the next resumes that no live worker holds
+
+        Takes the oldest claimable resume, plus up to max_batch - 1 more of
+        the same job and status when that job runs in batch mode. Resumes
+        whose text is still to be loaded are claimable at once; pending ones
+        only once their job is no longer waiting on the pre-filter. Resumes
+        whose lease expired are claimable again. Returns an empty list when
+        there is no work.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                first = self._conn.execute(
+                    "SELECT r.job_id, r.status, j.batch_mode FROM ranking_job_resumes r JOIN ranking_jobs j ON j.job_id = r.job_id "
+                    "WHERE (r.status = 'resolving' OR (r.status = 'pending' AND j.status != 'resolving')) "
+                    "AND (r.lease_expires IS NULL OR r.lease_expires <= ?) "
+                    "ORDER BY j.created_at, r.idx LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if first is None:
+                    self._conn.commit()
+                    return []
+                limit = max(1, max_batch) if first["batch_mode"] else 1
+                rows = self._conn.execute(
+                    "SELECT job_id, idx, filename, blob_name, content, status FROM ranking_job_resumes "
+                    "WHERE job_id = ? AND status = ? AND (lease_expires IS NULL OR lease_expires <= ?) "
+                    "ORDER BY idx LIMIT ?",
+                    (first["job_id"], first["status"], now, limit)
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE ranking_job_resumes SET lease_owner = ?, lease_expires = ? WHERE job_id = ? AND idx = ?",
+                    [(owner, now + lease_seconds, row["job_id"], row["idx"]) for row in rows]
+                )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return [dict(row) for row in rows]
+
+    def renew_leases(self, owner: str, lease_seconds: float) -> int:
+        """Extend every lease still held by owner. Returns how many were renewed."""
+        with self._lock:
+            cur = self._conn.execute(
+                f"UPDATE ranking_job_resumes SET lease_expires = ? WHERE lease_owner = ? AND status IN {_OPEN}",
+                (time.time() + lease_seconds, owner)
+            )
+            self._conn.commit()
+        return cur.rowcount
+
+    def release_leases(self, owner: str) -> None:
+        """Hand owner's unfinished resumes back so other workers can claim them at once"""
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE ranking_job_resumes SET lease_owner = NULL, lease_expires = NULL WHERE lease_owner = ? AND status IN {_OPEN}",
+                (owner,)
+            )
+            self._conn.commit()
+
+    def record_result(self, job_id: str, idx: int, analysis: Dict[str, Any], failed: bool) -> None:
+        now = datetime.now().isoformat()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE ranking_job_resumes SET status = ?, score = ?, analysis = ?, content = NULL, lease_owner = NULL, lease_expires = NULL "
+                f"WHERE job_id = ? AND idx = ? AND status IN {_OPEN}",
+                ("failed" if failed else "done", analysis["overall_score"], json.dumps(analysis), job_id, idx)
+            )
+            if cur.rowcount:
+                self._conn.execute(
+                    "UPDATE ranking_jobs SET completed = completed + 1, failed = failed + ?, updated_at = ?, "
+                    "status = CASE WHEN completed + 1 >= total THEN 'completed' WHEN status = 'resolving' THEN 'resolving' ELSE 'running' END, "
+                    "finished_at = CASE WHEN completed + 1 >= total THEN ? ELSE finished_at END "
+                    "WHERE job_id = ?",
+                    (1 if failed else 0, now, now, job_id)
+                )
+            self._conn.commit()
+
+    def store_texts(self, job_id: str, texts: Dict[int, str], release: bool) -> int:
+        """
+        Save loaded resume texts, making those resumes pending
+
+        With release the leases are handed back, for jobs whose resumes must
+        wait for the pre-filter. Returns how many resumes of the job are
+        still to be loaded.
+        """
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE ranking_job_resumes SET content = ?, status = 'pending', "
+                "lease_owner = CASE WHEN ? THEN NULL ELSE lease_owner END, "
+                "lease_expires = CASE WHEN ? THEN NULL ELSE lease_expires END "
+                "WHERE job_id = ? AND idx = ? AND status = 'resolving'",
+                [(text, release, release, job_id, idx) for idx, text in texts.items()]
+            )
+            remaining = self._conn.execute(
+                "SELECT COUNT(*) FROM ranking_job_resumes WHERE job_id = ? AND status = 'resolving'", (job_id,)
+            ).fetchone()[0]
+            self._conn.commit()
+        return remaining
+
+    def pending_texts(self, job_id: str) -> List[Dict[str, Any]]:
+        """Pending resumes of a job with their text, in submission order"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT idx, filename, content FROM ranking_job_resumes WHERE job_id = ? AND status = 'pending' ORDER BY idx",
+                (job_id,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def apply_prefilter(self, job_id: str, prefiltered: Dict[int, Dict[str, Any]]) -> bool:
+        """
+        Record the pre-filter's rejects and let the job's pending resumes be scored
+
+        Only the first call for a job has any effect. Returns whether this
+        call applied it.
+        """
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cur = self._conn.execute(
+                    "UPDATE ranking_jobs SET completed = completed + ?, updated_at = ?, "
+                    "status = CASE WHEN completed + ? >= total THEN 'completed' ELSE 'queued' END, "
+                    "finished_at = CASE WHEN completed + ? >= total THEN ? ELSE finished_at END "
+                    "WHERE job_id = ? AND status = 'resolving'",
+                    (len(prefiltered), now, len(prefiltered), len(prefiltered), now, job_id)
+                )
+                if cur.rowcount:
+                    self._conn.executemany(
+                        "UPDATE ranking_job_resumes SET status = 'done', prefiltered = 1, score = ?, analysis = ?, content = NULL "
+                        "WHERE job_id = ? AND idx = ? AND status = 'pending'",
+                        [(analysis["overall_score"], json.dumps(analysis), job_id, idx) for idx, analysis in prefiltered.items()]
+                    )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return cur.rowcount > 0
+
+    def stalled_prefilters(self) -> List[str]:
+        """Jobs whose texts are all loaded but whose pre-filter never ran, e.g. because its worker died"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id FROM ranking_jobs j WHERE status = 'resolving' AND NOT EXISTS "
+                "(SELECT 1 FROM ranking_job_resumes r WHERE r.job_id = j.job_id AND r.status = 'resolving')"
+            ).fetchall()
+        return [row["job_id"] for row in rows]
+
+    def mark_completed_if_done(self, job_id: str) -> None:
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE ranking_jobs SET status = 'completed', finished_at = ?, updated_at = ? "
+                "WHERE job_id = ? AND completed >= total AND status != 'completed'",
+                (now, now, job_id)
+            )
+            self._conn.commit()
+
+    def results_page(self, job_id: str, offset: int, limit: int) -> List[Dict[str, Any]]:
+        """Scored resumes ordered by rank: AI-scored first by score, then pre-filtered ones."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT filename, analysis FROM ranking_job_resumes "
+                "WHERE job_id = ? AND status IN ('done', 'failed') "
+                "ORDER BY prefiltered ASC, score DESC, idx ASC LIMIT ? OFFSET ?",
+                (job_id, limit, offset)
+            ).fetchall()
+        return [{"filename": row["filename"], "analysis": json.loads(row["analysis"])} for row in rows]
+
+
+class RankingJobManager:
+    """
+    Runs ranking jobs in the background with a bounded pool of workers
+
+    Workers claim resumes from the job store under a lease and renew it
+    while they work, so every server worker can take part and a resume held
+    by a worker that died is picked up again once its lease expires. Jobs
+    submitted in batch mode are claimed and scored several resumes at a
+    time. Workers share the AI client's concurrency limiter, so job traffic
+    and interactive /rank traffic are throttled together.
+
+    Resumes submitted by blob name are loaded by the workers through
+    resolve_text, at most resolve_concurrency at a time. A resume whose text
+    cannot be loaded is recorded as failed; the rest of the job goes on.
+    """
+
+    def __init__(
+        self,
+        store: RankingJobStore,
+        ranker: ResumeRanker,
+        workers: int = 4,
+        lease_seconds: float = 120.0,
+        resolve_text: Optional[Callable[[str], Awaitable[Optional[str]]]] = None,
+        resolve_concurrency: int = 8
+    ):
+        self.store = store
+        self.ranker = ranker
+        self.workers = max(1, workers)
+        self.lease_seconds = max(1.0, lease_seconds)
+        self.resolve_text = resolve_text
+        self.resolve_concurrency = max(1, resolve_concurrency)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup: Optional[asyncio.Event] = None
+        self._resolve_slots: Optional[asyncio.Semaphore] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._resolve_slots = asyncio.Semaphore(self.resolve_concurrency)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await asyncio.to_thread(self.store.release_leases, self.owner)
+
+    async def submit(
+        self,
+        resumes: List,
+        job_requirements,
+        prefilter_top_k: Optional[int] = None,
+        prefilter_min_score: Optional[float] = None,
+        batch_mode: Optional[bool] = None
+    ) -> str:
+        """
+        Persist a new ranking job and wake the workers. Returns the job id.
+
+        Resumes without content must name a blob; their text is loaded by
+        the workers, so a pre-filter over such a job runs once it is in.
+        """
+        job_req_dict = job_requirements.dict() if hasattr(job_requirements, 'dict') else job_requirements
+        use_batches = settings.ranking_batch_enabled if batch_mode is None else batch_mode
+        entries = [(r.filename, r.content if r.content.strip() else None, r.blob_name) for r in resumes]
+
+        prefilter = None
+        prefiltered: Dict[int, Dict[str, Any]] = {}
+        if prefilter_top_k is not None or prefilter_min_score is not None:
+            if any(content is None for _, content, _ in entries):
+                prefilter = {"top_k": prefilter_top_k, "min_score": prefilter_min_score}
+            else:
+                _, rejected = self.ranker._prefilter(resumes, job_req_dict, prefilter_top_k, prefilter_min_score)
+                prefiltered = {idx: self.ranker._prefiltered_analysis(lexical) for idx, lexical in rejected}
+
+        job_id = await asyncio.to_thread(
+            self.store.create_job, job_req_dict, entries, prefiltered, use_batches, prefilter
+        )
+        if len(prefiltered) == len(resumes):
+            await asyncio.to_thread(self.store.mark_completed_if_done, job_id)
+        else:
+            self._wakeup.set()
+        return job_id
+
+    async def _worker(self) -> None:
+        job_cache: Dict[str, JobPrompt] = {}
+        # Expired leases of dead workers are only noticed by polling
+        poll_seconds = self.lease_seconds / 4
+        while True:
+            self._wakeup.clear()
+            try:
+                claimed = await asyncio.to_thread(
+                    self.store.claim_work, self.owner, self.lease_seconds, settings.ranking_batch_max_resumes
+                )
+            except Exception as e:
+                logger.error(f"Claiming ranking job work failed: {e}")
+                claimed = []
+            if not claimed:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job_id = claimed[0]["job_id"]
+            try:
+                await self._process(job_id, claimed, job_cache)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ranking job {job_id} items {[item['idx'] for item in claimed]} failed: {e}")
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self.store.renew_leases, self.owner, self.lease_seconds)
+            except Exception as e:
+                logger.error(f"Renewing ranking job leases failed: {e}")
+            try:
+                for job_id in await asyncio.to_thread(self.store.stalled_prefilters):
+                    await self._run_prefilter(job_id)
+            except Exception as e:
+                logger.error(f"Running stalled ranking job pre-filters failed: {e}")
+
+    async def _process(self, job_id: str, claimed: List[Dict[str, Any]], job_cache: Dict[str, JobPrompt]) -> None:
+        job_prompt = job_cache.get(job_id)
+        if job_prompt is None or claimed[0]["status"] == "resolving":
+            job = await asyncio.to_thread(self.store.get_job, job_id)
+            if job is None:
+                # Job was deleted after its resumes were claimed
+                return
+            job_prompt = get_job_prompt("ranking", job["job_requirements"], RANKING_CRITERIA)
+            if len(job_cache) > 64:
+                job_cache.clear()
+            job_cache[job_id] = job_prompt
+
+        if claimed[0]["status"] == "resolving":
+            claimed = await self._load_texts(job_id, claimed, job["status"] == "resolving")
+            if not claimed:
+                return
+
+        if len(claimed) > 1:
+            resumes = [ResumeData(filename=item["filename"], content=item["content"], format="text") for item in claimed]
+            outcomes = await self.ranker._analyze_in_batches(resumes, job_prompt)
+        else:
+            outcomes = [await self.ranker._analyze_or_error(claimed[0]["filename"], claimed[0]["content"], job_prompt)]
+
+        for item, (_, result, error) in zip(claimed, outcomes):
+            failed = error is not None or result is None
+            analysis = self.ranker._failed_analysis(error) if failed else result
+            await asyncio.to_thread(self.store.record_result, job_id, item["idx"], analysis, failed)
+
+    async def _load_texts(self, job_id: str, claimed: List[Dict[str, Any]], awaits_prefilter: bool) -> List[Dict[str, Any]]:
+        """
+        Load the text of claimed blob resumes, recording those that fail
+
+        Returns the loaded resumes that can be scored right away, which is
+        none while the job waits on its pre-filter.
+        """
+        errors = await asyncio.gather(*(self._load_text(item) for item in claimed))
+        loaded = []
+        for item, error in zip(claimed, errors):
+            if error is None:
+                loaded.append(item)
+            else:
+                await asyncio.to_thread(
+                    self.store.record_result, job_id, item["idx"], self.ranker._failed_analysis(error), True
+                )
+
+        texts = {item["idx"]: item["content"] for item in loaded}
+        remaining = await asyncio.to_thread(self.store.store_texts, job_id, texts, awaits_prefilter)
+        if not awaits_prefilter:
+            return loaded
+        if remaining == 0:
+            await self._run_prefilter(job_id)
+        return []
+
+    async def _load_text(self, item: Dict[str, Any]) -> Optional[str]:
+        """Fill in item's content from its blob. Returns an error message on failure."""
+        blob_name = item["blob_name"]
+        if self.resolve_text is None:
+            return f"Resume {blob_name} cannot be loaded: no text source is configured"
+        try:
+            async with self._resolve_slots:
+                text = await self.resolve_text(blob_name)
+        except Exception as e:
+            logger.error(f"Failed to load text of resume {blob_name}: {e}")
+            return f"Could not load resume {blob_name}: {str(e)}"
+        if text is None:
+            return f"Resume {blob_name} not found"
+        item["content"] = text
+        return None
+
+    async def _run_prefilter(self, job_id: str) -> None:
+        """Run a job's deferred pre-filter over its loaded resumes and release them for scoring"""
+        job = await asyncio.to_thread(self.store.get_job, job_id)
+        if job is None or job["status"] != "resolving":
+            return
+        items = await asyncio.to_thread(self.store.pending_texts, job_id)
+        resumes = [ResumeData(filename=item["filename"], content=item["content"], format="text") for item in items]
+        prefilter = job["prefilter"] or {}
+        _, rejected = self.ranker._prefilter(resumes, job["job_requirements"], prefilter.get("top_k"), prefilter.get("min_score"))
+        prefiltered = {items[i]["idx"]: self.ranker._prefiltered_analysis(lexical) for i, lexical in rejected}
+        if await asyncio.to_thread(self.store.apply_prefilter, job_id, prefiltered):
+            self._wakeup.set()
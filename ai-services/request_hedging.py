@@ -0,0 +1,121 @@
+import math
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+
+class LatencyWindow:
+    """Rolling window of recent upstream call latencies for one operation"""
+
+    def __init__(self, size: int):
+        self._samples: Deque[float] = deque(maxlen=max(1, size))
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        # Nearest-rank percentile
+        index = min(len(ordered) - 1, max(0, math.ceil(pct / 100.0 * len(ordered)) - 1))
+        return ordered[index]
+
+
+class HedgeBudget:
+    """
+    Caps the extra upstream spend caused by hedging
+
+    Every primary call earns ratio times its estimated token cost in
+    credit, and a hedge may only be sent if its own cost is covered. Over
+    any period hedges therefore use at most ratio of the primary calls'
+    tokens. Credit is capped at burst_tokens, so a long quiet stretch
+    cannot be saved up and spent in one slow burst (and calls costing more
+    than that are never hedged).
+    """
+
+    def __init__(self, ratio: float, burst_tokens: float):
+        self.ratio = max(0.0, ratio)
+        self.burst_tokens = max(0.0, burst_tokens)
+        self.credit = 0.0
+
+    def earn(self, cost: float) -> None:
+        self.credit = min(self.burst_tokens, self.credit + self.ratio * cost)
+
+    def try_spend(self, cost: float) -> bool:
+        if self.credit < cost:
+            return False
+        self.credit -= cost
+        return True
+
+    def refund(self, cost: float) -> None:
+        self.credit = min(self.burst_tokens, self.credit + cost)
+
+
+class RequestHedger:
+    """
+    Decides when a slow upstream call gets a second, duplicate request
+
+    A call that has not answered after the configured percentile of its
+    operation's recent latencies (never earlier than min_delay_seconds) is
+    hedged, so whichever copy answers first wins. No hedge is sent until
+    min_samples latencies have been seen for the operation, or if the hedge
+    budget does not cover the call's cost.
+
+    Latencies are those of primary calls. A primary that was cancelled
+    because its hedge won counts with the time it had been running, so the
+    slow tail stays in the window instead of drifting the delay down.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        min_delay_seconds: float = 0.5,
+        min_samples: int = 20,
+        window_size: int = 500,
+        budget_ratio: float = 0.05,
+        budget_burst_tokens: float = 20000.0
+    ):
+        self.percentile = min(99.9, max(1.0, percentile))
+        self.min_delay_seconds = max(0.0, min_delay_seconds)
+        self.min_samples = max(1, min_samples)
+        self.window_size = window_size
+        self.budget = HedgeBudget(budget_ratio, budget_burst_tokens)
+        self._windows: Dict[str, LatencyWindow] = {}
+        self.sent = 0
+        self.won = 0
+        self.skipped = 0
+
+    def _window(self, operation: str) -> LatencyWindow:
+        window = self._windows.get(operation)
+        if window is None:
+            window = self._windows[operation] = LatencyWindow(self.window_size)
+        return window
+
+    def delay_for(self, operation: str) -> Optional[float]:
+        """Seconds to wait before hedging a call, or None while there is too little history"""
+        window = self._window(operation)
+        if len(window) < self.min_samples:
+            return None
+        return max(self.min_delay_seconds, window.percentile(self.percentile))
+
+    def record_primary(self, operation: str, seconds: float, cost: float) -> None:
+        self._window(operation).add(seconds)
+        self.budget.earn(cost)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "percentile": self.percentile,
+            "budget_ratio": self.budget.ratio,
+            "budget_credit_tokens": round(self.budget.credit),
+            "sent": self.sent,
+            "won": self.won,
+            "skipped": self.skipped,
+            "delay_seconds": {
+                operation: round(delay, 3)
+                for operation in self._windows
+                if (delay := self.delay_for(operation)) is not None
+            }
+        }
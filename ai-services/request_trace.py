@@ -0,0 +1,107 @@
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+MAX_SPANS_PER_TRACE = 5000
+
+
+class RequestTrace:
+    """Timing spans collected for a single opted-in request"""
+
+    def __init__(self, method: str, path: str):
+        self.trace_id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.spans: List[Dict[str, Any]] = []
+        self.dropped_spans = 0
+
+    def add_span(self, name: str, start: float, duration: float, attrs: Dict[str, Any]) -> None:
+        if len(self.spans) >= MAX_SPANS_PER_TRACE:
+            self.dropped_spans += 1
+            return
+        self.spans.append({
+            "name": name,
+            "start_ms": round((start - self.started) * 1000, 3),
+            "duration_ms": round(duration * 1000, 3),
+            **attrs
+        })
+
+    def finish(self) -> None:
+        self.finished = time.perf_counter()
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return {
+            "trace_id": self.trace_id,
+            "method": self.method,
+            "path": self.path,
+            "complete": self.finished is not None,
+            "total_ms": round((end - self.started) * 1000, 3),
+            "spans": sorted(self.spans, key=lambda span: span["start_ms"]),
+            "dropped_spans": self.dropped_spans
+        }
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+_span_attrs: ContextVar[Dict[str, Any]] = ContextVar("request_trace_attrs", default={})
+
+
+def start_trace(method: str, path: str) -> RequestTrace:
+    trace = RequestTrace(method, path)
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+def record_span(name: str, duration: float, **attrs: Any) -> None:
+    """Record a span that just ended; a no-op unless the request is traced"""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    trace.add_span(name, time.perf_counter() - duration, duration, {**_span_attrs.get(), **attrs})
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - start, **attrs)
+
+
+@contextmanager
+def span_attributes(**attrs: Any) -> Iterator[None]:
+    """
+    Attach attributes (e.g. resume=filename) to every span recorded inside
+    the block, including spans from nested calls in the same task
+    """
+    token = _span_attrs.set({**_span_attrs.get(), **attrs})
+    try:
+        yield
+    finally:
+        _span_attrs.reset(token)
+
+
+class TraceStore:
+    """Most recent traces, kept so streamed responses can be fetched once complete"""
+
+    def __init__(self, max_traces: int = 200):
+        self.max_traces = max_traces
+        self._traces: "OrderedDict[str, RequestTrace]" = OrderedDict()
+
+    def add(self, trace: RequestTrace) -> None:
+        self._traces[trace.trace_id] = trace
+        while len(self._traces) > self.max_traces:
+            self._traces.popitem(last=False)
+
+    def get(self, trace_id: str) -> Optional[RequestTrace]:
+        return self._traces.get(trace_id)
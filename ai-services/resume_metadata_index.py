@@ -0,0 +1,152 @@
+import base64
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resumes (
+    blob_name TEXT PRIMARY KEY,
+    original_filename TEXT NOT NULL,
+    content_type TEXT,
+    size INTEGER NOT NULL,
+    uploaded_at TEXT NOT NULL,
+    content_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_resumes_uploaded ON resumes (uploaded_at DESC, blob_name DESC);
+CREATE INDEX IF NOT EXISTS idx_resumes_hash ON resumes (content_hash);
+"""
+
+_COLUMNS = ("blob_name", "original_filename", "content_type", "size", "uploaded_at", "content_hash")
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    """Opaque, URL-safe pagination cursor"""
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(payload, dict):
+        raise ValueError("Invalid cursor")
+    return payload
+
+
+class ResumeMetadataIndex:
+    """
+    Local SQLite index of stored resume metadata
+
+    Kept in sync on upload and delete so listing, date filtering and counting
+    never have to scan the blob container. Pages are keyset-paginated on
+    (uploaded_at, blob_name), newest first, so deep pages cost the same as
+    the first one.
+    """
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def upsert(self, record: Dict[str, Any]) -> None:
+        self.upsert_many([record])
+
+    def upsert_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        rows = [tuple(record.get(column) for column in _COLUMNS) for record in records]
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO resumes ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' for _ in _COLUMNS)})",
+                rows
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def remove(self, blob_name: str) -> bool:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM resumes WHERE blob_name = ?", (blob_name,))
+            self._conn.commit()
+        return cur.rowcount > 0
+
+    def get(self, blob_name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM resumes WHERE blob_name = ?", (blob_name,)).fetchone()
+        return dict(row) if row else None
+
+    def find_by_hash(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Oldest stored resume with this content hash, if any"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM resumes WHERE content_hash = ? ORDER BY uploaded_at ASC LIMIT 1",
+                (content_hash,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def count(self, uploaded_from: Optional[str] = None, uploaded_to: Optional[str] = None) -> int:
+        where, params = self._date_filter(uploaded_from, uploaded_to)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM resumes{where}", params).fetchone()[0]
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        uploaded_from: Optional[str] = None,
+        uploaded_to: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of resumes, newest first
+
+        Args:
+            limit: Page size
+            cursor: Cursor returned with the previous page
+            uploaded_from: Inclusive lower bound on uploaded_at (ISO date or datetime)
+            uploaded_to: Inclusive upper bound on uploaded_at (ISO date or datetime)
+
+        Returns:
+            (records, next cursor or None on the last page)
+        """
+        where, params = self._date_filter(uploaded_from, uploaded_to)
+        if cursor:
+            position = decode_cursor(cursor)
+            if "u" not in position or "b" not in position:
+                raise ValueError("Invalid cursor")
+            where += " AND " if where else " WHERE "
+            where += "(uploaded_at < ? OR (uploaded_at = ? AND blob_name < ?))"
+            params += [position["u"], position["u"], position["b"]]
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM resumes{where} ORDER BY uploaded_at DESC, blob_name DESC LIMIT ?",
+                params + [limit + 1]
+            ).fetchall()
+        records = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = records[-1]
+            next_cursor = encode_cursor({"u": last["uploaded_at"], "b": last["blob_name"]})
+        return records, next_cursor
+
+    @staticmethod
+    def _date_filter(uploaded_from: Optional[str], uploaded_to: Optional[str]) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        if uploaded_from:
+            clauses.append("uploaded_at >= ?")
+            params.append(uploaded_from)
+        if uploaded_to:
+            # A bare date includes the whole day
+            clauses.append("uploaded_at <= ?")
+            params.append(uploaded_to + "T23:59:59.999999" if len(uploaded_to) == 10 else uploaded_to)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
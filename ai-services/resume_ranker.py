@@ -1,99 +1,442 @@
 import asyncio
 import time
-from typing import List, Dict, Any
-from models import ResumeRankingRequest, ResumeRankingResponse, ResumeRankingResult, RankingScore
-from ai_client import AzureOpenAIClient
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple, AsyncIterator
+from models import ResumeRankingResponse, ResumeRankingResult, RankingScore
+from config import settings
+from skill_matcher import get_skill_matcher
+from job_prompts import JobPrompt, RANKING_CRITERIA, get_job_prompt
+from metrics import RANKING_CASCADE_RESUMES, observe_stage, stage_timer
+from request_trace import span, span_attributes
+
+if TYPE_CHECKING:
+    # Imported on first use: the OpenAI SDK is slow to import
+    from ai_client import AzureOpenAIClient
 
 class ResumeRanker:
-    def __init__(self, ai_client: AzureOpenAIClient = None):
-        self.ai_client = ai_client or AzureOpenAIClient()
+    def __init__(self, ai_client: "AzureOpenAIClient" = None):
+        if ai_client is None:
+            from ai_client import AzureOpenAIClient
+            ai_client = AzureOpenAIClient()
+        self.ai_client = ai_client
 
-    async def rank_resumes(self, resumes: List, job_requirements) -> ResumeRankingResponse:
+    async def rank_resumes(
+        self,
+        resumes: List,
+        job_requirements,
+        batch_mode: Optional[bool] = None,
+        prefilter_top_k: Optional[int] = None,
+        prefilter_min_score: Optional[float] = None,
+        cascade_mode: Optional[bool] = None,
+        cascade_top_n: Optional[int] = None
+    ) -> ResumeRankingResponse:
         """
         Rank multiple resumes based on job requirements
+
+        When batch_mode is enabled (defaults to RANKING_BATCH_ENABLED), several
+        resumes are packed into each chat completion. When prefilter_top_k or
+        prefilter_min_score is given, only the resumes shortlisted by the local
+        lexical pre-filter are sent to the AI; the rest are ranked below them.
+
+        When cascade_mode is enabled (defaults to RANKING_CASCADE_ENABLED) and
+        a fast deployment is configured, requests with at least
+        RANKING_CASCADE_MIN_RESUMES shortlisted resumes are ranked in two
+        tiers: the fast deployment scores everyone with a short prompt, and
+        only the cascade_top_n best are analyzed in full. Finalists rank
+        first by their full score, then the rest by their quick score.
         """
         start_time = time.time()
         
         try:
             # Convert job requirements to dict for AI client
             job_req_dict = job_requirements.dict() if hasattr(job_requirements, 'dict') else job_requirements
-            
-            # Analyze each resume
-            async def analyze(filename: str, content: str):
-                try:
-                    res = await self._analyze_single_resume(content, job_req_dict, ["skills_match", "experience", "education", "overall_fit"])
-                    return filename, res, None
-                except Exception as e:
-                    return filename, None, str(e)
+            with stage_timer("prompt_build", "rank"):
+                job = get_job_prompt("ranking", job_req_dict, RANKING_CRITERIA)
+            use_batches = settings.ranking_batch_enabled if batch_mode is None else batch_mode
 
-            tasks = [analyze(r.filename, r.content) for r in resumes]
-            gathered = await asyncio.gather(*tasks, return_exceptions=False)
+            with stage_timer("prefilter", "rank"):
+                shortlisted, rejected = self._prefilter(resumes, job_req_dict, prefilter_top_k, prefilter_min_score)
+
+            top_n = settings.ranking_cascade_top_n if cascade_top_n is None else cascade_top_n
+            use_cascade = (
+                (settings.ranking_cascade_enabled if cascade_mode is None else cascade_mode)
+                and self.ai_client.fast_pool is not None
+                and len(shortlisted) >= settings.ranking_cascade_min_resumes
+                and len(shortlisted) > top_n
+            )
+            quick_only: List[Tuple[str, Dict[str, Any]]] = []
+            unscored: List[Tuple[str, Optional[str]]] = []
+            if use_cascade:
+                gathered, quick_only, unscored = await self._rank_cascade(shortlisted, job, top_n, use_batches)
+            else:
+                gathered = await self._analyze_all(shortlisted, job, use_batches)
 
+            model_start = time.perf_counter()
             results = []
             for filename, result, error in gathered:
                 if error is None and result is not None:
                     results.append((filename, result))
                 else:
-                    results.append((filename, {
-                        "overall_score": 0.0,
-                        "breakdown": {
-                            "skills_match": 0.0,
-                            "experience": 0.0,
-                            "education": 0.0,
-                            "overall_fit": 0.0
-                        },
-                        "reasoning": f"Analysis failed: {error}"
-                    }))
+                    results.append((filename, self._failed_analysis(error)))
             
-            # Sort results by overall score (descending)
-            results.sort(key=lambda x: x[1]["overall_score"], reverse=True)
-            
-            # Create ranking results
-            ranked_resumes = []
-            for rank, (filename, analysis) in enumerate(results, 1):
-                ranking_score = RankingScore(
-                    score=analysis["overall_score"],
-                    breakdown=analysis["breakdown"],
-                    reasoning=analysis["reasoning"]
-                )
-                
-                ranked_result = ResumeRankingResult(
+            ranked_resumes = self._build_ranked_results(results)
+
+            # Resumes only scored by the fast tier rank after the finalists
+            for filename, analysis in sorted(quick_only, key=lambda x: x[1]["overall_score"], reverse=True):
+                ranked_resumes.append(ResumeRankingResult(
+                    filename=filename,
+                    ranking=self._ranking_score(analysis),
+                    rank=len(ranked_resumes) + 1
+                ))
+
+            # Resumes that neither tier could score carry no signal at all
+            for filename, error in unscored:
+                ranked_resumes.append(ResumeRankingResult(
                     filename=filename,
-                    ranking=ranking_score,
-                    rank=rank
-                )
-                ranked_resumes.append(ranked_result)
+                    ranking=self._ranking_score(self._failed_analysis(error)),
+                    rank=len(ranked_resumes) + 1
+                ))
+
+            # Resumes dropped by the pre-filter always rank after AI-scored ones
+            for i, lexical in rejected:
+                ranked_resumes.append(ResumeRankingResult(
+                    filename=resumes[i].filename,
+                    ranking=self._ranking_score(self._prefiltered_analysis(lexical)),
+                    rank=len(ranked_resumes) + 1
+                ))
             
             processing_time = time.time() - start_time
             
-            return ResumeRankingResponse(
+            response = ResumeRankingResponse(
                 ranked_resumes=ranked_resumes,
                 total_resumes=len(resumes),
                 processing_time=processing_time
             )
+            observe_stage("model_build", "rank", time.perf_counter() - model_start)
+            observe_stage("total", "rank", processing_time)
+            return response
             
         except Exception as e:
             raise Exception(f"Error ranking resumes: {str(e)}")
 
-    async def _analyze_single_resume(self, content: str, job_requirements: Dict[str, Any], criteria: List[str]) -> Dict[str, Any]:
+    async def rank_resumes_stream(
+        self,
+        resumes: List,
+        job_requirements,
+        batch_mode: Optional[bool] = None,
+        prefilter_top_k: Optional[int] = None,
+        prefilter_min_score: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
         """
-        Analyze a single resume using the AI client
+        Rank resumes, yielding events as each resume is scored
+
+        Yields a "result" event per scored resume carrying the provisional
+        ranks of everything scored so far, then a final "summary" event with
+        the complete ranking and processing_time. In batch mode (see
+        rank_resumes) the resumes of a batch are yielded together when it
+        completes. Resumes dropped by the pre-filter are yielded after every
+        AI-scored one and rank below them.
         """
-        return await self.ai_client.analyze_resume_for_ranking(content, job_requirements, criteria)
+        start_time = time.time()
+        job_req_dict = job_requirements.dict() if hasattr(job_requirements, 'dict') else job_requirements
+        job = get_job_prompt("ranking", job_req_dict, RANKING_CRITERIA)
+        shortlisted, rejected = self._prefilter(resumes, job_req_dict, prefilter_top_k, prefilter_min_score)
+        rejected_indices = {i for i, _ in rejected}
+        shortlisted_indices = [i for i in range(len(resumes)) if i not in rejected_indices]
+        use_batches = settings.ranking_batch_enabled if batch_mode is None else batch_mode
 
-    def _validate_request(self, request: ResumeRankingRequest) -> None:
+        async def analyze(index: int, resume):
+            return [(index, await self._analyze_or_error(resume.filename, resume.content, job))]
+
+        async def analyze_batch(positions: List[int]):
+            outcomes = await self._analyze_batch([shortlisted[p] for p in positions], job)
+            return [(shortlisted_indices[p], outcome) for p, outcome in zip(positions, outcomes)]
+
+        if use_batches and len(shortlisted) > 1:
+            tasks = [asyncio.ensure_future(analyze_batch(b)) for b in self._plan_batches(shortlisted)]
+        else:
+            tasks = [asyncio.ensure_future(analyze(i, r)) for i, r in zip(shortlisted_indices, shortlisted)]
+        # (index, filename, analysis, prefiltered) for every resume scored so far
+        completed: List[Tuple[int, str, Dict[str, Any], bool]] = []
+
+        def result_event(index: int, filename: str, analysis: Dict[str, Any]) -> Dict[str, Any]:
+            # Pre-filtered resumes keep their lexical order after the AI-scored ones
+            ordered = sorted(completed, key=lambda x: (x[3], 0.0 if x[3] else -x[2]["overall_score"]))
+            ranks = {idx: rank for rank, (idx, _, _, _) in enumerate(ordered, 1)}
+            return {
+                "type": "result",
+                "index": index,
+                "result": ResumeRankingResult(
+                    filename=filename,
+                    ranking=self._ranking_score(analysis),
+                    rank=ranks[index]
+                ).dict(),
+                "provisional_ranks": [
+                    {"index": idx, "filename": name, "rank": ranks[idx]}
+                    for idx, name, _, _ in ordered
+                ],
+                "completed": len(completed),
+                "total": len(resumes)
+            }
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for index, (filename, result, error) in await next_done:
+                    analysis = result if error is None and result is not None else self._failed_analysis(error)
+                    completed.append((index, filename, analysis, False))
+                    yield result_event(index, filename, analysis)
+
+            for index, lexical in rejected:
+                analysis = self._prefiltered_analysis(lexical)
+                completed.append((index, resumes[index].filename, analysis, True))
+                yield result_event(index, resumes[index].filename, analysis)
+
+            ranked_resumes = self._build_ranked_results(
+                [(filename, analysis) for _, filename, analysis, prefiltered in sorted(completed, key=lambda x: x[0]) if not prefiltered]
+            )
+            for index, lexical in rejected:
+                ranked_resumes.append(ResumeRankingResult(
+                    filename=resumes[index].filename,
+                    ranking=self._ranking_score(self._prefiltered_analysis(lexical)),
+                    rank=len(ranked_resumes) + 1
+                ))
+            yield {
+                "type": "summary",
+                **ResumeRankingResponse(
+                    ranked_resumes=ranked_resumes,
+                    total_resumes=len(resumes),
+                    processing_time=time.time() - start_time
+                ).dict()
+            }
+        finally:
+            # Client went away or the stream was closed early; stop paying for the rest
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _analyze_all(self, resumes: List, job: JobPrompt, use_batches: bool) -> List[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+        """Full analysis of every resume, batched or one call per resume"""
+        if use_batches and len(resumes) > 1:
+            return await self._analyze_in_batches(resumes, job)
+        return await asyncio.gather(*[self._analyze_or_error(r.filename, r.content, job) for r in resumes])
+
+    async def _rank_cascade(
+        self,
+        resumes: List,
+        job: JobPrompt,
+        top_n: int,
+        use_batches: bool
+    ) -> Tuple[
+        List[Tuple[str, Optional[Dict[str, Any]], Optional[str]]],
+        List[Tuple[str, Dict[str, Any]]],
+        List[Tuple[str, Optional[str]]]
+    ]:
         """
-        Validate the ranking request
+        Two-tier ranking: quick scores for everyone, full analysis for finalists
+
+        Resumes the fast tier could not score are escalated to the full
+        analysis along with the top_n finalists, so a fast-tier outage costs
+        speed rather than candidates. A finalist whose full analysis fails
+        keeps its quick score and drops back among the quick-only resumes.
+        An escalated resume whose full analysis fails too has no score from
+        either tier and ranks after all of them.
+
+        Returns:
+            The successful full analyses of the finalists (as _analyze_all),
+            (filename, analysis) pairs of the resumes ranked on their quick
+            score, and (filename, error) pairs of the resumes neither tier
+            could score
         """
-        if not request.resumes:
-            raise ValueError("At least one resume must be provided")
-        
-        if len(request.resumes) > 50:
-            raise ValueError("Maximum 50 resumes can be ranked at once")
-        
-        if not request.job_requirements.required_skills:
-            raise ValueError("At least one required skill must be specified")
+        async def quick(resume) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+            with span_attributes(resume=resume.filename), span("quick_score"):
+                try:
+                    return await self.ai_client.analyze_resume_quick(resume.content, job), None
+                except Exception as e:
+                    return None, str(e)
+
+        with span("cascade_quick_tier"):
+            quick_results = await asyncio.gather(*[quick(r) for r in resumes])
+        scored = sorted(
+            (i for i, (analysis, _) in enumerate(quick_results) if analysis is not None),
+            key=lambda i: quick_results[i][0]["overall_score"],
+            reverse=True
+        )
+        escalated = [i for i, (analysis, _) in enumerate(quick_results) if analysis is None]
+        finalists = sorted(scored[:top_n] + escalated)
+        RANKING_CASCADE_RESUMES.labels(tier="finalist").inc(len(scored[:top_n]))
+        RANKING_CASCADE_RESUMES.labels(tier="escalated").inc(len(escalated))
+        RANKING_CASCADE_RESUMES.labels(tier="quick_only").inc(len(scored) - len(scored[:top_n]))
+
+        with span("cascade_full_tier"):
+            outcomes = await self._analyze_all([resumes[i] for i in finalists], job, use_batches)
+
+        gathered = []
+        unscored = []
+        quick_only = [
+            (resumes[i].filename, self._quick_only_analysis(quick_results[i][0], top_n))
+            for i in scored[top_n:]
+        ]
+        for i, (filename, result, error) in zip(finalists, outcomes):
+            quick_analysis = quick_results[i][0]
+            if error is None and result is not None:
+                gathered.append((filename, result, error))
+            elif quick_analysis is not None:
+                quick_only.append((filename, {
+                    **quick_analysis,
+                    "reasoning": f"Full analysis failed ({error}); quick first-pass score: {quick_analysis['reasoning']}"
+                }))
+            else:
+                unscored.append((filename, error))
+        return gathered, quick_only, unscored
+
+    def _quick_only_analysis(self, analysis: Dict[str, Any], top_n: int) -> Dict[str, Any]:
+        return {
+            **analysis,
+            "reasoning": f"Quick first-pass score only (not among the top {top_n} analyzed in full): {analysis['reasoning']}"
+        }
+
+    def _prefilter(
+        self,
+        resumes: List,
+        job_requirements: Dict[str, Any],
+        top_k: Optional[int],
+        min_score: Optional[float]
+    ) -> Tuple[List, List[Tuple[int, Dict[str, Any]]]]:
+        """
+        Split resumes into those worth an AI call and those that are not
+
+        Returns the shortlisted resumes in their original order, and the
+        rejected (index, lexical score) pairs ordered by lexical score.
+        """
+        if top_k is None and min_score is None:
+            return list(resumes), []
+
+        matcher = get_skill_matcher(job_requirements)
+        experience_years = job_requirements.get("experience_years")
+        scored = [(i, matcher.score(r.content, experience_years)) for i, r in enumerate(resumes)]
+        scored.sort(key=lambda x: x[1]["score"], reverse=True)
+
+        keep = [i for i, lexical in scored if min_score is None or lexical["score"] >= min_score]
+        if top_k is not None:
+            keep = keep[:max(0, top_k)]
+        keep_set = set(keep)
+
+        shortlisted = [r for i, r in enumerate(resumes) if i in keep_set]
+        rejected = [(i, lexical) for i, lexical in scored if i not in keep_set]
+        return shortlisted, rejected
+
+    def _prefiltered_analysis(self, lexical: Dict[str, Any]) -> Dict[str, Any]:
+        matched = ", ".join(lexical["matched_required"]) or "none"
+        return {
+            "overall_score": 0.0,
+            "breakdown": {
+                "skills_match": lexical["skills_match"],
+                "experience": lexical["experience"],
+                "education": 0.0,
+                "overall_fit": 0.0
+            },
+            "reasoning": (
+                f"Not shortlisted for AI analysis by the keyword pre-filter "
+                f"(lexical score {lexical['score']:.1f}; required skills matched: {matched})"
+            )
+        }
+
+    def _failed_analysis(self, error: Optional[str]) -> Dict[str, Any]:
+        return {
+            "overall_score": 0.0,
+            "breakdown": {
+                "skills_match": 0.0,
+                "experience": 0.0,
+                "education": 0.0,
+                "overall_fit": 0.0
+            },
+            "reasoning": f"Analysis failed: {error}"
+        }
+
+    @staticmethod
+    def _ranking_score(analysis: Dict[str, Any]) -> RankingScore:
+        return RankingScore(
+            score=analysis["overall_score"],
+            breakdown=analysis["breakdown"],
+            reasoning=analysis["reasoning"]
+        )
+
+    def _build_ranked_results(self, results: List[Tuple[str, Dict[str, Any]]]) -> List[ResumeRankingResult]:
+        """Sort (filename, analysis) pairs by score and assign 1-based ranks"""
+        # Sort results by overall score (descending)
+        ordered = sorted(results, key=lambda x: x[1]["overall_score"], reverse=True)
         
-        for resume in request.resumes:
-            if not resume.content.strip():
-                raise ValueError(f"Resume {resume.filename} has empty content")
+        return [
+            ResumeRankingResult(
+                filename=filename,
+                ranking=self._ranking_score(analysis),
+                rank=rank
+            )
+            for rank, (filename, analysis) in enumerate(ordered, 1)
+        ]
+
+    async def _analyze_or_error(self, filename: str, content: str, job: JobPrompt) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+        with span_attributes(resume=filename), span("resume"):
+            try:
+                res = await self._analyze_single_resume(content, job)
+                return filename, res, None
+            except Exception as e:
+                return filename, None, str(e)
+
+    async def _analyze_in_batches(self, resumes: List, job: JobPrompt) -> List[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+        """Score resumes several at a time, in batches planned by _plan_batches"""
+        batches = self._plan_batches(resumes)
+        outcomes: List[Optional[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]] = [None] * len(resumes)
+        batch_outcomes = await asyncio.gather(*[self._analyze_batch([resumes[i] for i in b], job) for b in batches])
+        for indices, analyses in zip(batches, batch_outcomes):
+            for i, outcome in zip(indices, analyses):
+                outcomes[i] = outcome
+        return outcomes
+
+    async def _analyze_batch(self, resumes: List, job: JobPrompt) -> List[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+        """
+        Score one batch of resumes in a single call, re-scoring individually
+        any resume whose batched answer was missing or malformed
+        """
+        with span_attributes(resumes=[r.filename for r in resumes]), span("batch"):
+            try:
+                analyses = await self.ai_client.analyze_resumes_batch_for_ranking([r.content for r in resumes], job)
+            except Exception:
+                analyses = [None] * len(resumes)
+
+        retry_indices = [i for i, analysis in enumerate(analyses) if analysis is None]
+        retried = await asyncio.gather(*[
+            self._analyze_or_error(resumes[i].filename, resumes[i].content, job)
+            for i in retry_indices
+        ])
+        outcomes = [(r.filename, analysis, None) for r, analysis in zip(resumes, analyses)]
+        for i, outcome in zip(retry_indices, retried):
+            outcomes[i] = outcome
+        return outcomes
+
+    def _plan_batches(self, resumes: List) -> List[List[int]]:
+        """
+        Greedily pack resumes into batches bounded by both a resume count and
+        a total resume-text budget, so long resumes get smaller batches
+        """
+        max_chars = settings.ranking_batch_max_chars
+        max_resumes = max(1, settings.ranking_batch_max_resumes)
+
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_chars = 0
+        for i, resume in enumerate(resumes):
+            size = len(resume.content)
+            if current and (len(current) >= max_resumes or current_chars + size > max_chars):
+                batches.append(current)
+                current, current_chars = [], 0
+            current.append(i)
+            current_chars += size
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _analyze_single_resume(self, content: str, job: JobPrompt) -> Dict[str, Any]:
+        """
+        Analyze a single resume using the AI client
+        """
+        return await self.ai_client.analyze_resume_for_ranking(content, job)
@@ -1,11 +1,22 @@
+import asyncio
 import time
-from typing import Dict, Any
-from models import ResumeScreeningRequest, ResumeScreeningResponse, ScreeningResult
-from ai_client import AzureOpenAIClient
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+from models import BulkScreeningItem, BulkScreeningResponse, ResumeScreeningResponse, ScreeningResult
+from config import settings
+from metrics import observe_stage, stage_timer
+from job_prompts import SCREENING_CRITERIA, JobPrompt, get_job_prompt
+from request_trace import span, span_attributes
+
+if TYPE_CHECKING:
+    # Imported on first use: the OpenAI SDK is slow to import
+    from ai_client import AzureOpenAIClient
 
 class ResumeScreener:
-    def __init__(self, ai_client: AzureOpenAIClient = None):
-        self.ai_client = ai_client or AzureOpenAIClient()
+    def __init__(self, ai_client: "AzureOpenAIClient" = None):
+        if ai_client is None:
+            from ai_client import AzureOpenAIClient
+            ai_client = AzureOpenAIClient()
+        self.ai_client = ai_client
 
     async def screen_resume(self, resume, job_requirements) -> ResumeScreeningResponse:
         """
@@ -16,37 +27,13 @@ class ResumeScreener:
         try:
             # Convert job requirements to dict for AI client
             job_req_dict = job_requirements.dict() if hasattr(job_requirements, 'dict') else job_requirements
+            with stage_timer("prompt_build", "screen"):
+                job = get_job_prompt("screening", job_req_dict, SCREENING_CRITERIA)
             
-            # Screen the resume using AI
-            screening_result = await self.ai_client.screen_resume(
-                resume.content,
-                job_req_dict,
-                ["skills_match", "experience", "education", "red_flags"]
-            )
-            
-            # Apply reasonable pass/fail logic as a fallback
-            # If AI was too strict, override based on reasonable criteria
-            overall_score = screening_result.get("overall_score", 0)
-            has_critical_red_flags = screening_result.get("breakdown", {}).get("red_flags", {}).get("found", False)
-            
-            # Override passed flag if the AI was too conservative
-            if overall_score >= 60 and not has_critical_red_flags:
-                screening_result["passed"] = True
-            elif overall_score < 50 or has_critical_red_flags:
-                screening_result["passed"] = False
-            # For scores between 50-60, keep AI's decision
-            
-            # Create screening result object
-            result = ScreeningResult(
-                passed=screening_result["passed"],
-                score=screening_result["overall_score"],
-                breakdown=screening_result["breakdown"],
-                recommendations=screening_result.get("recommendations", []),
-                red_flags=screening_result.get("red_flags", []),
-                strengths=screening_result.get("strengths", [])
-            )
+            result = await self._screen_with_job(resume.content, job)
             
             processing_time = time.time() - start_time
+            observe_stage("total", "screen", processing_time)
             
             return ResumeScreeningResponse(
                 result=result,
@@ -56,21 +43,85 @@ class ResumeScreener:
         except Exception as e:
             raise Exception(f"Error screening resume: {str(e)}")
 
-    def _validate_request(self, request: ResumeScreeningRequest) -> None:
+    async def screen_resumes(self, resumes: List, job_requirements, failed: Optional[Dict[int, str]] = None) -> BulkScreeningResponse:
         """
-        Validate the screening request
+        Screen many resumes against one job requirement
+
+        The screening prompt is compiled once for the whole request and the
+        resumes share the AI concurrency limit, with at most
+        SCREENING_BULK_CONCURRENCY of them waiting on it at a time. A resume
+        that fails is reported in its own entry and does not fail the rest.
+
+        Args:
+            resumes: Resumes to screen
+            job_requirements: Job requirement model or dict
+            failed: Errors for resumes (by index) that could not be prepared
+                and are reported without being screened
         """
-        if not request.resume.content.strip():
-            raise ValueError("Resume content cannot be empty")
+        start_time = time.time()
+        failed = failed or {}
+        job_req_dict = job_requirements.dict() if hasattr(job_requirements, 'dict') else job_requirements
+        with stage_timer("prompt_build", "screen_bulk"):
+            job = get_job_prompt("screening", job_req_dict, SCREENING_CRITERIA)
+        slots = asyncio.Semaphore(max(1, settings.screening_bulk_concurrency))
+
+        async def screen(index: int, resume) -> BulkScreeningItem:
+            if index in failed:
+                return BulkScreeningItem(index=index, filename=resume.filename, error=failed[index])
+            if not resume.content.strip():
+                return BulkScreeningItem(index=index, filename=resume.filename, error="Resume content cannot be empty")
+            async with slots:
+                with span_attributes(resume=resume.filename), span("resume"):
+                    try:
+                        result = await self._screen_with_job(resume.content, job)
+                    except Exception as e:
+                        message = f"Error screening resume: {str(e)}"
+                        return BulkScreeningItem(index=index, filename=resume.filename, error=message, retryable=self._is_retryable(message))
+            return BulkScreeningItem(index=index, filename=resume.filename, result=result)
+
+        items = await asyncio.gather(*[screen(i, r) for i, r in enumerate(resumes)])
+        processing_time = time.time() - start_time
+        observe_stage("total", "screen_bulk", processing_time)
+        return BulkScreeningResponse(
+            results=items,
+            total_resumes=len(resumes),
+            passed=sum(1 for item in items if item.result is not None and item.result.passed),
+            failed=sum(1 for item in items if item.result is None),
+            processing_time=processing_time
+        )
+
+    async def _screen_with_job(self, content: str, job: JobPrompt) -> ScreeningResult:
+        """Screen one resume against a compiled screening prompt"""
+        # Screen the resume using AI
+        screening_result = await self.ai_client.screen_resume(content, job)
         
-        if not request.job_requirements.required_skills:
-            raise ValueError("At least one required skill must be specified")
+        # Apply reasonable pass/fail logic as a fallback
+        # If AI was too strict, override based on reasonable criteria
+        overall_score = screening_result.get("overall_score", 0)
+        has_critical_red_flags = screening_result.get("breakdown", {}).get("red_flags", {}).get("found", False)
         
-        if not request.job_requirements.title:
-            raise ValueError("Job title is required")
+        # Override passed flag if the AI was too conservative
+        if overall_score >= 60 and not has_critical_red_flags:
+            screening_result["passed"] = True
+        elif overall_score < 50 or has_critical_red_flags:
+            screening_result["passed"] = False
+        # For scores between 50-60, keep AI's decision
         
-        if not request.job_requirements.description:
-            raise ValueError("Job description is required")
+        # Create screening result object
+        with stage_timer("model_build", "screen"):
+            return ScreeningResult(
+                passed=screening_result["passed"],
+                score=screening_result["overall_score"],
+                breakdown=screening_result["breakdown"],
+                recommendations=screening_result.get("recommendations", []),
+                red_flags=screening_result.get("red_flags", []),
+                strengths=screening_result.get("strengths", [])
+            )
+
+    @staticmethod
+    def _is_retryable(message: str) -> bool:
+        """Rate limits and timeouts are transient; anything else will fail again"""
+        return "429" in message or "Too Many Requests" in message or "TimeoutError" in message or "timed out" in message
 
     def _format_breakdown(self, breakdown: Dict[str, Any]) -> Dict[str, Any]:
         """
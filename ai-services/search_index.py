@@ -0,0 +1,390 @@
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development only
+    fcntl = None
+
+import numpy as np
+from scipy import sparse
+
+from skill_matcher import SKILL_SYNONYMS
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, keeping tech-style names such as c++, c# and node.js intact."""
+    return [t.rstrip(".") for t in _TOKEN_RE.findall((text or "").casefold())]
+
+
+def build_job_query(job_requirements: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Turn a job requirement dict into weighted query terms
+
+    Required skills weigh most, then preferred skills and the title; the
+    description contributes a little so generic wording does not dominate.
+    Known skill synonyms are added at half the weight of the skill itself.
+    """
+    weights: Dict[str, float] = {}
+
+    def add(text: str, weight: float) -> None:
+        for token in tokenize(text):
+            weights[token] = max(weights.get(token, 0.0), weight)
+
+    for skill in job_requirements.get("required_skills") or []:
+        add(skill, 3.0)
+        for synonym in SKILL_SYNONYMS.get(skill.strip().casefold(), []):
+            add(synonym, 1.5)
+    for skill in job_requirements.get("preferred_skills") or []:
+        add(skill, 1.5)
+        for synonym in SKILL_SYNONYMS.get(skill.strip().casefold(), []):
+            add(synonym, 0.75)
+    add(job_requirements.get("title") or "", 1.0)
+    add(job_requirements.get("description") or "", 0.25)
+    return weights
+
+
+class ResumeSearchIndex:
+    """
+    BM25 index over extracted resume text, keyed by blob name
+
+    Term frequencies live in a base segment (a SciPy CSC matrix of raw
+    counts) plus a small delta segment of documents added since the base
+    was built. Document frequencies and lengths are kept up to date on
+    every change, so BM25 weights are computed at query time from the
+    columns of the query terms only and an upload never invalidates the
+    base. Removed or re-indexed documents are masked out of the base.
+    Once the delta outgrows merge_min_docs and merge_ratio of the base it
+    is merged in by a background thread; searches keep using the old
+    segments until the new base is swapped in.
+
+    Updates are appended to a JSONL log on disk and replayed on startup.
+    Server workers share that log: appends and compactions take a file
+    lock, and each worker applies records written by the others before
+    every update and search. add, remove and search touch the file, so
+    async callers run them in a thread.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+        merge_min_docs: int = 256,
+        merge_ratio: float = 0.1
+    ):
+        self.path = Path(path) if path else None
+        self.k1 = k1
+        self.b = b
+        self.merge_min_docs = merge_min_docs
+        self.merge_ratio = merge_ratio
+        self._docs: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._log_lines = 0
+        # How far into which log file this process has read
+        self._log_offset = 0
+        self._log_inode: Optional[int] = None
+        # Corpus statistics over every live document
+        self._df: Counter = Counter()
+        self._total_len = 0
+        # Base segment
+        self._base_tf = sparse.csc_matrix((0, 0), dtype=np.float32)
+        self._base_names: List[str] = []
+        self._base_rows: Dict[str, int] = {}
+        self._base_lens = np.zeros(0, dtype=np.float32)
+        self._base_vocab: Dict[str, int] = {}
+        self._base_live = np.zeros(0, dtype=bool)
+        # Documents not in the base (new, or re-indexed since it was built)
+        self._delta: Dict[str, Dict[str, int]] = {}
+        self._merging = False
+
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self._lock:
+                self._refresh()
+            logger.info(f"Loaded resume search index with {len(self._docs)} documents")
+        self._merge()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, blob_name: str) -> bool:
+        return blob_name in self._docs
+
+    def add(self, blob_name: str, text: str) -> None:
+        """Index (or re-index) the text of a resume blob."""
+        tf = dict(Counter(tokenize(text)))
+        with self._lock:
+            self._commit({"op": "add", "blob_name": blob_name, "tf": tf})
+        self._maybe_merge()
+
+    def remove(self, blob_name: str) -> bool:
+        """Drop a resume from the index. Returns True if it was indexed."""
+        with self._lock:
+            return self._commit({"op": "remove", "blob_name": blob_name})
+
+    def search(self, query: Dict[str, float], top_n: int = 20) -> List[Dict[str, Any]]:
+        """
+        Return the top_n blobs for a weighted query
+
+        Args:
+            query: Mapping of term to query weight (see build_job_query)
+            top_n: Maximum number of results
+
+        Returns:
+            List of {"blob_name", "score"} sorted by descending score
+        """
+        if top_n <= 0:
+            return []
+        if self.path:
+            with self._lock:
+                self._refresh()
+            self._maybe_merge()
+        with self._lock:
+            n_docs = len(self._docs)
+            if not n_docs:
+                return []
+            avgdl = (self._total_len / n_docs) or 1.0
+            terms = []
+            for term, weight in query.items():
+                df = self._df.get(term)
+                if df and weight:
+                    idf = math.log1p((n_docs - df + 0.5) / (df + 0.5))
+                    terms.append((term, weight * idf))
+            if not terms:
+                return []
+
+            base_scores = np.zeros(len(self._base_names), dtype=np.float32)
+            base_norm = self.k1 * (1 - self.b + self.b * self._base_lens / avgdl)
+            indptr, indices, data = self._base_tf.indptr, self._base_tf.indices, self._base_tf.data
+            for term, weight in terms:
+                col = self._base_vocab.get(term)
+                if col is None:
+                    continue
+                rows = indices[indptr[col]:indptr[col + 1]]
+                tfs = data[indptr[col]:indptr[col + 1]]
+                base_scores[rows] += weight * tfs * (self.k1 + 1) / (tfs + base_norm[rows])
+            base_scores[~self._base_live] = 0
+
+            delta_names = list(self._delta)
+            delta_scores = np.zeros(len(delta_names), dtype=np.float32)
+            for i, name in enumerate(delta_names):
+                tf = self._delta[name]
+                norm = self.k1 * (1 - self.b + self.b * sum(tf.values()) / avgdl)
+                for term, weight in terms:
+                    count = tf.get(term)
+                    if count:
+                        delta_scores[i] += weight * count * (self.k1 + 1) / (count + norm)
+            names = self._base_names + delta_names
+
+        scores = np.concatenate([base_scores, delta_scores])
+        n = min(top_n, len(names))
+        top = np.argpartition(-scores, n - 1)[:n]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            {"blob_name": names[i], "score": round(float(scores[i]), 4)}
+            for i in top
+            if scores[i] > 0
+        ]
+
+    def _apply(self, blob_name: str, tf: Optional[Dict[str, int]]) -> None:
+        """Replace a document's term frequencies (None removes it); caller holds the lock"""
+        old = self._docs.pop(blob_name, None)
+        if old is not None:
+            self._df.subtract(old.keys())
+            self._total_len -= sum(old.values())
+            row = self._base_rows.get(blob_name)
+            if row is not None:
+                self._base_live[row] = False
+            self._delta.pop(blob_name, None)
+        if tf is not None:
+            self._docs[blob_name] = tf
+            self._df.update(tf.keys())
+            self._total_len += sum(tf.values())
+            self._delta[blob_name] = tf
+
+    def _maybe_merge(self) -> None:
+        with self._lock:
+            if self._merging or len(self._delta) < max(self.merge_min_docs, self.merge_ratio * len(self._base_names)):
+                return
+            self._merging = True
+        threading.Thread(target=self._merge, name="resume-index-merge", daemon=True).start()
+
+    def _merge(self) -> None:
+        """Rebuild the base segment from every live document and empty the delta"""
+        try:
+            with self._lock:
+                self._merging = True
+                snapshot = dict(self._docs)
+                # Terms that no longer occur anywhere
+                self._df = Counter({term: df for term, df in self._df.items() if df > 0})
+
+            names = list(snapshot)
+            vocab: Dict[str, int] = {}
+            rows, cols, tfs = [], [], []
+            doc_lens = np.zeros(len(names), dtype=np.float32)
+            for row, name in enumerate(names):
+                tf = snapshot[name]
+                doc_lens[row] = sum(tf.values())
+                for term, count in tf.items():
+                    rows.append(row)
+                    cols.append(vocab.setdefault(term, len(vocab)))
+                    tfs.append(count)
+            matrix = sparse.csc_matrix(
+                (np.asarray(tfs, dtype=np.float32), (np.asarray(rows, dtype=np.int32), np.asarray(cols, dtype=np.int32))),
+                shape=(len(names), len(vocab)),
+                dtype=np.float32
+            )
+
+            with self._lock:
+                # Changes made while the base was being built stay in the delta
+                live = np.array([self._docs.get(name) is snapshot[name] for name in names], dtype=bool)
+                self._base_tf = matrix
+                self._base_names = names
+                self._base_rows = {name: row for row, name in enumerate(names)}
+                self._base_lens = doc_lens
+                self._base_vocab = vocab
+                self._base_live = live
+                self._delta = {name: tf for name, tf in self._docs.items() if snapshot.get(name) is not tf}
+        finally:
+            with self._lock:
+                self._merging = False
+
+    @contextmanager
+    def _log_lock(self) -> Iterator[None]:
+        """Exclusive lock over the log, held while appending or compacting"""
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refresh(self) -> None:
+        """
+        Apply log records written since the last read (caller holds the lock)
+
+        Every server worker keeps its own index and appends to the same log,
+        so this is how uploads and deletes handled by other workers reach
+        this one. A compaction replaces the file; that is noticed by its new
+        inode and the whole file is reconciled against the documents held.
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if st.st_ino == self._log_inode and st.st_size == self._log_offset:
+            return
+        try:
+            with open(self.path, "rb") as f:
+                st = os.fstat(f.fileno())
+                if st.st_ino != self._log_inode or st.st_size < self._log_offset:
+                    self._reload(f)
+                    self._log_inode = st.st_ino
+                else:
+                    f.seek(self._log_offset)
+                    for record in self._read_records(f):
+                        self._apply_record(record)
+        except Exception as e:
+            logger.error(f"Failed to read resume search index log {self.path}: {e}")
+
+    def _reload(self, f) -> None:
+        """Replace the index contents with those of a whole log file"""
+        self._log_offset = 0
+        self._log_lines = 0
+        docs: Dict[str, Dict[str, int]] = {}
+        for record in self._read_records(f):
+            if record.get("op") == "add":
+                docs[record["blob_name"]] = record["tf"]
+            elif record.get("op") == "remove":
+                docs.pop(record["blob_name"], None)
+        for blob_name in [name for name in self._docs if name not in docs]:
+            self._apply(blob_name, None)
+        for blob_name, tf in docs.items():
+            if self._docs.get(blob_name) != tf:
+                self._apply(blob_name, tf)
+
+    def _read_records(self, f) -> Iterator[Dict[str, Any]]:
+        """Records from the current position up to the last complete line"""
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        self._log_offset += end
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            self._log_lines += 1
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # A torn write from a crash; everything around it is intact
+                continue
+
+    def _apply_record(self, record: Dict[str, Any]) -> bool:
+        if record.get("op") == "add":
+            self._apply(record["blob_name"], record["tf"])
+        elif record.get("op") == "remove":
+            if record["blob_name"] not in self._docs:
+                return False
+            self._apply(record["blob_name"], None)
+        return True
+
+    def _commit(self, record: Dict[str, Any]) -> bool:
+        """
+        Apply an update and append it to the log (caller holds the lock)
+
+        Returns False for the removal of a document that is not indexed,
+        which is neither applied nor logged.
+        """
+        if not self.path:
+            return self._apply_record(record)
+        applied = None
+        try:
+            with self._log_lock():
+                # Catch up first, so updates apply in log order and the
+                # offset lands right after our own record
+                self._refresh()
+                applied = self._apply_record(record)
+                if not applied:
+                    return False
+                with open(self.path, "ab") as f:
+                    if f.tell() > self._log_offset:
+                        # Leftover of a write torn by a crash; end it so it stays one bad line
+                        f.write(b"\n")
+                    f.write(json.dumps(record).encode("utf-8") + b"\n")
+                    self._log_offset = f.tell()
+                    self._log_inode = os.fstat(f.fileno()).st_ino
+                self._log_lines += 1
+                # Superseded records pile up over time; rewrite once they dominate
+                if self._log_lines > 1000 and self._log_lines > 2 * len(self._docs):
+                    self._compact()
+        except Exception as e:
+            logger.warning(f"Failed to persist resume index update: {e}")
+            if applied is None:
+                return self._apply_record(record)
+        return True
+
+    def _compact(self) -> None:
+        """Rewrite the log from the documents held; caller holds the log lock and is caught up"""
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            for blob_name, tf in self._docs.items():
+                f.write(json.dumps({"op": "add", "blob_name": blob_name, "tf": tf}).encode("utf-8") + b"\n")
+            self._log_offset = f.tell()
+            self._log_inode = os.fstat(f.fileno()).st_ino
+        os.replace(tmp_path, self.path)
+        self._log_lines = len(self._docs)
@@ -0,0 +1,334 @@
+import asyncio
+import logging
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Longest a waiter sleeps before checking the shared state again
+_MAX_POLL_SECONDS = 0.25
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS limiter_slots (
+    lease_id TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS limiter_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    tokens REAL,
+    updated_at REAL NOT NULL,
+    paused_until REAL NOT NULL DEFAULT 0
+);
+"""
+
+# KEYS: slots zset, token bucket hash, pause key
+# ARGV: max_concurrency, tokens_per_minute, tokens, lease_id, lease_seconds
+# Returns {granted, wait_seconds}; numbers travel as strings because Lua
+# floats are truncated to integers on the way back
+_REDIS_ACQUIRE = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local max_concurrency = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local tokens = tonumber(ARGV[3])
+
+local pause_ms = redis.call('PTTL', KEYS[3])
+if pause_ms > 0 then
+    return {0, tostring(pause_ms / 1000)}
+end
+
+if max_concurrency > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+    if redis.call('ZCARD', KEYS[1]) >= max_concurrency then
+        return {0, '0'}
+    end
+end
+
+if tpm > 0 then
+    local level = tonumber(redis.call('HGET', KEYS[2], 'tokens') or ARGV[2])
+    local updated = tonumber(redis.call('HGET', KEYS[2], 'updated_at') or now)
+    level = math.min(tpm, level + math.max(0, now - updated) * tpm / 60)
+    local needed = math.min(tokens, tpm)
+    if level < needed then
+        redis.call('HSET', KEYS[2], 'tokens', tostring(level), 'updated_at', tostring(now))
+        return {0, tostring((needed - level) * 60 / tpm)}
+    end
+    redis.call('HSET', KEYS[2], 'tokens', tostring(level - tokens), 'updated_at', tostring(now))
+end
+
+if max_concurrency > 0 then
+    redis.call('ZADD', KEYS[1], now + tonumber(ARGV[5]), ARGV[4])
+end
+return {1, '0'}
+"""
+
+# KEYS: pause key; ARGV: pause milliseconds. Only ever extends a pause.
+_REDIS_PAUSE = """
+if redis.call('PTTL', KEYS[1]) < tonumber(ARGV[1]) then
+    redis.call('SET', KEYS[1], '1', 'PX', ARGV[1])
+end
+return 1
+"""
+
+
+class SqliteLimiterBackend:
+    """
+    Shared limiter state in a local SQLite file
+
+    Every worker process on the host opens the same file; each decision is
+    one short BEGIN IMMEDIATE transaction, so admission is atomic across
+    processes. Slots are leases that expire, so a crashed worker cannot
+    hold one forever.
+    """
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SQLITE_SCHEMA)
+
+    def _transaction(self, fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn, time.time())
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def try_acquire(self, max_concurrency: int, tokens_per_minute: int, tokens: float, lease_id: str, lease_seconds: float) -> Tuple[bool, float]:
+        def acquire(conn: sqlite3.Connection, now: float) -> Tuple[bool, float]:
+            state = conn.execute("SELECT tokens, updated_at, paused_until FROM limiter_state WHERE id = 1").fetchone()
+            if state is None:
+                conn.execute("INSERT INTO limiter_state (id, tokens, updated_at, paused_until) VALUES (1, NULL, ?, 0)", (now,))
+                state = (None, now, 0.0)
+            level, updated_at, paused_until = state
+            if paused_until > now:
+                return False, paused_until - now
+
+            if max_concurrency > 0:
+                conn.execute("DELETE FROM limiter_slots WHERE expires_at <= ?", (now,))
+                (active,) = conn.execute("SELECT COUNT(*) FROM limiter_slots").fetchone()
+                if active >= max_concurrency:
+                    return False, 0.0
+
+            if tokens_per_minute > 0:
+                level = tokens_per_minute if level is None else level
+                level = min(tokens_per_minute, level + max(0.0, now - updated_at) * tokens_per_minute / 60.0)
+                needed = min(tokens, tokens_per_minute)
+                if level < needed:
+                    conn.execute("UPDATE limiter_state SET tokens = ?, updated_at = ? WHERE id = 1", (level, now))
+                    return False, (needed - level) * 60.0 / tokens_per_minute
+                conn.execute("UPDATE limiter_state SET tokens = ?, updated_at = ? WHERE id = 1", (level - tokens, now))
+
+            if max_concurrency > 0:
+                conn.execute("INSERT INTO limiter_slots (lease_id, expires_at) VALUES (?, ?)", (lease_id, now + lease_seconds))
+            return True, 0.0
+
+        return self._transaction(acquire)
+
+    def release(self, lease_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM limiter_slots WHERE lease_id = ?", (lease_id,))
+
+    def adjust_tokens(self, delta: float) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE limiter_state SET tokens = tokens + ? WHERE id = 1 AND tokens IS NOT NULL", (delta,))
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE limiter_state SET paused_until = MAX(paused_until, ?) WHERE id = 1",
+                (time.time() + seconds,)
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            (active,) = self._conn.execute("SELECT COUNT(*) FROM limiter_slots WHERE expires_at > ?", (now,)).fetchone()
+            state = self._conn.execute("SELECT tokens, paused_until FROM limiter_state WHERE id = 1").fetchone()
+        tokens, paused_until = state if state else (None, 0.0)
+        return {
+            "in_flight": active,
+            "tokens_available": None if tokens is None else round(tokens, 1),
+            "paused_for_seconds": round(max(0.0, paused_until - now), 3)
+        }
+
+
+class RedisLimiterBackend:
+    """
+    Shared limiter state in Redis (or any server speaking its protocol)
+
+    Admission runs as one Lua script using the server clock, so the limits
+    hold across workers on every host pointing at the same key prefix.
+    """
+
+    def __init__(self, url: str, key_prefix: str):
+        import redis.asyncio as redis_asyncio
+
+        self._redis = redis_asyncio.from_url(url)
+        self._slots_key = f"{key_prefix}:slots"
+        self._bucket_key = f"{key_prefix}:tokens"
+        self._pause_key = f"{key_prefix}:pause"
+        self._acquire_script = self._redis.register_script(_REDIS_ACQUIRE)
+        self._pause_script = self._redis.register_script(_REDIS_PAUSE)
+
+    async def try_acquire(self, max_concurrency: int, tokens_per_minute: int, tokens: float, lease_id: str, lease_seconds: float) -> Tuple[bool, float]:
+        granted, wait = await self._acquire_script(
+            keys=[self._slots_key, self._bucket_key, self._pause_key],
+            args=[max_concurrency, tokens_per_minute, tokens, lease_id, lease_seconds]
+        )
+        return bool(int(granted)), float(wait)
+
+    async def release(self, lease_id: str) -> None:
+        await self._redis.zrem(self._slots_key, lease_id)
+
+    async def adjust_tokens(self, delta: float) -> None:
+        if await self._redis.hexists(self._bucket_key, "tokens"):
+            await self._redis.hincrbyfloat(self._bucket_key, "tokens", delta)
+
+    async def pause(self, seconds: float) -> None:
+        await self._pause_script(keys=[self._pause_key], args=[int(seconds * 1000)])
+
+    async def stats(self) -> Dict[str, Any]:
+        active = await self._redis.zcount(self._slots_key, time.time(), "+inf")
+        tokens = await self._redis.hget(self._bucket_key, "tokens")
+        pause_ms = await self._redis.pttl(self._pause_key)
+        return {
+            "in_flight": active,
+            "tokens_available": None if tokens is None else round(float(tokens), 1),
+            "paused_for_seconds": round(max(0, pause_ms) / 1000.0, 3)
+        }
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+class SharedRateLimiter:
+    """
+    Concurrency and token-rate limits shared by every worker process
+
+    Sits behind each process's AdaptiveConcurrencyLimiter: a call first
+    gets a local slot, then a global one. max_concurrency caps upstream
+    calls in flight across all workers; tokens_per_minute is a token bucket
+    charged with an estimate before each call and corrected with the
+    reported usage afterwards. A Retry-After seen by any worker pauses all
+    of them. Either limit can be 0 to disable it.
+
+    Usage:
+        lease = await shared.acquire(estimated_tokens)
+        try:
+            ...
+        finally:
+            await shared.release(lease)
+    """
+
+    def __init__(self, backend, max_concurrency: int, tokens_per_minute: int, lease_seconds: float):
+        self.backend = backend
+        self.max_concurrency = max(0, max_concurrency)
+        self.tokens_per_minute = max(0, tokens_per_minute)
+        self.lease_seconds = lease_seconds
+        self.waiting = 0
+
+    async def _call(self, method: str, *args):
+        # SQLite calls block briefly on the file lock; Redis calls are native async
+        fn = getattr(self.backend, method)
+        if asyncio.iscoroutinefunction(fn):
+            return await fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    async def acquire(self, tokens: float) -> str:
+        """Wait for a global slot and token budget; returns the lease id"""
+        lease_id = uuid.uuid4().hex
+        self.waiting += 1
+        try:
+            while True:
+                granted, wait = await self._call(
+                    "try_acquire", self.max_concurrency, self.tokens_per_minute, tokens, lease_id, self.lease_seconds
+                )
+                if granted:
+                    return lease_id
+                # jitter spreads out workers polling the same state
+                await asyncio.sleep(min(_MAX_POLL_SECONDS, max(wait, 0.01)) * random.uniform(0.8, 1.2))
+        finally:
+            self.waiting -= 1
+
+    async def try_acquire(self, tokens: float) -> Optional[str]:
+        """Take a global slot and token budget only if available right now; returns the lease id or None"""
+        lease_id = uuid.uuid4().hex
+        try:
+            granted, _ = await self._call(
+                "try_acquire", self.max_concurrency, self.tokens_per_minute, tokens, lease_id, self.lease_seconds
+            )
+        except Exception as e:
+            logger.warning(f"Failed to check shared AI limiter: {str(e)}")
+            return None
+        return lease_id if granted else None
+
+    async def release(self, lease_id: str) -> None:
+        try:
+            await self._call("release", lease_id)
+        except Exception as e:
+            # The lease expires on its own; never fail a finished call over it
+            logger.warning(f"Failed to release shared AI limiter slot: {str(e)}")
+
+    async def record_usage(self, estimated_tokens: float, actual_tokens: Optional[int]) -> None:
+        """Correct the token bucket once the real usage of a call is known"""
+        if not self.tokens_per_minute or actual_tokens is None:
+            return
+        try:
+            await self._call("adjust_tokens", estimated_tokens - actual_tokens)
+        except Exception as e:
+            logger.warning(f"Failed to record AI token usage: {str(e)}")
+
+    async def pause(self, seconds: float) -> None:
+        try:
+            await self._call("pause", seconds)
+        except Exception as e:
+            logger.warning(f"Failed to share AI rate limit pause: {str(e)}")
+
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "redis" if isinstance(self.backend, RedisLimiterBackend) else "sqlite",
+            "max_concurrency": self.max_concurrency,
+            "tokens_per_minute": self.tokens_per_minute,
+            "waiting_in_this_process": self.waiting,
+            **await self._call("stats")
+        }
+
+    async def close(self) -> None:
+        if isinstance(self.backend, RedisLimiterBackend):
+            await self.backend.close()
+
+
+def create_shared_limiter(settings) -> Optional[SharedRateLimiter]:
+    """
+    Build the shared limiter from settings
+
+    Redis is used when AI_SHARED_LIMITER_REDIS_URL is set (limits hold across
+    hosts); otherwise a SQLite file shared by the workers of one host. Returns
+    None when no shared limit is configured.
+    """
+    if settings.ai_shared_max_concurrency <= 0 and settings.ai_shared_tokens_per_minute <= 0:
+        return None
+    if settings.ai_shared_limiter_redis_url:
+        backend = RedisLimiterBackend(settings.ai_shared_limiter_redis_url, settings.ai_shared_limiter_key)
+    else:
+        backend = SqliteLimiterBackend(settings.ai_shared_limiter_path)
+    return SharedRateLimiter(
+        backend,
+        max_concurrency=settings.ai_shared_max_concurrency,
+        tokens_per_minute=settings.ai_shared_tokens_per_minute,
+        # a slot is held for one attempt, which the request timeout bounds
+        lease_seconds=settings.ai_request_timeout_seconds + 30.0
+    )
@@ -0,0 +1,163 @@
+import json
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Set
+
+# Common aliases for skills that appear in JOB_TEMPLATES and typical job posts.
+# Keys and values are matched case-insensitively.
+SKILL_SYNONYMS: Dict[str, List[str]] = {
+    "javascript": ["js", "ecmascript", "es6"],
+    "typescript": ["ts"],
+    "node.js": ["nodejs", "node js", "node"],
+    "react": ["react.js", "reactjs"],
+    "python": ["py", "python3"],
+    "golang": ["go"],
+    "kubernetes": ["k8s"],
+    "aws": ["amazon web services"],
+    "gcp": ["google cloud", "google cloud platform"],
+    "azure": ["microsoft azure"],
+    "machine learning": ["ml"],
+    "deep learning": ["dl"],
+    "artificial intelligence": ["ai"],
+    "natural language processing": ["nlp"],
+    "postgresql": ["postgres"],
+    "mongodb": ["mongo"],
+    "sql": ["mysql", "postgresql", "t-sql", "pl/sql"],
+    "statistics": ["statistical analysis", "statistical modeling"],
+    "pandas": ["dataframes"],
+    "git": ["github", "gitlab"],
+    "agile": ["scrum", "kanban"],
+    "a/b testing": ["ab testing", "split testing"],
+    "user research": ["ux research", "user interviews"],
+    "data analysis": ["data analytics", "analytics"],
+    "stakeholder management": ["stakeholder engagement"],
+    "recruitment": ["recruiting", "talent acquisition", "hiring"],
+    "hris": ["workday", "successfactors", "bamboohr"],
+    "employee relations": ["labor relations"],
+    "performance management": ["performance reviews"],
+}
+
+_EXPERIENCE_RE = re.compile(r"(\d{1,2})\s*\+?\s*(?:years?|yrs?)", re.IGNORECASE)
+
+
+class SkillMatcher:
+    """
+    Compiled multi-pattern matcher for a job's required and preferred skills
+
+    All skill names and their synonyms are folded into a single Aho-Corasick
+    automaton, so scanning a resume is one linear pass regardless of how many
+    skills the job lists.
+    """
+
+    def __init__(self, required_skills: Iterable[str], preferred_skills: Iterable[str], synonyms: Dict[str, List[str]] = None):
+        synonyms = SKILL_SYNONYMS if synonyms is None else synonyms
+        self.required_skills = [s for s in required_skills if s and s.strip()]
+        self.preferred_skills = [s for s in (preferred_skills or []) if s and s.strip()]
+
+        # goto transitions, failure links and per-state outputs (term -> skill names)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[tuple]] = [[]]
+
+        for skill in self.required_skills + self.preferred_skills:
+            folded = skill.strip().casefold()
+            for term in [folded] + [t.casefold() for t in synonyms.get(folded, [])]:
+                self._add_term(term, skill)
+        self._build_failure_links()
+
+    def _add_term(self, term: str, skill: str) -> None:
+        state = 0
+        for ch in term:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(term), skill))
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_skills(self, text: str) -> Set[str]:
+        """Return the canonical skill names mentioned in text (whole-word matches only)."""
+        text = text.casefold()
+        found: Set[str] = set()
+        state = 0
+        length = len(text)
+        for i, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for term_len, skill in self._out[state]:
+                if skill in found:
+                    continue
+                start = i - term_len + 1
+                before_ok = start == 0 or not text[start - 1].isalnum()
+                after_ok = i + 1 == length or not text[i + 1].isalnum()
+                if before_ok and after_ok:
+                    found.add(skill)
+        return found
+
+    def score(self, text: str, experience_years: int = None) -> Dict[str, Any]:
+        """
+        Cheap lexical score for a resume
+
+        Returns:
+            Dict with a 0-100 "score", the skills and experience sub-scores
+            and the matched required/preferred skills
+        """
+        found = self.find_skills(text)
+        matched_required = [s for s in self.required_skills if s in found]
+        matched_preferred = [s for s in self.preferred_skills if s in found]
+
+        required_cov = len(matched_required) / len(self.required_skills) if self.required_skills else 1.0
+        preferred_cov = len(matched_preferred) / len(self.preferred_skills) if self.preferred_skills else 0.0
+
+        years = [int(m) for m in _EXPERIENCE_RE.findall(text)]
+        years_found = max(years) if years else 0
+        if experience_years:
+            experience = min(1.0, years_found / experience_years)
+        else:
+            experience = 1.0 if years_found else 0.5
+
+        skills_score = 100.0 * (0.75 * required_cov + 0.25 * preferred_cov)
+        experience_score = 100.0 * experience
+        return {
+            "score": round(0.8 * skills_score + 0.2 * experience_score, 2),
+            "skills_match": round(skills_score, 2),
+            "experience": round(experience_score, 2),
+            "years_found": years_found,
+            "matched_required": matched_required,
+            "matched_preferred": matched_preferred,
+        }
+
+
+@lru_cache(maxsize=128)
+def _cached_matcher(job_key: str) -> SkillMatcher:
+    job = json.loads(job_key)
+    return SkillMatcher(job.get("required_skills") or [], job.get("preferred_skills") or [])
+
+
+def get_skill_matcher(job_requirements: Dict[str, Any]) -> SkillMatcher:
+    """Return the compiled matcher for a job requirement, building it at most once."""
+    job_key = json.dumps(
+        {
+            "required_skills": job_requirements.get("required_skills") or [],
+            "preferred_skills": job_requirements.get("preferred_skills") or [],
+        },
+        sort_keys=True,
+    )
+    return _cached_matcher(job_key)
@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 """
 Startup script for PeopleNexus AI Resume Services
+
+    python start.py                              # development: one process with --reload
+    python start.py --production [--workers N]   # production: N worker processes
 """
 
+import argparse
 import os
 import sys
 import subprocess
@@ -83,8 +87,46 @@ def start_server():
     except Exception as e:
         print(f"❌ Error starting server: {e}")
 
+def start_production_server(workers=None):
+    """Start the FastAPI server with several worker processes and no reloader"""
+    from config import settings
+
+    workers = workers or settings.server_workers
+    print(f"\n🚀 Starting PeopleNexus AI Resume Services with {workers} workers...")
+    print(f"📍 Server will be available at: http://{settings.host}:{settings.port}")
+    if workers > 1:
+        if settings.ai_shared_max_concurrency <= 0 and settings.ai_shared_tokens_per_minute <= 0:
+            print("⚠️  Warning: AI_MAX_CONCURRENCY applies per worker; upstream concurrency can reach "
+                  f"{workers} x AI_CONCURRENCY_CEILING. Set AI_SHARED_MAX_CONCURRENCY and/or "
+                  "AI_SHARED_TOKENS_PER_MINUTE to cap all workers together.")
+        elif settings.ai_shared_limiter_redis_url:
+            print("✅ AI limits shared through Redis")
+        else:
+            print(f"✅ AI limits shared through {settings.ai_shared_limiter_path} (this host only)")
+        if not settings.analysis_cache_dir:
+            print("ℹ️  ANALYSIS_CACHE_DIR is not set: each worker caches AI analyses in its own memory only.")
+    print("🔴 Press Ctrl+C to stop the server\n")
+
+    try:
+        subprocess.run([
+            sys.executable, "-m", "uvicorn",
+            "main:app",
+            "--host", settings.host,
+            "--port", str(settings.port),
+            "--workers", str(workers)
+        ])
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped")
+    except Exception as e:
+        print(f"❌ Error starting server: {e}")
+
 def main():
     """Main startup function"""
+    parser = argparse.ArgumentParser(description="Start PeopleNexus AI Resume Services")
+    parser.add_argument("--production", action="store_true", help="Run several worker processes without --reload")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes in production mode (default: SERVER_WORKERS)")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("🎯 PeopleNexus AI Resume Services")
     print("=" * 60)
@@ -106,7 +148,10 @@ def main():
         sys.exit(1)
     
     print("\n✅ All checks passed!")
-    start_server()
+    if args.production:
+        start_production_server(args.workers)
+    else:
+        start_server()
 
 if __name__ == "__main__":
     main()
@@ -1,15 +1,111 @@
 import os
 import uuid
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-from azure.storage.blob import BlobServiceClient, BlobClient, ContainerClient
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+from typing import Optional, Dict, Any, List, Tuple
+from urllib.parse import quote, unquote
 from azure.core.exceptions import ResourceNotFoundError, ClientAuthenticationError
 from config import settings
 import logging
 
+from resume_metadata_index import decode_cursor, encode_cursor
+
 logger = logging.getLogger(__name__)
 
-class AzureBlobStorageClient:
+RESUME_PREFIX = "resumes/"
+
+
+def resume_date_prefixes(start: date, end: date, root: str = RESUME_PREFIX) -> List[str]:
+    """
+    Blob name prefixes covering the resumes/YYYY/MM/DD/ partitions from start
+    to end (inclusive), newest first
+
+    Whole years and whole months collapse into a single prefix, so a listing
+    only touches the partitions inside the range.
+    """
+    prefixes = []
+    day = end
+    while day >= start:
+        year_start, month_start = date(day.year, 1, 1), date(day.year, day.month, 1)
+        if day == date(day.year, 12, 31) and year_start >= start:
+            prefixes.append(f"{root}{day.year:04d}/")
+            day = year_start - timedelta(days=1)
+        elif day.day == monthrange(day.year, day.month)[1] and month_start >= start:
+            prefixes.append(f"{root}{day.year:04d}/{day.month:02d}/")
+            day = month_start - timedelta(days=1)
+        else:
+            prefixes.append(f"{root}{day:%Y/%m/%d}/")
+            day -= timedelta(days=1)
+    return prefixes
+
+
+def blob_metadata_record(blob) -> Dict[str, Any]:
+    """Resume metadata index record for a listed blob (listed with metadata)"""
+    metadata = blob.metadata or {}
+    uploaded = blob.creation_time or blob.last_modified
+    return {
+        "blob_name": blob.name,
+        "original_filename": unquote(metadata["original_filename"]) if metadata.get("original_filename") else blob.name.split("/")[-1],
+        "content_type": blob.content_settings.content_type if blob.content_settings else None,
+        "size": blob.size,
+        # Stored in local time like upload results, so both sort together
+        "uploaded_at": uploaded.astimezone().replace(tzinfo=None).isoformat() if uploaded else "",
+        "content_hash": metadata.get("content_sha256")
+    }
+
+
+def generate_resume_sas_token(
+    account_name: str,
+    account_key: str,
+    container_name: str,
+    blob_name: str,
+    expires_in_hours: int = 24
+) -> Optional[str]:
+    """
+    Generate a read-only Shared Access Signature token for temporary access
+
+    Computed locally from the account key; no request is made.
+
+    Args:
+        account_name: Storage account name
+        account_key: Storage account key
+        container_name: Container holding the blob
+        blob_name: Name of the blob
+        expires_in_hours: Hours until token expires
+
+    Returns:
+        SAS token string or None if failed
+    """
+    try:
+        from azure.storage.blob import generate_blob_sas, BlobSasPermissions
+
+        return generate_blob_sas(
+            account_name=account_name,
+            container_name=container_name,
+            blob_name=blob_name,
+            account_key=account_key,
+            permission=BlobSasPermissions(read=True),
+            expiry=datetime.utcnow() + timedelta(hours=expires_in_hours)
+        )
+
+    except Exception as e:
+        logger.error(f"Failed to generate SAS token: {e}")
+        return None
+
+
+class AsyncAzureBlobStorageClient:
+    """
+    Azure Blob Storage client for resume files
+
+    Uses the azure.storage.blob.aio SDK over a single shared aiohttp session,
+    so every request reuses pooled keep-alive connections and a slow blob
+    operation never blocks the event loop. The SDK client is created on first
+    use inside the running loop.
+
+    Works against Azurite (or any compatible stand-in) by pointing
+    AZURE_STORAGE_CONNECTION_STRING at its BlobEndpoint.
+    """
+
     def __init__(self):
         self.connection_string = settings.azure_storage_connection_string
         self.container_name = settings.azure_storage_container_name
@@ -19,24 +115,53 @@ class AzureBlobStorageClient:
         if not self.connection_string and (not self.account_name or not self.account_key):
             raise ValueError("Either connection string or account name/key must be provided")
         
-        try:
+        self._session = None
+        self.blob_service_client = None
+        self.container_client = None
+    
+    def _ensure_client(self):
+        if self.container_client is None:
+            import aiohttp
+            from azure.core.pipeline.transport import AioHttpTransport
+            from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
+            
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=settings.storage_max_connections,
+                    keepalive_timeout=settings.storage_keepalive_seconds
+                )
+            )
+            transport = AioHttpTransport(session=self._session, session_owner=False)
             if self.connection_string:
-                self.blob_service_client = BlobServiceClient.from_connection_string(self.connection_string)
+                self.blob_service_client = AsyncBlobServiceClient.from_connection_string(
+                    self.connection_string,
+                    transport=transport
+                )
             else:
-                # Use account name and key
-                account_url = f"https://{self.account_name}.blob.core.windows.net"
-                self.blob_service_client = BlobServiceClient(
-                    account_url=account_url,
-                    credential=self.account_key
+                self.blob_service_client = AsyncBlobServiceClient(
+                    account_url=f"https://{self.account_name}.blob.core.windows.net",
+                    credential=self.account_key,
+                    transport=transport
                 )
-            
             self.container_client = self.blob_service_client.get_container_client(self.container_name)
-            
-        except Exception as e:
-            logger.error(f"Failed to initialize Azure Blob Storage client: {e}")
-            raise
+        return self.container_client
+    
+    async def close(self) -> None:
+        """Close the SDK client and the shared HTTP session"""
+        if self.blob_service_client is not None:
+            await self.blob_service_client.close()
+        if self._session is not None:
+            await self._session.close()
+        self._session = None
+        self.blob_service_client = None
+        self.container_client = None
+    
+    def new_resume_blob_name(self, original_filename: str) -> str:
+        """Generate a unique date-partitioned blob name for a new resume"""
+        file_extension = os.path.splitext(original_filename or "")[1].lower()
+        return f"resumes/{datetime.now().strftime('%Y/%m/%d')}/{uuid.uuid4()}{file_extension}"
     
-    def upload_resume(self, file_content: bytes, original_filename: str, content_type: str = None) -> Dict[str, Any]:
+    async def upload_resume(self, file_content: bytes, original_filename: str, content_type: str = None, metadata: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """
         Upload a resume file to Azure Blob Storage
         
@@ -44,62 +169,99 @@ class AzureBlobStorageClient:
             file_content: The file content as bytes
             original_filename: Original filename
             content_type: MIME type of the file
+            metadata: Optional blob metadata (e.g. content hash)
             
         Returns:
             Dict containing blob URL, blob name, and metadata
         """
+        from azure.storage.blob import ContentSettings
+        
         try:
-            # Generate unique blob name
-            file_extension = os.path.splitext(original_filename)[1].lower()
-            blob_name = f"resumes/{datetime.now().strftime('%Y/%m/%d')}/{uuid.uuid4()}{file_extension}"
-            
-            # Get blob client
-            blob_client = self.container_client.get_blob_client(blob_name)
-            
-            # Set content type if provided
-            content_settings = None
-            if content_type:
-                from azure.storage.blob import ContentSettings
-                content_settings = ContentSettings(content_type=content_type)
-            
-            # Upload the file
-            blob_client.upload_blob(
+            blob_name = self.new_resume_blob_name(original_filename)
+            blob_client = self._ensure_client().get_blob_client(blob_name)
+            await blob_client.upload_blob(
                 file_content,
                 overwrite=True,
-                content_settings=content_settings
+                content_settings=ContentSettings(content_type=content_type) if content_type else None,
+                metadata=self._resume_metadata(original_filename, metadata)
             )
-            
-            # Generate SAS token for temporary access (optional)
-            sas_token = self._generate_sas_token(blob_name)
-            
-            return {
-                "blob_url": blob_client.url,
-                "blob_name": blob_name,
-                "original_filename": original_filename,
-                "content_type": content_type,
-                "size": len(file_content),
-                "uploaded_at": datetime.now().isoformat(),
-                "sas_url": f"{blob_client.url}?{sas_token}" if sas_token else None
-            }
+            return self._upload_result(blob_client, blob_name, original_filename, content_type, len(file_content))
             
         except Exception as e:
             logger.error(f"Failed to upload resume {original_filename}: {e}")
             raise
     
-    def download_resume(self, blob_name: str) -> Optional[bytes]:
+    async def stage_block(self, blob_name: str, block_id: str, data: bytes) -> None:
+        """
+        Stage one uncommitted block of a block blob
+        
+        Args:
+            blob_name: Name of the blob being uploaded
+            block_id: Block id; all ids of a blob must have the same length
+            data: Block content
+        """
+        await self._ensure_client().get_blob_client(blob_name).stage_block(block_id, data)
+    
+    async def commit_blocks(self, blob_name: str, block_ids: list, original_filename: str, content_type: str = None, size: int = 0, metadata: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """
-        Download a resume file from Azure Blob Storage
+        Commit staged blocks as the final resume blob
         
         Args:
-            blob_name: Name of the blob to download
+            blob_name: Name of the blob being uploaded
+            block_ids: Staged block ids in file order
+            original_filename: Original filename
+            content_type: MIME type of the file
+            size: Total size in bytes
+            metadata: Optional blob metadata (e.g. content hash)
             
         Returns:
-            File content as bytes or None if not found
+            Dict containing blob URL, blob name, and metadata (same shape as upload_resume)
         """
+        from azure.storage.blob import BlobBlock, ContentSettings
+        
         try:
-            blob_client = self.container_client.get_blob_client(blob_name)
-            download_stream = blob_client.download_blob()
-            return download_stream.readall()
+            blob_client = self._ensure_client().get_blob_client(blob_name)
+            await blob_client.commit_block_list(
+                [BlobBlock(block_id=block_id) for block_id in block_ids],
+                content_settings=ContentSettings(content_type=content_type) if content_type else None,
+                metadata=self._resume_metadata(original_filename, metadata)
+            )
+            return self._upload_result(blob_client, blob_name, original_filename, content_type, size)
+            
+        except Exception as e:
+            logger.error(f"Failed to commit resume {original_filename}: {e}")
+            raise
+    
+    @staticmethod
+    def _resume_metadata(original_filename: str, metadata: Optional[Dict[str, str]]) -> Dict[str, str]:
+        # Blob metadata must be ASCII, so the filename is percent-encoded
+        return {**(metadata or {}), "original_filename": quote(original_filename or "")}
+    
+    def _upload_result(self, blob_client, blob_name: str, original_filename: str, content_type: Optional[str], size: int) -> Dict[str, Any]:
+        sas_token = self._generate_sas_token(blob_name)
+        
+        return {
+            "blob_url": blob_client.url,
+            "blob_name": blob_name,
+            "original_filename": original_filename,
+            "content_type": content_type,
+            "size": size,
+            "uploaded_at": datetime.now().isoformat(),
+            "sas_url": f"{blob_client.url}?{sas_token}" if sas_token else None
+        }
+    
+    def stored_resume_result(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Upload result (same shape as upload_resume) for an already stored resume"""
+        blob_client = self._ensure_client().get_blob_client(record["blob_name"])
+        result = self._upload_result(blob_client, record["blob_name"], record["original_filename"], record["content_type"], record["size"])
+        result["uploaded_at"] = record["uploaded_at"]
+        return result
+    
+    async def download_resume(self, blob_name: str) -> Optional[bytes]:
+        """Download a resume file, or None if not found"""
+        try:
+            download_stream = await self._ensure_client().get_blob_client(blob_name).download_blob()
+            return await download_stream.readall()
             
         except ResourceNotFoundError:
             logger.warning(f"Resume blob not found: {blob_name}")
@@ -108,19 +270,45 @@ class AzureBlobStorageClient:
             logger.error(f"Failed to download resume {blob_name}: {e}")
             raise
     
-    def delete_resume(self, blob_name: str) -> bool:
-        """
-        Delete a resume file from Azure Blob Storage
+    async def get_resume_properties(self, blob_name: str) -> Optional[Dict[str, Any]]:
+        """Get content type, size and metadata of a stored resume, or None if not found"""
+        try:
+            properties = await self._ensure_client().get_blob_client(blob_name).get_blob_properties()
+            return {
+                "content_type": properties.content_settings.content_type if properties.content_settings else None,
+                "size": properties.size,
+                "metadata": dict(properties.metadata or {})
+            }
+            
+        except ResourceNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Failed to get properties for resume {blob_name}: {e}")
+            raise
+    
+    async def upload_text(self, blob_name: str, text: str) -> None:
+        """Store a UTF-8 text blob (used for cached extracted resume text)"""
+        from azure.storage.blob import ContentSettings
         
-        Args:
-            blob_name: Name of the blob to delete
+        await self._ensure_client().get_blob_client(blob_name).upload_blob(
+            text.encode("utf-8"),
+            overwrite=True,
+            content_settings=ContentSettings(content_type="text/plain; charset=utf-8")
+        )
+    
+    async def download_text(self, blob_name: str) -> Optional[str]:
+        """Read a UTF-8 text blob, or None if not found"""
+        try:
+            download_stream = await self._ensure_client().get_blob_client(blob_name).download_blob()
+            return (await download_stream.readall()).decode("utf-8")
             
-        Returns:
-            True if deleted successfully, False otherwise
-        """
+        except ResourceNotFoundError:
+            return None
+    
+    async def delete_resume(self, blob_name: str) -> bool:
+        """Delete a resume file. Returns True if deleted, False otherwise"""
         try:
-            blob_client = self.container_client.get_blob_client(blob_name)
-            blob_client.delete_blob()
+            await self._ensure_client().get_blob_client(blob_name).delete_blob()
             logger.info(f"Successfully deleted resume: {blob_name}")
             return True
             
@@ -132,18 +320,9 @@ class AzureBlobStorageClient:
             return False
     
     def get_resume_url(self, blob_name: str, expires_in_hours: int = 24) -> Optional[str]:
-        """
-        Generate a temporary URL for accessing a resume
-        
-        Args:
-            blob_name: Name of the blob
-            expires_in_hours: Hours until URL expires
-            
-        Returns:
-            Temporary URL or None if failed
-        """
+        """Generate a temporary URL for accessing a resume (computed locally)"""
         try:
-            blob_client = self.container_client.get_blob_client(blob_name)
+            blob_client = self._ensure_client().get_blob_client(blob_name)
             sas_token = self._generate_sas_token(blob_name, expires_in_hours)
             return f"{blob_client.url}?{sas_token}" if sas_token else None
             
@@ -152,40 +331,63 @@ class AzureBlobStorageClient:
             return None
     
     def _generate_sas_token(self, blob_name: str, expires_in_hours: int = 24) -> Optional[str]:
+        return generate_resume_sas_token(self.account_name, self.account_key, self.container_name, blob_name, expires_in_hours)
+    
+    async def list_resumes_page(
+        self,
+        page_size: int = 100,
+        continuation_token: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
         """
-        Generate a Shared Access Signature token for temporary access
-        
+        One page of stored resumes, using storage continuation tokens
+
+        Blobs come back in name order, so the oldest day comes first and
+        a day's resumes are in random (uuid) order. With a date range only
+        the matching resumes/YYYY/MM/DD/ partitions are listed instead of
+        the whole container. They are taken newest first, but a whole month
+        or year collapses into one prefix, listed in name order.
+
         Args:
-            blob_name: Name of the blob
-            expires_in_hours: Hours until token expires
-            
+            page_size: Maximum number of resumes to return
+            continuation_token: Token returned with the previous page
+            start_date: First upload date to include
+            end_date: Last upload date to include
+
         Returns:
-            SAS token string or None if failed
+            (metadata index records, next continuation token or None)
         """
-        try:
-            from azure.storage.blob import generate_blob_sas, BlobSasPermissions
-            from datetime import datetime, timedelta
-            
-            # Set expiration time
-            expiry = datetime.utcnow() + timedelta(hours=expires_in_hours)
-            
-            # Generate SAS token
-            sas_token = generate_blob_sas(
-                account_name=self.account_name,
-                container_name=self.container_name,
-                blob_name=blob_name,
-                account_key=self.account_key,
-                permission=BlobSasPermissions(read=True),
-                expiry=expiry
+        if start_date or end_date:
+            prefixes = resume_date_prefixes(
+                start_date or date(2000, 1, 1),
+                end_date or date.today() + timedelta(days=1)
             )
-            
-            return sas_token
-            
-        except Exception as e:
-            logger.error(f"Failed to generate SAS token: {e}")
-            return None
-    
-    def list_resumes(self, prefix: str = "resumes/") -> list:
+        else:
+            prefixes = [RESUME_PREFIX]
+
+        position = decode_cursor(continuation_token) if continuation_token else {"p": 0, "t": None}
+        prefix_index, token = int(position.get("p", 0)), position.get("t")
+        records: List[Dict[str, Any]] = []
+        container_client = self._ensure_client()
+
+        while prefix_index < len(prefixes) and len(records) < page_size:
+            pages = container_client.list_blobs(
+                name_starts_with=prefixes[prefix_index],
+                include=["metadata"],
+                results_per_page=page_size - len(records)
+            ).by_page(continuation_token=token)
+            page = await pages.__anext__()
+            async for blob in page:
+                records.append(blob_metadata_record(blob))
+            token = pages.continuation_token
+            if not token:
+                prefix_index += 1
+
+        next_token = encode_cursor({"p": prefix_index, "t": token}) if prefix_index < len(prefixes) else None
+        return records, next_token
+
+    async def list_resumes(self, prefix: str = "resumes/") -> list:
         """
         List all resumes in the container
         
@@ -197,7 +399,7 @@ class AzureBlobStorageClient:
         """
         try:
             blobs = []
-            for blob in self.container_client.list_blobs(name_starts_with=prefix):
+            async for blob in self._ensure_client().list_blobs(name_starts_with=prefix):
                 blobs.append({
                     "name": blob.name,
                     "size": blob.size,
@@ -210,19 +412,10 @@ class AzureBlobStorageClient:
             logger.error(f"Failed to list resumes: {e}")
             return []
     
-    def health_check(self) -> Dict[str, Any]:
-        """
-        Check the health of the Azure Blob Storage connection
-        
-        Returns:
-            Health status information
-        """
+    async def health_check(self) -> Dict[str, Any]:
+        """Check the health of the Azure Blob Storage connection"""
         try:
-            # Try to list containers to test connection
-            containers = list(self.blob_service_client.list_containers())
-            
-            # Check if our container exists
-            container_exists = self.container_client.exists()
+            container_exists = await self._ensure_client().exists()
             
             return {
                 "status": "healthy",
@@ -0,0 +1,376 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# JSON formats shown to the model; the pydantic models below are the
+# authoritative schema these describe
+RANKING_JSON_FORMAT = """{
+    "overall_score": <float between 0-100>,
+    "breakdown": {
+        "skills_match": <float between 0-100>,
+        "experience": <float between 0-100>,
+        "education": <float between 0-100>,
+        "overall_fit": <float between 0-100>
+    },
+    "reasoning": "<detailed explanation of the ranking>"
+}"""
+
+QUICK_RANKING_JSON_FORMAT = """{
+    "overall_score": <float between 0-100>,
+    "breakdown": {
+        "skills_match": <float between 0-100>,
+        "experience": <float between 0-100>,
+        "education": <float between 0-100>,
+        "overall_fit": <float between 0-100>
+    },
+    "reasoning": "<one short sentence>"
+}"""
+
+BATCH_RANKING_JSON_FORMAT = """{
+    "results": [
+        {
+            "resume_id": <integer resume number>,
+            "overall_score": <float between 0-100>,
+            "breakdown": {
+                "skills_match": <float between 0-100>,
+                "experience": <float between 0-100>,
+                "education": <float between 0-100>,
+                "overall_fit": <float between 0-100>
+            },
+            "reasoning": "<detailed explanation of the ranking>"
+        }
+    ]
+}"""
+
+SCREENING_JSON_FORMAT = """{
+    "passed": <boolean>,
+    "overall_score": <float between 0-100>,
+    "breakdown": {
+        "skills_match": {
+            "score": <float between 0-100>,
+            "matched_skills": ["skill1", "skill2"],
+            "missing_skills": ["skill1", "skill2"]
+        },
+        "experience": {
+            "score": <float between 0-100>,
+            "years_found": <int>,
+            "relevance": "<high/medium/low>"
+        },
+        "education": {
+            "score": <float between 0-100>,
+            "level": "<degree level>",
+            "relevance": "<high/medium/low>"
+        },
+        "red_flags": {
+            "found": <boolean>,
+            "issues": ["issue1", "issue2"]
+        }
+    },
+    "recommendations": ["recommendation1", "recommendation2"],
+    "red_flags": ["flag1", "flag2"],
+    "strengths": ["strength1", "strength2"]
+}"""
+
+
+class StructuredOutputError(ValueError):
+    """Model output that could not be turned into the expected schema"""
+
+
+def _clamp_score(value: float) -> float:
+    return min(100.0, max(0.0, float(value)))
+
+
+class RankingBreakdown(BaseModel):
+    skills_match: float
+    experience: float
+    education: float
+    overall_fit: float
+
+    _clamp = field_validator("skills_match", "experience", "education", "overall_fit")(_clamp_score)
+
+
+class RankingAnalysis(BaseModel):
+    overall_score: float
+    breakdown: RankingBreakdown
+    reasoning: str
+
+    _clamp = field_validator("overall_score")(_clamp_score)
+
+
+class BatchRankingEntry(RankingAnalysis):
+    resume_id: int
+
+
+# Screening breakdowns are passed through to the API as free-form dicts, so
+# extra keys the model adds are kept rather than dropped
+
+class SkillsMatchBreakdown(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    score: float
+    matched_skills: List[str] = Field(default_factory=list)
+    missing_skills: List[str] = Field(default_factory=list)
+
+    _clamp = field_validator("score")(_clamp_score)
+
+
+class ExperienceBreakdown(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    score: float
+    years_found: Optional[float] = None
+    relevance: str = ""
+
+    _clamp = field_validator("score")(_clamp_score)
+
+
+class EducationBreakdown(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    score: float
+    level: str = ""
+    relevance: str = ""
+
+    _clamp = field_validator("score")(_clamp_score)
+
+
+class RedFlagsBreakdown(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    found: bool = False
+    issues: List[str] = Field(default_factory=list)
+
+
+class ScreeningBreakdown(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    skills_match: SkillsMatchBreakdown
+    experience: ExperienceBreakdown
+    education: EducationBreakdown
+    red_flags: RedFlagsBreakdown = Field(default_factory=RedFlagsBreakdown)
+
+
+class ScreeningAnalysis(BaseModel):
+    passed: bool
+    overall_score: float
+    breakdown: ScreeningBreakdown
+    recommendations: List[str] = Field(default_factory=list)
+    red_flags: List[str] = Field(default_factory=list)
+    strengths: List[str] = Field(default_factory=list)
+
+    _clamp = field_validator("overall_score")(_clamp_score)
+
+
+_FENCE_RE = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+_MAX_DECODE_STARTS = 16
+
+
+def load_json(text: str, expect: Tuple[type, ...] = (dict,)) -> Tuple[Any, str]:
+    """
+    Decode the first JSON value of an expected type from model output
+
+    Tries, cheapest first: the whole text, the contents of a ```json fence,
+    the first value that decodes cleanly from any opening brace or bracket
+    (so leading or trailing prose and stray braces are ignored), and finally
+    a repair pass for trailing commas, single quotes, Python literals and
+    output truncated mid-object.
+
+    Args:
+        text: Raw model output
+        expect: Acceptable top-level JSON types
+
+    Returns:
+        (value, method) where method is "strict", "extracted" or "repaired"
+
+    Raises:
+        StructuredOutputError: If nothing usable could be recovered
+    """
+    if not text or not text.strip():
+        raise StructuredOutputError("Empty model output")
+    stripped = text.strip()
+    try:
+        value = json.loads(stripped)
+        if isinstance(value, expect):
+            return value, "strict"
+    except ValueError:
+        pass
+
+    fence = _FENCE_RE.search(stripped)
+    candidate = fence.group(1).strip() if fence else stripped
+    decoder = json.JSONDecoder()
+    # Repair is tried at each start before moving inwards, so a damaged
+    # outer object wins over a clean nested one
+    normalized = candidate.translate(_SMART_QUOTES)
+    starts = [i for i, ch in enumerate(candidate) if ch in _CLOSERS][:_MAX_DECODE_STARTS]
+    for start in starts:
+        try:
+            value, _ = decoder.raw_decode(candidate, start)
+            if isinstance(value, expect):
+                return value, "extracted"
+        except ValueError:
+            pass
+        try:
+            value = json.loads(_repair(normalized, start))
+            if isinstance(value, expect):
+                return value, "repaired"
+        except ValueError:
+            pass
+    raise StructuredOutputError("No valid JSON found in model output")
+
+
+def _repair(text: str, start: int) -> str:
+    """
+    Rewrite the JSON-like value starting at text[start] into strict JSON
+
+    Single pass over the characters: converts single-quoted strings and
+    Python literals, drops trailing commas, stops at the end of the
+    outermost value and closes anything left open by truncation, dropping
+    an object member that was cut off before its value started.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    quote: Optional[str] = None
+    expect_key = False
+    in_key = False
+    awaiting_value = False
+    member_start = 0
+    i = start
+    while i < len(text):
+        ch = text[i]
+        if quote is not None:
+            if ch == "\\":
+                if i + 1 < len(text):
+                    # \' is not a valid JSON escape
+                    out.append("'" if text[i + 1] == "'" else text[i:i + 2])
+                i += 2
+                continue
+            if ch == quote:
+                out.append('"')
+                quote = None
+                in_key = False
+            elif ch == '"':
+                out.append('\\"')
+            elif ch == "\n":
+                out.append("\\n")
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        if ch.isspace():
+            out.append(ch)
+            i += 1
+            continue
+        awaiting_value = False
+        if ch in ('"', "'"):
+            if expect_key:
+                member_start = len(out)
+                in_key = True
+                expect_key = False
+            quote = ch
+            out.append('"')
+        elif ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+            expect_key = ch == "{"
+            out.append(ch)
+        elif ch in "}]":
+            _drop_trailing_comma(out)
+            if stack:
+                out.append(stack.pop())
+            expect_key = False
+            if not stack:
+                break
+        elif ch == ",":
+            expect_key = bool(stack) and stack[-1] == "}"
+            out.append(ch)
+        elif ch == ":":
+            awaiting_value = True
+            out.append(ch)
+        else:
+            literal = next((lit for lit in _PY_LITERALS if text.startswith(lit, i)), None)
+            if literal is not None:
+                out.append(_PY_LITERALS[literal])
+                i += len(literal)
+                continue
+            out.append(ch)
+        i += 1
+
+    if stack and (in_key or awaiting_value):
+        del out[member_start:]
+        quote = None
+    if quote is not None:
+        out.append('"')
+    _drop_trailing_comma(out)
+    while stack:
+        out.append(stack.pop())
+    return "".join(out)
+
+
+def _drop_trailing_comma(out: List[str]) -> None:
+    j = len(out) - 1
+    while j >= 0 and out[j].isspace():
+        j -= 1
+    if j >= 0 and out[j] == ",":
+        del out[j]
+
+
+def validate(data: Any, model: Type[ModelT]) -> ModelT:
+    try:
+        return model.model_validate(data)
+    except ValidationError as e:
+        raise StructuredOutputError(f"Model output does not match schema: {e.error_count()} error(s), first: {e.errors()[0]['msg']} at {'.'.join(str(p) for p in e.errors()[0]['loc'])}")
+
+
+def parse_model_output(text: str, model: Type[ModelT]) -> Tuple[ModelT, str]:
+    """
+    Decode and validate a single JSON object answer
+
+    Returns:
+        (validated model, method) with method as reported by load_json
+    """
+    data, method = load_json(text, expect=(dict,))
+    return validate(data, model), method
+
+
+def parse_batch_ranking(text: str, expected: int) -> Tuple[Dict[int, Dict[str, Any]], str]:
+    """
+    Decode a batched ranking answer into {zero-based position: analysis}
+
+    Accepts both the {"results": [...]} object requested in JSON mode and a
+    bare array. Entries that are missing, duplicated, out of range or fail
+    validation are left out so the caller can re-score those resumes.
+
+    Raises:
+        StructuredOutputError: If the answer as a whole could not be decoded
+    """
+    data, method = load_json(text, expect=(dict, list))
+    if isinstance(data, dict):
+        data = data.get("results")
+    if not isinstance(data, list):
+        raise StructuredOutputError("Batched answer has no results array")
+
+    entries: Dict[int, Dict[str, Any]] = {}
+    duplicated = set()
+    for item in data:
+        try:
+            entry = validate(item, BatchRankingEntry)
+        except StructuredOutputError:
+            continue
+        position = entry.resume_id - 1
+        if position < 0 or position >= expected:
+            continue
+        if position in entries:
+            # Two answers for one resume: neither can be trusted
+            duplicated.add(position)
+            continue
+        entries[position] = entry.model_dump(exclude={"resume_id"})
+    for position in duplicated:
+        del entries[position]
+    return entries, method
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The service modules are imported by bare name (python main.py / uvicorn main:app)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
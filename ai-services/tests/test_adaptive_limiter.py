@@ -0,0 +1,133 @@
+import asyncio
+
+from adaptive_limiter import AdaptiveConcurrencyLimiter, parse_retry_after
+
+
+def test_parse_retry_after_headers():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after({"retry-after-ms": "1500", "retry-after": "9"}) == 1.5
+    assert parse_retry_after({"retry-after": "2"}) == 2.0
+    assert parse_retry_after({"retry-after": "soon"}) is None
+    assert parse_retry_after({
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "3s",
+        "x-ratelimit-remaining-tokens": "0",
+        "x-ratelimit-reset-tokens": "7s"
+    }) == 7.0
+    assert parse_retry_after({"x-ratelimit-remaining-tokens": "10", "x-ratelimit-reset-tokens": "7s"}) is None
+
+
+def test_limit_is_clamped_to_bounds():
+    assert AdaptiveConcurrencyLimiter(100, min_limit=2, max_limit=8).limit == 8
+    assert AdaptiveConcurrencyLimiter(0, min_limit=2, max_limit=8).limit == 2
+
+
+def test_caps_concurrency_at_the_limit():
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter(3, max_limit=3)
+        in_flight = 0
+        peak = 0
+
+        async def work():
+            nonlocal in_flight, peak
+            async with limiter:
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+
+        await asyncio.gather(*[work() for _ in range(10)])
+        assert peak == 3
+        assert limiter.in_flight == 0 and limiter.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_success_only_raises_the_limit_while_saturated():
+    limiter = AdaptiveConcurrencyLimiter(2, max_limit=10)
+    limiter.in_flight = 1
+    limiter.record_success()
+    assert limiter.limit == 2
+
+    limiter.in_flight = 2
+    limiter.record_success()
+    assert limiter.limit == 2.5
+    limiter.record_success()
+    assert limiter.limit == 2.9
+
+
+def test_success_while_callers_queue_raises_the_limit():
+    limiter = AdaptiveConcurrencyLimiter(4, max_limit=10)
+    limiter.in_flight = 1
+    limiter.queued = 1
+    limiter.record_success()
+    assert limiter.limit == 4.25
+
+
+def test_overload_halves_once_per_cooldown():
+    limiter = AdaptiveConcurrencyLimiter(16, min_limit=2, decrease_cooldown_seconds=60)
+    limiter.record_overload()
+    limiter.record_overload()
+    assert limiter.limit == 8
+
+    limiter._last_decrease -= 60
+    limiter.record_overload()
+    assert limiter.limit == 4
+
+    limiter._last_decrease -= 60
+    limiter.record_overload()
+    limiter._last_decrease -= 60
+    limiter.record_overload()
+    assert limiter.limit == 2
+
+
+def test_retry_after_pauses_admissions():
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter(4)
+        assert limiter.record_overload({"retry-after-ms": "100"}) == 0.1
+        assert limiter.paused
+        assert not limiter.try_acquire()
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await limiter.acquire()
+        assert loop.time() - started >= 0.09
+        limiter.release()
+
+    asyncio.run(scenario())
+
+
+def test_try_acquire_does_not_jump_the_queue():
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter(1)
+        assert limiter.try_acquire()
+        assert not limiter.try_acquire()
+
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.release()
+        # The slot belongs to the queued caller
+        assert not limiter.try_acquire()
+        await waiter
+        assert limiter.in_flight == 1
+        limiter.release()
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_passes_its_slot_on():
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter(1)
+        await limiter.acquire()
+        first = asyncio.create_task(limiter.acquire())
+        second = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        limiter.release()
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        await asyncio.wait_for(second, timeout=1)
+        assert limiter.in_flight == 1
+        assert limiter.queued == 0
+
+    asyncio.run(scenario())
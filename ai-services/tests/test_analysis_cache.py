@@ -0,0 +1,130 @@
+import asyncio
+import os
+import time
+
+from analysis_cache import AnalysisCache, make_cache_key
+
+JOB = {"title": "Backend Engineer", "required_skills": ["python"]}
+CRITERIA = ["skills", "experience"]
+
+
+def test_key_ignores_whitespace_but_not_content_job_or_deployment():
+    key = make_cache_key("ranking", "Python  developer\n", JOB, CRITERIA, "gpt-4o")
+    assert key == make_cache_key("ranking", " Python developer", JOB, CRITERIA, "gpt-4o")
+    assert key != make_cache_key("ranking", "Java developer", JOB, CRITERIA, "gpt-4o")
+    assert key != make_cache_key("screening", "Python developer", JOB, CRITERIA, "gpt-4o")
+    assert key != make_cache_key("ranking", "Python developer", {**JOB, "title": "Lead"}, CRITERIA, "gpt-4o")
+    assert key != make_cache_key("ranking", "Python developer", JOB, CRITERIA, "gpt-4o-mini")
+
+
+def test_values_are_copied_in_and_out():
+    cache = AnalysisCache()
+    value = {"overall_score": 80, "breakdown": {"skills_match": 90}}
+    cache.set("k", value)
+    value["breakdown"]["skills_match"] = 0
+    hit = cache.get("k")
+    assert hit["breakdown"]["skills_match"] == 90
+    hit["overall_score"] = 0
+    assert cache.get("k")["overall_score"] == 80
+
+
+def test_memory_tier_is_lru_bounded():
+    cache = AnalysisCache(max_entries=2)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}
+    cache.set("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    assert cache.stats()["entries"] == 2
+
+
+def test_entries_expire_after_the_ttl():
+    cache = AnalysisCache(ttl_seconds=0.05)
+    cache.set("k", {"v": 1})
+    assert cache.get("k") == {"v": 1}
+    time.sleep(0.06)
+    assert cache.get("k") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    AnalysisCache(cache_dir=str(tmp_path)).set("abcdef", {"v": 1})
+    assert (tmp_path / "ab" / "abcdef.json").exists()
+
+    restarted = AnalysisCache(cache_dir=str(tmp_path))
+    assert restarted.get("abcdef") == {"v": 1}
+    assert restarted.stats()["disk_hits"] == 1
+    # Promoted into memory: the next hit does not touch the disk
+    assert restarted.get("abcdef") == {"v": 1}
+    assert restarted.stats()["disk_hits"] == 1
+
+
+def test_unreadable_disk_entries_are_discarded(tmp_path):
+    cache = AnalysisCache(cache_dir=str(tmp_path))
+    path = tmp_path / "ab" / "abcdef.json"
+    path.parent.mkdir()
+    path.write_text("{not json")
+    assert cache.get("abcdef") is None
+    assert not path.exists()
+
+
+def test_invalidate_and_clear_cover_both_tiers(tmp_path):
+    cache = AnalysisCache(cache_dir=str(tmp_path))
+    cache.set("aa1", {"v": 1})
+    cache.set("bb2", {"v": 2})
+    cache.set("cc3", {"v": 3})
+
+    assert cache.invalidate("aa1")
+    assert not cache.invalidate("aa1")
+    assert AnalysisCache(cache_dir=str(tmp_path)).get("aa1") is None
+
+    assert cache.clear() == 2
+    assert AnalysisCache(cache_dir=str(tmp_path)).get("bb2") is None
+
+
+def test_async_methods_share_the_tiers(tmp_path):
+    async def scenario():
+        cache = AnalysisCache(cache_dir=str(tmp_path))
+        await cache.aset("abc", {"v": 1})
+        assert await cache.aget("abc") == {"v": 1}
+        assert await AnalysisCache(cache_dir=str(tmp_path)).aget("abc") == {"v": 1}
+        assert await cache.aget("missing") is None
+        assert await cache.ainvalidate("abc")
+        await cache.aset("def", {"v": 2})
+        assert await cache.aclear() == 1
+
+    asyncio.run(scenario())
+
+
+def test_sweep_deletes_expired_then_oldest_entries(tmp_path):
+    cache = AnalysisCache(ttl_seconds=3600, cache_dir=str(tmp_path), max_disk_entries=2)
+    now = time.time()
+    for age, key in ((7200, "old1"), (30, "aa2"), (20, "bb3"), (10, "cc4")):
+        cache.set(key, {"key": key})
+        path = cache._disk_path(key)
+        os.utime(path, (now - age, now - age))
+
+    assert cache.sweep_disk() == 2
+    remaining = sorted(path.stem for path in tmp_path.glob("*/*.json"))
+    assert remaining == ["bb3", "cc4"]
+    assert cache.stats()["disk_entries_swept"] == 2
+
+
+def test_aset_starts_a_background_sweep_once_per_interval(tmp_path):
+    async def scenario():
+        cache = AnalysisCache(cache_dir=str(tmp_path), max_disk_entries=1, sweep_interval_seconds=3600)
+        await cache.aset("aa1", {"v": 1})
+        await cache._sweep_task
+        await cache.aset("bb2", {"v": 2})
+        # The first aset swept; the second is inside the interval
+        assert cache._sweep_task.done()
+        assert len(list(tmp_path.glob("*/*.json"))) == 2
+
+        cache._last_sweep = 0.0
+        await cache.aset("cc3", {"v": 3})
+        await cache._sweep_task
+        assert [path.stem for path in tmp_path.glob("*/*.json")] == ["cc3"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,97 @@
+import asyncio
+
+from models import ResumeData
+from resume_ranker import ResumeRanker
+
+JOB = {
+    "title": "Backend Engineer",
+    "description": "Build APIs",
+    "required_skills": ["python"],
+    "preferred_skills": [],
+    "experience_years": None,
+    "education_level": None
+}
+
+
+def analysis(score):
+    return {
+        "overall_score": score,
+        "breakdown": {"skills_match": score, "experience": score, "education": score, "overall_fit": score},
+        "reasoning": "ok"
+    }
+
+
+class FakeBatchClient:
+    """Scores keyed by the last word of the resume; keys in `dropped` get no batched answer"""
+
+    def __init__(self, scores, dropped=(), failing_batches=False):
+        self.scores = scores
+        self.dropped = set(dropped)
+        self.failing_batches = failing_batches
+        self.batch_calls = []
+        self.single_calls = []
+
+    async def analyze_resumes_batch_for_ranking(self, contents, *args):
+        keys = [content.split()[-1] for content in contents]
+        self.batch_calls.append(keys)
+        if self.failing_batches:
+            raise RuntimeError("batch answer was not JSON")
+        return [None if key in self.dropped else analysis(self.scores[key]) for key in keys]
+
+    async def analyze_resume_for_ranking(self, content, *args):
+        key = content.split()[-1]
+        self.single_calls.append(key)
+        return analysis(self.scores[key])
+
+
+def resumes(*keys, length=0):
+    return [ResumeData(filename=f"{key}.txt", content=f"{'x' * length} python {key}", format="text") for key in keys]
+
+
+def test_batches_are_bounded_by_count_and_text_budget(monkeypatch):
+    monkeypatch.setattr("config.settings.ranking_batch_max_resumes", 3)
+    monkeypatch.setattr("config.settings.ranking_batch_max_chars", 100)
+    ranker = ResumeRanker(FakeBatchClient({}))
+    assert ranker._plan_batches(resumes(*"abcdefg")) == [[0, 1, 2], [3, 4, 5], [6]]
+
+    # Long resumes get smaller batches; one over the budget still gets its own
+    pool = resumes("a", "b", length=40) + resumes("c", length=200) + resumes("d")
+    assert ranker._plan_batches(pool) == [[0, 1], [2], [3]]
+
+
+def test_missing_batch_entries_are_rescored_individually(monkeypatch):
+    monkeypatch.setattr("config.settings.ranking_batch_max_resumes", 3)
+
+    async def scenario():
+        client = FakeBatchClient({"a": 10, "b": 90, "c": 50, "d": 70}, dropped={"c"})
+        response = await ResumeRanker(client).rank_resumes(resumes(*"abcd"), JOB, batch_mode=True)
+        assert client.batch_calls == [["a", "b", "c"], ["d"]]
+        assert client.single_calls == ["c"]
+        assert [(r.filename, r.ranking.score) for r in response.ranked_resumes] == [
+            ("b.txt", 90), ("d.txt", 70), ("c.txt", 50), ("a.txt", 10)
+        ]
+
+    asyncio.run(scenario())
+
+
+def test_a_failed_batch_falls_back_to_single_calls(monkeypatch):
+    monkeypatch.setattr("config.settings.ranking_batch_max_resumes", 5)
+
+    async def scenario():
+        client = FakeBatchClient({"a": 10, "b": 90}, failing_batches=True)
+        response = await ResumeRanker(client).rank_resumes(resumes("a", "b"), JOB, batch_mode=True)
+        assert client.batch_calls == [["a", "b"]]
+        assert sorted(client.single_calls) == ["a", "b"]
+        assert [r.filename for r in response.ranked_resumes] == ["b.txt", "a.txt"]
+
+    asyncio.run(scenario())
+
+
+def test_batch_mode_off_sends_one_call_per_resume():
+    async def scenario():
+        client = FakeBatchClient({"a": 10, "b": 90})
+        await ResumeRanker(client).rank_resumes(resumes("a", "b"), JOB, batch_mode=False)
+        assert client.batch_calls == []
+        assert sorted(client.single_calls) == ["a", "b"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,115 @@
+import asyncio
+
+from job_prompts import RANKING_CRITERIA, get_job_prompt
+from models import ResumeData
+from resume_ranker import ResumeRanker
+
+JOB = {
+    "title": "Backend Engineer",
+    "description": "Build APIs",
+    "required_skills": ["python"],
+    "preferred_skills": [],
+    "experience_years": None,
+    "education_level": None
+}
+
+
+def analysis(score, reasoning="ok"):
+    return {
+        "overall_score": score,
+        "breakdown": {"skills_match": score, "experience": score, "education": score, "overall_fit": score},
+        "reasoning": reasoning
+    }
+
+
+class FakeCascadeClient:
+    """Quick and full scores keyed by the last word of the resume; None fails the call"""
+
+    fast_pool = object()
+
+    def __init__(self, quick, full):
+        self.quick = quick
+        self.full = full
+        self.full_calls = []
+
+    async def analyze_resume_quick(self, content, job):
+        score = self.quick[content.split()[-1]]
+        if score is None:
+            raise RuntimeError("fast tier down")
+        return analysis(score, "quick")
+
+    async def analyze_resume_for_ranking(self, content, job):
+        key = content.split()[-1]
+        self.full_calls.append(key)
+        score = self.full[key]
+        if score is None:
+            raise RuntimeError("full tier failed")
+        return analysis(score, "full")
+
+
+def resumes(*keys):
+    return [ResumeData(filename=f"{key}.txt", content=f"python {key}", format="text") for key in keys]
+
+
+# a-d are scored by the fast tier, e and f are not. With top_n=2 the
+# finalists are a and b, and e and f are escalated. b's and f's full
+# analyses fail.
+QUICK = {"a": 90, "b": 80, "c": 70, "d": 60, "e": None, "f": None}
+FULL = {"a": 50, "b": None, "e": 95, "f": None}
+
+
+def test_cascade_splits_resumes_by_tier():
+    async def scenario():
+        client = FakeCascadeClient(QUICK, FULL)
+        ranker = ResumeRanker(client)
+        job = get_job_prompt("ranking", JOB, RANKING_CRITERIA)
+        gathered, quick_only, unscored = await ranker._rank_cascade(resumes(*"abcdef"), job, 2, False)
+
+        assert sorted(client.full_calls) == ["a", "b", "e", "f"]
+        assert [(filename, result["overall_score"]) for filename, result, _ in gathered] == [("a.txt", 50), ("e.txt", 95)]
+        assert [(filename, a["overall_score"]) for filename, a in quick_only] == [("c.txt", 70), ("d.txt", 60), ("b.txt", 80)]
+        assert quick_only[0][1]["reasoning"].startswith("Quick first-pass score only (not among the top 2")
+        assert quick_only[2][1]["reasoning"].startswith("Full analysis failed (full tier failed)")
+        assert unscored == [("f.txt", "full tier failed")]
+
+    asyncio.run(scenario())
+
+
+def test_cascade_ranking_order(monkeypatch):
+    monkeypatch.setattr("config.settings.ranking_cascade_min_resumes", 1)
+
+    async def scenario():
+        ranker = ResumeRanker(FakeCascadeClient(QUICK, FULL))
+        pool = resumes(*"abcdef") + [ResumeData(filename="g.txt", content="cooking g", format="text")]
+        response = await ranker.rank_resumes(
+            pool, JOB, batch_mode=False, prefilter_min_score=50, cascade_mode=True, cascade_top_n=2
+        )
+        ranked = [(r.filename, r.ranking.score, r.rank) for r in response.ranked_resumes]
+        assert ranked == [
+            # Finalists by full score
+            ("e.txt", 95, 1),
+            ("a.txt", 50, 2),
+            # Then quick-only resumes by quick score, including a finalist whose full analysis failed
+            ("b.txt", 80, 3),
+            ("c.txt", 70, 4),
+            ("d.txt", 60, 5),
+            # Then resumes neither tier could score
+            ("f.txt", 0.0, 6),
+            # Then resumes dropped by the pre-filter
+            ("g.txt", 0.0, 7),
+        ]
+        assert response.total_resumes == 7
+
+    asyncio.run(scenario())
+
+
+def test_small_requests_skip_the_cascade(monkeypatch):
+    monkeypatch.setattr("config.settings.ranking_cascade_min_resumes", 10)
+
+    async def scenario():
+        client = FakeCascadeClient(QUICK, {"a": 10, "b": 20, "c": 30})
+        response = await ResumeRanker(client).rank_resumes(resumes(*"abc"), JOB, batch_mode=False, cascade_mode=True, cascade_top_n=1)
+        assert [r.filename for r in response.ranked_resumes] == ["c.txt", "b.txt", "a.txt"]
+        assert sorted(client.full_calls) == ["a", "b", "c"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,108 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from chunked_upload import UploadTooLargeError, stream_resume_to_blob
+
+
+class FakeBlockStorage:
+    """Records staged and committed blocks like a block blob container"""
+
+    def __init__(self):
+        self.staged = {}
+        self.committed = {}
+
+    def new_resume_blob_name(self, original_filename):
+        return f"resumes/{len(self.committed)}-{original_filename}"
+
+    async def stage_block(self, blob_name, block_id, data):
+        await asyncio.sleep(0)
+        self.staged.setdefault(blob_name, {})[block_id] = data
+
+    async def commit_blocks(self, blob_name, block_ids, original_filename, content_type, size, metadata):
+        staged = self.staged[blob_name]
+        self.committed[blob_name] = b"".join(staged[block_id] for block_id in block_ids)
+        return {"blob_name": blob_name, "size": size, "metadata": metadata}
+
+
+async def chunks_of(data, size):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def upload(storage, data, **kwargs):
+    options = {"max_bytes": 1000, "block_size": 10, "concurrency": 2}
+    options.update(kwargs)
+    return asyncio.run(stream_resume_to_blob(storage, chunks_of(data, 7), "cv.txt", "text/plain", **options))
+
+
+def test_stream_is_cut_into_ordered_blocks():
+    storage = FakeBlockStorage()
+    data = bytes(range(95))
+    stored = upload(storage, data)
+
+    blob_name = stored["upload_result"]["blob_name"]
+    assert storage.committed[blob_name] == data
+    assert sorted(storage.staged[blob_name]) == [f"{i:08d}" for i in range(10)]
+    assert stored["content_hash"] == hashlib.sha256(data).hexdigest()
+    assert stored["upload_result"]["metadata"] == {"content_sha256": stored["content_hash"]}
+    assert stored["upload_result"]["size"] == 95
+    # Only files that fit in one block are kept in memory
+    assert stored["content"] is None
+    assert not stored["duplicate"]
+
+
+def test_small_and_empty_files_keep_their_content():
+    storage = FakeBlockStorage()
+    assert upload(storage, b"Python")["content"] == b"Python"
+    stored = upload(storage, b"")
+    assert stored["content"] == b""
+    assert storage.committed[stored["upload_result"]["blob_name"]] == b""
+
+
+def test_oversized_stream_is_rejected_before_commit():
+    storage = FakeBlockStorage()
+    with pytest.raises(UploadTooLargeError) as excinfo:
+        upload(storage, bytes(50), max_bytes=20)
+    assert excinfo.value.received == 21
+    assert storage.committed == {}
+
+
+def test_single_block_duplicate_is_never_written():
+    storage = FakeBlockStorage()
+    existing = {"blob_name": "resumes/original.txt"}
+    lookups = []
+
+    async def find_duplicate(file_hash):
+        lookups.append(file_hash)
+        return existing
+
+    stored = upload(storage, b"Python", find_duplicate=find_duplicate)
+    assert stored["duplicate"]
+    assert stored["upload_result"] is existing
+    assert lookups == [hashlib.sha256(b"Python").hexdigest()]
+    assert storage.staged == {} and storage.committed == {}
+
+
+def test_multi_block_duplicate_is_checked_after_staging_and_not_committed():
+    storage = FakeBlockStorage()
+
+    async def find_duplicate(file_hash):
+        return {"blob_name": "resumes/original.txt"}
+
+    stored = upload(storage, bytes(35), find_duplicate=find_duplicate)
+    assert stored["duplicate"]
+    assert len(next(iter(storage.staged.values()))) == 4
+    assert storage.committed == {}
+
+
+def test_new_content_is_committed_when_no_duplicate_exists():
+    storage = FakeBlockStorage()
+
+    async def find_duplicate(file_hash):
+        return None
+
+    stored = upload(storage, b"Rust dev", find_duplicate=find_duplicate)
+    assert not stored["duplicate"]
+    assert storage.committed[stored["upload_result"]["blob_name"]] == b"Rust dev"
@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+
+from adaptive_limiter import AdaptiveConcurrencyLimiter
+from deployment_pool import Deployment, DeploymentPool, parse_deployments
+
+
+def make_pool(weights, probe=None, **kwargs):
+    deployments = [
+        Deployment(f"d{i}", f"gpt-{i}", "https://example.openai.azure.com/", weight, client=None, limiter=AdaptiveConcurrencyLimiter(4))
+        for i, weight in enumerate(weights)
+    ]
+
+    async def ok(deployment):
+        return None
+
+    return DeploymentPool(deployments, probe or ok, **kwargs)
+
+
+def test_parse_deployments_falls_back_to_single_settings():
+    defaults = dict(api_key="key", endpoint="https://main.openai.azure.com/", api_version="2024-02-01", deployment_name="gpt-4o")
+    (single,) = parse_deployments("", **defaults)
+    assert single["name"] == "main.openai.azure.com/gpt-4o"
+    assert single["weight"] == 1.0
+
+    east, west = parse_deployments(
+        '[{"name": "east", "deployment": "gpt-east", "weight": 2}, {"name": "west", "endpoint": "https://west.openai.azure.com/"}]',
+        **defaults
+    )
+    assert (east["deployment"], east["endpoint"], east["weight"]) == ("gpt-east", "https://main.openai.azure.com/", 2.0)
+    assert (west["deployment"], west["endpoint"], west["api_key"]) == ("gpt-4o", "https://west.openai.azure.com/", "key")
+
+
+@pytest.mark.parametrize("raw, message", [
+    ("not json", "not valid JSON"),
+    ("[]", "non-empty JSON list"),
+    ('[{"weight": 0}]', "positive weight"),
+    ('[{"weight": "heavy"}]', "non-numeric weight"),
+    ('[{"name": "a"}, {"name": "a"}]', "distinct names"),
+])
+def test_parse_deployments_rejects_bad_settings(raw, message):
+    with pytest.raises(ValueError, match=message):
+        parse_deployments(raw, api_key="key", endpoint="https://main.openai.azure.com/", api_version="v", deployment_name="gpt-4o")
+
+
+def test_parse_deployments_reports_missing_values():
+    with pytest.raises(ValueError, match="entry 0: AZURE_OPENAI_API_KEY"):
+        parse_deployments('[{"deployment": "gpt"}]', api_key="", endpoint="https://x/", api_version="v", deployment_name="")
+
+
+def test_spreads_calls_by_weight():
+    async def scenario():
+        pool = make_pool([1, 3])
+        taken = [await pool.acquire() for _ in range(4)]
+        assert [d.name for d in taken].count("d1") == 3
+        assert pool.in_flight == 4
+
+    asyncio.run(scenario())
+
+
+def test_paused_deployment_is_used_last():
+    async def scenario():
+        pool = make_pool([1, 1])
+        first, second = pool.deployments
+        second.limiter.record_overload({"retry-after": "30"})
+        assert [await pool.acquire() for _ in range(2)] == [first, first]
+        assert pool.has_alternative(second)
+        assert not pool.has_alternative(first)
+
+    asyncio.run(scenario())
+
+
+def test_try_acquire_prefers_other_deployments():
+    pool = make_pool([1, 1])
+    first, second = pool.deployments
+    assert pool.try_acquire(exclude=first) is second
+    assert pool.try_acquire(exclude=second) is first
+
+
+def test_client_errors_never_eject():
+    pool = make_pool([1, 1], eject_after_failures=2)
+    first = pool.deployments[0]
+    for _ in range(5):
+        pool.record_failure(first, "error")
+    assert first.serving
+    assert first.consecutive_failures == 0
+
+
+def test_consecutive_failures_eject_until_a_probe_succeeds():
+    async def scenario():
+        probes = []
+
+        async def probe(deployment):
+            probes.append(deployment.name)
+
+        pool = make_pool([1, 1], probe=probe, eject_after_failures=2, eject_seconds=0.05)
+        first, second = pool.deployments
+        pool.record_failure(first, "timeout")
+        pool.record_success(first, None, 0.1)
+        pool.record_failure(first, "timeout")
+        assert first.serving
+
+        pool.record_failure(first, "5xx")
+        assert not first.serving
+        assert first.stats()["state"] == "ejected"
+        assert [await pool.acquire() for _ in range(3)] == [second] * 3
+
+        await asyncio.sleep(0.06)
+        pool.try_acquire()
+        await asyncio.sleep(0)
+        assert probes == ["d0"]
+        assert first.serving and first.consecutive_failures == 0
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_failed_probe_doubles_the_ejection():
+    async def scenario():
+        async def probe(deployment):
+            raise RuntimeError("still down")
+
+        pool = make_pool([1, 1], probe=probe, eject_after_failures=1, eject_seconds=0.05, max_eject_seconds=0.08)
+        first = pool.deployments[0]
+        pool.record_failure(first, "connection")
+        await asyncio.sleep(0.06)
+        pool.try_acquire()
+        await asyncio.sleep(0)
+        assert not first.serving
+        assert first.eject_seconds == 0.08
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_retry_after_extends_the_ejection():
+    pool = make_pool([1, 1], eject_after_failures=1, eject_seconds=1)
+    first = pool.deployments[0]
+    assert pool.record_failure(first, "429", {"retry-after": "30"}) == 30.0
+    assert first.eject_seconds == 30.0
+
+
+def test_single_deployment_and_fully_ejected_pools_keep_serving():
+    solo = make_pool([1], eject_after_failures=1)
+    solo.record_failure(solo.deployments[0], "5xx")
+    assert solo.deployments[0].serving
+
+    pool = make_pool([1, 1], eject_after_failures=1, eject_seconds=60)
+    for deployment in pool.deployments:
+        pool.record_failure(deployment, "5xx")
+    assert not any(d.serving for d in pool.deployments)
+    assert pool.try_acquire() is not None
@@ -0,0 +1,102 @@
+import asyncio
+
+from health_monitor import HealthMonitor
+
+
+def probe(healthy, details=None, delay=0.0, error=None):
+    async def check():
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return healthy, details or {}
+    return check
+
+
+def test_unknown_until_the_first_refresh():
+    monitor = HealthMonitor({"storage": probe(True)})
+    assert not monitor.is_ready()
+    assert monitor.snapshot()["status"] == "unknown"
+    assert monitor.snapshot()["services"] == {}
+
+
+def test_every_probe_must_pass():
+    async def scenario():
+        monitor = HealthMonitor({"ai": probe(True, {"model": "gpt-4o"}), "storage": probe(False, {"error": "403"})})
+        await monitor.refresh()
+        snapshot = monitor.snapshot()
+        assert not monitor.is_ready()
+        assert snapshot["status"] == "unhealthy"
+        assert snapshot["services"]["ai"]["details"] == {"model": "gpt-4o"}
+        assert snapshot["services"]["storage"]["healthy"] is False
+
+        monitor.probes["storage"] = probe(True)
+        await monitor.refresh()
+        assert monitor.is_ready()
+        assert monitor.snapshot()["status"] == "healthy"
+
+    asyncio.run(scenario())
+
+
+def test_only_required_probes_decide_readiness():
+    async def scenario():
+        monitor = HealthMonitor({"ai": probe(True), "storage": probe(False)}, required=["ai", "search"])
+        assert monitor.required == ["ai"]
+        await monitor.refresh()
+        snapshot = monitor.snapshot()
+        assert monitor.is_ready()
+        assert (snapshot["status"], snapshot["ready"]) == ("degraded", True)
+        assert snapshot["services"]["storage"]["healthy"] is False
+
+        monitor.probes["ai"] = probe(False)
+        await monitor.refresh()
+        assert not monitor.is_ready()
+        assert monitor.snapshot()["status"] == "unhealthy"
+
+    asyncio.run(scenario())
+
+
+def test_failing_and_hanging_probes_are_reported_not_raised():
+    async def scenario():
+        monitor = HealthMonitor(
+            {"crash": probe(True, error=RuntimeError("boom")), "hang": probe(True, delay=5)},
+            timeout_seconds=0.05
+        )
+        await monitor.refresh()
+        services = monitor.snapshot()["services"]
+        assert services["crash"] == {"healthy": False, "latency_ms": services["crash"]["latency_ms"], "details": {"error": "boom"}}
+        assert services["hang"]["details"] == {"error": "probe timed out after 0.05s"}
+
+    asyncio.run(scenario())
+
+
+def test_a_stale_snapshot_is_not_ready():
+    async def scenario():
+        monitor = HealthMonitor({"ai": probe(True)}, stale_after_seconds=0.05)
+        await monitor.refresh()
+        assert monitor.is_ready()
+        await asyncio.sleep(0.06)
+        assert not monitor.is_ready()
+        assert monitor.snapshot()["status"] == "stale"
+
+    asyncio.run(scenario())
+
+
+def test_background_loop_probes_until_stopped():
+    async def scenario():
+        calls = []
+
+        async def counting_probe():
+            calls.append(1)
+            return True, {}
+
+        monitor = HealthMonitor({"ai": counting_probe})
+        monitor.interval_seconds = 0.01
+        await monitor.start()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+        seen = len(calls)
+        assert seen >= 2
+        await asyncio.sleep(0.03)
+        assert len(calls) == seen
+
+    asyncio.run(scenario())
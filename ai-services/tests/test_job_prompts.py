@@ -0,0 +1,65 @@
+import pytest
+
+from job_prompts import RANKING_CRITERIA, SCREENING_CRITERIA, _cached_job_prompt, get_job_prompt, precompile_job_prompts
+
+JOB = {
+    "title": "Backend Engineer",
+    "description": "Build APIs",
+    "required_skills": ["Python", "SQL"],
+    "preferred_skills": [],
+    "experience_years": 0,
+    "education_level": None
+}
+
+
+def test_resume_text_only_ever_follows_the_static_prefix():
+    prompt = get_job_prompt("ranking", JOB, RANKING_CRITERIA)
+    first = prompt.messages("Jane: Python, 5 years")
+    second = prompt.messages("John: Java, 2 years")
+    assert first[0] == second[0]
+    assert first[1]["content"].startswith(prompt.prefix)
+    assert second[1]["content"].startswith(prompt.prefix)
+    assert first[1]["content"].endswith("RESUME CONTENT:\nJane: Python, 5 years\n")
+
+
+def test_job_block_fills_in_missing_fields():
+    prefix = get_job_prompt("screening", JOB, SCREENING_CRITERIA).prefix
+    assert "Required Skills: Python, SQL" in prefix
+    assert "Preferred Skills: None specified" in prefix
+    # Zero years is a requirement, not a missing one
+    assert "Experience Required: 0 years" in prefix
+    assert "Education Level: Not specified" in prefix
+    assert "SCREENING CRITERIA: skills_match, experience, education, red_flags" in prefix
+
+
+def test_prompts_are_built_once_per_job():
+    prompt = get_job_prompt("ranking", JOB, RANKING_CRITERIA)
+    assert get_job_prompt("ranking", dict(reversed(list(JOB.items()))), RANKING_CRITERIA) is prompt
+    assert get_job_prompt("ranking", {**JOB, "title": "Lead"}, RANKING_CRITERIA) is not prompt
+    assert get_job_prompt("screening", JOB, SCREENING_CRITERIA) is not prompt
+
+
+def test_precompiled_templates_are_pinned():
+    template = {**JOB, "title": "Pinned Template"}
+    precompile_job_prompts({"pinned": template})
+    ranking = get_job_prompt("ranking", template, RANKING_CRITERIA)
+    _cached_job_prompt.cache_clear()
+    assert get_job_prompt("ranking", template, RANKING_CRITERIA) is ranking
+    assert get_job_prompt("screening", template, SCREENING_CRITERIA).kind == "screening"
+
+
+def test_batch_prompts_number_each_resume():
+    prompt = get_job_prompt("ranking", JOB, RANKING_CRITERIA)
+    user = prompt.batch_messages(["first resume", "second resume"])[1]["content"]
+    assert user.startswith(prompt.batch_prefix)
+    assert "RESUMES (2):" in user
+    assert "=== RESUME 1 START ===\nfirst resume\n=== RESUME 1 END ===" in user
+    assert "=== RESUME 2 START ===\nsecond resume\n=== RESUME 2 END ===" in user
+
+    with pytest.raises(ValueError, match="only available for ranking"):
+        get_job_prompt("screening", JOB, SCREENING_CRITERIA).batch_messages(["resume"])
+
+
+def test_unknown_prompt_kind_is_rejected():
+    with pytest.raises(ValueError, match="Unknown prompt kind"):
+        get_job_prompt("summary", JOB, RANKING_CRITERIA)
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from lazy_service import LazyService, ServiceUnavailableError
+
+
+def test_concurrent_callers_share_one_initialization():
+    async def scenario():
+        builds = []
+
+        async def factory():
+            builds.append(1)
+            await asyncio.sleep(0.01)
+            return object()
+
+        service = LazyService("storage", factory)
+        assert service.peek() is None
+        assert service.status()["state"] == "not_initialized"
+
+        first, second = await asyncio.gather(service.get(), service.get())
+        assert first is second is service.peek()
+        assert builds == [1]
+        assert service.status()["state"] == "ready"
+        assert service.status()["init_ms"] is not None
+
+    asyncio.run(scenario())
+
+
+def test_failures_are_remembered_then_retried():
+    async def scenario():
+        attempts = []
+
+        async def factory():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise ValueError("AZURE_OPENAI_ENDPOINT is not set")
+            return "client"
+
+        service = LazyService("azure_openai", factory, retry_after_seconds=0.05)
+        for _ in range(2):
+            with pytest.raises(ServiceUnavailableError, match="azure_openai is unavailable: AZURE_OPENAI_ENDPOINT is not set"):
+                await service.get()
+        # The second call failed fast without running the factory again
+        assert len(attempts) == 1
+        assert service.status() == {"state": "failed", "init_ms": None, "error": "AZURE_OPENAI_ENDPOINT is not set"}
+
+        await asyncio.sleep(0.06)
+        assert await service.get() == "client"
+        assert service.status()["error"] is None
+
+    asyncio.run(scenario())
+
+
+def test_close_runs_the_closer_once_and_allows_a_rebuild():
+    async def scenario():
+        closed = []
+
+        async def factory():
+            return object()
+
+        async def closer(instance):
+            closed.append(instance)
+            raise RuntimeError("already closed")
+
+        service = LazyService("storage", factory, closer)
+        await service.close()
+        assert closed == []
+
+        instance = await service.get()
+        await service.close()
+        await service.close()
+        assert closed == [instance]
+        assert service.peek() is None
+        assert await service.get() is not instance
+
+    asyncio.run(scenario())
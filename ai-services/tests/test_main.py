@@ -0,0 +1,170 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from resume_screener import ResumeScreener
+
+JOB = {
+    "title": "Backend Engineer",
+    "description": "Build APIs",
+    "required_skills": ["python"],
+    "preferred_skills": []
+}
+
+
+class FakeTextService:
+    """Extracted text by blob name; a stored exception is raised"""
+
+    def __init__(self, texts):
+        self.texts = texts
+
+    async def text_for_blob(self, blob_name):
+        text = self.texts.get(blob_name)
+        if isinstance(text, Exception):
+            raise text
+        return text
+
+
+class FakeScreeningClient:
+    def __init__(self):
+        self.screened = []
+
+    async def screen_resume(self, content, job):
+        self.screened.append(content)
+        return {"passed": True, "overall_score": 80, "breakdown": {}, "recommendations": [], "red_flags": [], "strengths": []}
+
+
+@pytest.fixture
+def client():
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def text_service(monkeypatch):
+    service = FakeTextService({})
+    monkeypatch.setattr(main.text_extraction_service, "_instance", service)
+    return service
+
+
+@pytest.fixture
+def screening_client():
+    screening_client = FakeScreeningClient()
+    main.app.dependency_overrides[main.get_resume_screener] = lambda: ResumeScreener(screening_client)
+    return screening_client
+
+
+def resume(filename, content="", blob_name=None):
+    return {"filename": filename, "content": content, "format": "text", "blob_name": blob_name}
+
+
+def test_bulk_screening_reports_unresolvable_resumes_and_screens_the_rest(client, text_service, screening_client):
+    text_service.texts.update({
+        "resumes/stored.pdf": "python stored",
+        "resumes/broken.pdf": ConnectionError("connection reset by peer"),
+    })
+
+    response = client.post("/api/v1/resume/screen/bulk", json={
+        "job_requirements": JOB,
+        "resumes": [
+            resume("inline.txt", content="python inline"),
+            resume("stored.pdf", blob_name="resumes/stored.pdf"),
+            resume("broken.pdf", blob_name="resumes/broken.pdf"),
+            resume("missing.pdf", blob_name="resumes/missing.pdf"),
+            resume("empty.txt"),
+        ]
+    })
+
+    assert response.status_code == 200
+    body = response.json()
+    errors = {item["filename"]: item["error"] for item in body["results"]}
+    assert errors == {
+        "inline.txt": None,
+        "stored.pdf": None,
+        "broken.pdf": "Blob storage is unreachable, could not load resume resumes/broken.pdf: connection reset by peer",
+        "missing.pdf": "Resume resumes/missing.pdf not found",
+        "empty.txt": "Resume empty.txt needs either content or blob_name",
+    }
+    assert sorted(screening_client.screened) == ["python inline", "python stored"]
+    assert (body["passed"], body["failed"]) == (2, 3)
+
+
+def screen(client, resume_data):
+    return client.post("/api/v1/resume/screen", json={"job_requirements": JOB, "resume": resume_data})
+
+
+def test_blob_name_is_replaced_by_its_extracted_text(client, text_service, screening_client):
+    text_service.texts["resumes/stored.pdf"] = "python stored"
+    assert screen(client, resume("stored.pdf", blob_name="resumes/stored.pdf")).status_code == 200
+    # Inline content wins over the blob
+    assert screen(client, resume("inline.txt", content="python inline", blob_name="resumes/stored.pdf")).status_code == 200
+    assert screening_client.screened == ["python stored", "python inline"]
+
+
+def test_resume_needs_content_or_a_known_blob(client, text_service, screening_client):
+    response = screen(client, resume("empty.txt", content="  "))
+    assert (response.status_code, response.json()["detail"]) == (400, "Resume empty.txt needs either content or blob_name")
+    response = screen(client, resume("missing.pdf", blob_name="resumes/missing.pdf"))
+    assert (response.status_code, response.json()["detail"]) == (404, "Resume resumes/missing.pdf not found")
+    assert screening_client.screened == []
+
+
+@pytest.mark.parametrize("error, status_code, detail", [
+    (ConnectionError("connection refused"), 503, "Blob storage is unreachable, could not load resume resumes/a.pdf: connection refused"),
+    (TimeoutError("read timed out"), 503, "Blob storage is unreachable, could not load resume resumes/a.pdf: read timed out"),
+    (RuntimeError("(AuthorizationFailure) not authorized"), 502, "Blob storage failed to return resume resumes/a.pdf: (AuthorizationFailure) not authorized"),
+])
+def test_storage_failures_map_to_gateway_errors(client, text_service, screening_client, error, status_code, detail):
+    text_service.texts["resumes/a.pdf"] = error
+    response = screen(client, resume("a.pdf", blob_name="resumes/a.pdf"))
+    assert (response.status_code, response.json()["detail"]) == (status_code, detail)
+
+
+def test_readiness_reports_optional_dependencies_without_failing(client, monkeypatch):
+    async def healthy():
+        return True, {}
+
+    async def down():
+        raise ConnectionError("storage unreachable")
+
+    monkeypatch.setattr(main.health_monitor, "probes", {"azure_openai": healthy, "azure_storage": down})
+    monkeypatch.setattr(main.health_monitor, "_checked_at", None)
+    assert client.get("/health/ready").status_code == 503
+
+    monkeypatch.setattr(main.health_monitor, "required", ["azure_openai"])
+    asyncio.run(main.health_monitor.refresh())
+    response = client.get("/health/ready")
+    body = response.json()
+    assert (response.status_code, body["status"]) == (200, "degraded")
+    assert body["services"]["azure_storage"]["details"] == {"error": "storage unreachable"}
+    assert "azure_storage" in body["dependencies"]
+
+    monkeypatch.setattr(main.health_monitor, "required", ["azure_openai", "azure_storage"])
+    assert client.get("/health/ready").status_code == 503
+
+
+def test_debug_endpoints_need_a_configured_token(client, monkeypatch):
+    monkeypatch.setattr("config.settings.debug", True)
+    monkeypatch.setattr("config.settings.debug_token", "")
+    response = client.get("/api/v1/debug/profiler")
+    assert (response.status_code, response.json()["detail"]) == (403, "Debug endpoints are disabled. Set DEBUG_TOKEN to enable them")
+
+    monkeypatch.setattr("config.settings.debug_token", "s3cret")
+    assert client.get("/api/v1/debug/profiler", headers={"X-Debug-Token": "wrong"}).status_code == 403
+    response = client.get("/api/v1/debug/profiler", headers={"X-Debug-Token": "s3cret"})
+    assert response.status_code == 200
+    assert response.json()["enabled"] is False and "worker_pid" in response.json()
+
+
+def test_traced_requests_return_their_trace(client, monkeypatch):
+    monkeypatch.setattr("config.settings.debug_token", "s3cret")
+    response = client.get("/health/live", headers={"X-Trace": "1"})
+    assert response.json()["status"] == "alive"
+    trace_id = response.headers["X-Trace-Id"]
+    assert response.json()["trace"]["trace_id"] == trace_id
+
+    assert client.get(f"/api/v1/debug/traces/{trace_id}").status_code == 403
+    stored = client.get(f"/api/v1/debug/traces/{trace_id}", headers={"X-Debug-Token": "s3cret"})
+    assert stored.status_code == 200 and stored.json()["trace_id"] == trace_id
@@ -0,0 +1,85 @@
+from datetime import date
+
+import pytest
+
+from resume_metadata_index import ResumeMetadataIndex, decode_cursor, encode_cursor
+from storage_client import resume_date_prefixes
+
+
+def record(blob_name, uploaded_at, content_hash=None):
+    return {
+        "blob_name": blob_name,
+        "original_filename": blob_name.split("/")[-1],
+        "content_type": "application/pdf",
+        "size": 100,
+        "uploaded_at": uploaded_at,
+        "content_hash": content_hash
+    }
+
+
+@pytest.fixture
+def index():
+    index = ResumeMetadataIndex(":memory:")
+    index.upsert_many([
+        record("resumes/a.pdf", "2024-01-01T09:00:00"),
+        record("resumes/b.pdf", "2024-01-02T09:00:00"),
+        record("resumes/c.pdf", "2024-01-02T09:00:00"),
+        record("resumes/d.pdf", "2024-01-02T18:30:00"),
+        record("resumes/e.pdf", "2024-01-03T09:00:00"),
+    ])
+    return index
+
+
+def all_pages(index, limit, **filters):
+    pages, cursor = [], None
+    while True:
+        records, cursor = index.page(limit, cursor, **filters)
+        pages.append([r["blob_name"][-5] for r in records])
+        if cursor is None:
+            return pages
+
+
+def test_pages_are_newest_first_with_ties_broken_by_blob_name(index):
+    assert all_pages(index, 2) == [["e", "d"], ["c", "b"], ["a"]]
+    assert all_pages(index, 5) == [["e", "d", "c", "b", "a"]]
+
+
+def test_pages_stay_stable_when_newer_resumes_arrive(index):
+    first, cursor = index.page(2)
+    index.upsert(record("resumes/f.pdf", "2024-01-04T09:00:00"))
+    second, _ = index.page(2, cursor)
+    assert [r["blob_name"] for r in second] == ["resumes/c.pdf", "resumes/b.pdf"]
+
+
+def test_bare_end_date_covers_the_whole_day(index):
+    assert all_pages(index, 10, uploaded_from="2024-01-02", uploaded_to="2024-01-02") == [["d", "c", "b"]]
+    assert index.count("2024-01-02", "2024-01-02") == 3
+    assert index.count(uploaded_to="2024-01-02T12:00:00") == 3
+    assert len(index) == 5
+
+
+def test_find_by_hash_returns_the_oldest_copy(index):
+    index.upsert(record("resumes/x.pdf", "2024-02-01T00:00:00", "h1"))
+    index.upsert(record("resumes/y.pdf", "2024-01-15T00:00:00", "h1"))
+    assert index.find_by_hash("h1")["blob_name"] == "resumes/y.pdf"
+    assert index.find_by_hash("h2") is None
+    assert index.remove("resumes/y.pdf")
+    assert not index.remove("resumes/y.pdf")
+    assert index.find_by_hash("h1")["blob_name"] == "resumes/x.pdf"
+
+
+def test_cursors_round_trip_and_reject_garbage(index):
+    assert decode_cursor(encode_cursor({"u": "2024-01-01", "b": "x"})) == {"u": "2024-01-01", "b": "x"}
+    for cursor in ("not-base64!", encode_cursor({"u": "2024-01-01"}), "WzFd"):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            index.page(2, cursor)
+
+
+def test_date_prefixes_collapse_whole_months_and_years():
+    assert resume_date_prefixes(date(2024, 2, 28), date(2024, 3, 2)) == [
+        "resumes/2024/03/02/", "resumes/2024/03/01/", "resumes/2024/02/29/", "resumes/2024/02/28/"
+    ]
+    assert resume_date_prefixes(date(2023, 11, 30), date(2024, 2, 29)) == [
+        "resumes/2024/02/", "resumes/2024/01/", "resumes/2023/12/", "resumes/2023/11/30/"
+    ]
+    assert resume_date_prefixes(date(2022, 12, 31), date(2023, 12, 31)) == ["resumes/2023/", "resumes/2022/12/31/"]
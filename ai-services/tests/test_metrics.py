@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+
+from metrics import AI_RETRIES, bind_limiter, render_latest, stage_timer
+
+
+def stage_count(stage, operation):
+    return REGISTRY.get_sample_value(
+        "peoplenexus_ai_stage_seconds_count", {"stage": stage, "operation": operation}
+    ) or 0.0
+
+
+def test_stage_timer_observes_the_block_even_when_it_raises():
+    before = stage_count("test_stage", "rank")
+    with stage_timer("test_stage", "rank"):
+        pass
+    with pytest.raises(RuntimeError):
+        with stage_timer("test_stage", "rank"):
+            raise RuntimeError("upstream failed")
+    assert stage_count("test_stage", "rank") == before + 2
+    assert stage_count("test_stage", "screen") == 0.0
+
+
+def test_limiter_gauges_read_live_state():
+    limiter = SimpleNamespace(in_flight=3, queued=7, limit=12.6)
+    bind_limiter(limiter)
+    assert REGISTRY.get_sample_value("peoplenexus_ai_in_flight") == 3
+    assert REGISTRY.get_sample_value("peoplenexus_ai_queued") == 7
+    assert REGISTRY.get_sample_value("peoplenexus_ai_concurrency_limit") == 12
+
+    limiter.in_flight = 0
+    assert REGISTRY.get_sample_value("peoplenexus_ai_in_flight") == 0
+
+
+def test_exposition_includes_counters():
+    AI_RETRIES.labels(operation="test").inc()
+    text = render_latest().decode("utf-8")
+    assert 'peoplenexus_ai_retries_total{operation="test"}' in text
+    assert "# TYPE peoplenexus_ai_stage_seconds histogram" in text
@@ -0,0 +1,215 @@
+import asyncio
+
+from models import ResumeData
+from ranking_jobs import RankingJobManager, RankingJobStore
+from resume_ranker import ResumeRanker
+
+JOB = {
+    "title": "Backend Engineer",
+    "description": "Build APIs",
+    "required_skills": ["python"],
+    "preferred_skills": [],
+    "experience_years": None,
+    "education_level": None
+}
+
+
+def analysis(score):
+    return {
+        "overall_score": score,
+        "breakdown": {"skills_match": score, "experience": score, "education": score, "overall_fit": score},
+        "reasoning": "ok"
+    }
+
+
+class FakeAIClient:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.single_calls = 0
+        self.batch_calls = []
+
+    async def analyze_resume_for_ranking(self, content, job):
+        self.single_calls += 1
+        await asyncio.sleep(self.delay)
+        return analysis(float(len(content)))
+
+    async def analyze_resumes_batch_for_ranking(self, contents, job):
+        self.batch_calls.append(len(contents))
+        await asyncio.sleep(self.delay)
+        return [analysis(float(len(content))) for content in contents]
+
+
+def resumes(count):
+    return [ResumeData(filename=f"r{i}.txt", content="python " * (i + 1), format="text") for i in range(count)]
+
+
+async def wait_for_completion(store, job_id, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        job = await asyncio.to_thread(store.get_job, job_id)
+        if job["status"] == "completed":
+            return job
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not complete")
+
+
+def test_job_completes_and_ranks_by_score(tmp_path):
+    async def scenario():
+        store = RankingJobStore(str(tmp_path / "jobs.sqlite3"))
+        manager = RankingJobManager(store, ResumeRanker(FakeAIClient()), workers=2, lease_seconds=5)
+        await manager.start()
+        try:
+            job_id = await manager.submit(resumes(5), JOB, batch_mode=False)
+            job = await wait_for_completion(store, job_id)
+        finally:
+            await manager.stop()
+        assert job["completed"] == 5 and job["failed"] == 0
+        assert [row["filename"] for row in store.results_page(job_id, 0, 10)] == ["r4.txt", "r3.txt", "r2.txt", "r1.txt", "r0.txt"]
+
+    asyncio.run(scenario())
+
+
+def test_batch_mode_scores_several_resumes_per_call(tmp_path, monkeypatch):
+    monkeypatch.setattr("config.settings.ranking_batch_max_resumes", 3)
+
+    async def scenario():
+        store = RankingJobStore(str(tmp_path / "jobs.sqlite3"))
+        ai_client = FakeAIClient()
+        manager = RankingJobManager(store, ResumeRanker(ai_client), workers=1, lease_seconds=5)
+        await manager.start()
+        try:
+            job_id = await manager.submit(resumes(7), JOB, batch_mode=True)
+            await wait_for_completion(store, job_id)
+        finally:
+            await manager.stop()
+        assert store.get_job(job_id)["batch_mode"] is True
+        # The last resume is claimed alone and scored with a single call
+        assert ai_client.batch_calls == [3, 3]
+        assert ai_client.single_calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_live_worker_reclaims_resumes_of_a_dead_one(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+
+    async def scenario():
+        dead = RankingJobManager(RankingJobStore(path), ResumeRanker(FakeAIClient(delay=60)), workers=2, lease_seconds=1)
+        await dead.start()
+        job_id = await dead.submit(resumes(4), JOB, batch_mode=False)
+        await asyncio.sleep(0.1)
+        # The worker dies mid-call: its tasks stop without handing the leases back
+        for task in dead._tasks:
+            task.cancel()
+        await asyncio.gather(*dead._tasks, return_exceptions=True)
+
+        store = RankingJobStore(path)
+        leased = store._conn.execute(
+            "SELECT COUNT(*) FROM ranking_job_resumes WHERE lease_owner = ?", (dead.owner,)
+        ).fetchone()[0]
+        assert leased == 2
+
+        live = RankingJobManager(store, ResumeRanker(FakeAIClient()), workers=2, lease_seconds=1)
+        await live.start()
+        try:
+            job = await wait_for_completion(store, job_id)
+        finally:
+            await live.stop()
+        assert job["completed"] == 4 and job["failed"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_heartbeat_keeps_long_calls_leased(tmp_path):
+    async def scenario():
+        store = RankingJobStore(str(tmp_path / "jobs.sqlite3"))
+        ai_client = FakeAIClient(delay=1.5)
+        manager = RankingJobManager(store, ResumeRanker(ai_client), workers=1, lease_seconds=1)
+        await manager.start()
+        other = RankingJobStore(str(tmp_path / "jobs.sqlite3"))
+        try:
+            job_id = await manager.submit(resumes(1), JOB, batch_mode=False)
+            await asyncio.sleep(1.2)
+            # Past the first lease, but renewed by the heartbeat
+            assert await asyncio.to_thread(other.claim_work, "other", 1, 1) == []
+            await wait_for_completion(store, job_id)
+        finally:
+            await manager.stop()
+        assert ai_client.single_calls == 1
+
+    asyncio.run(scenario())
+
+
+class FakeTexts:
+    """Resume text by blob name; a stored exception is raised"""
+
+    def __init__(self, texts, delay=0.0):
+        self.texts = texts
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, blob_name):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        text = self.texts.get(blob_name)
+        if isinstance(text, Exception):
+            raise text
+        return text
+
+
+def blob_resume(name):
+    return ResumeData(filename=f"{name}.pdf", format="pdf", blob_name=f"resumes/{name}.pdf")
+
+
+def test_workers_load_blob_resumes_and_fail_only_unloadable_ones(tmp_path):
+    texts = FakeTexts({"resumes/a.pdf": "python " * 3, "resumes/broken.pdf": ConnectionError("connection reset")})
+
+    async def scenario():
+        store = RankingJobStore(str(tmp_path / "jobs.sqlite3"))
+        manager = RankingJobManager(store, ResumeRanker(FakeAIClient()), workers=2, lease_seconds=5, resolve_text=texts)
+        await manager.start()
+        try:
+            job_id = await manager.submit(
+                resumes(1) + [blob_resume("a"), blob_resume("broken"), blob_resume("missing")], JOB, batch_mode=False
+            )
+            job = await wait_for_completion(store, job_id)
+        finally:
+            await manager.stop()
+        assert job["completed"] == 4 and job["failed"] == 2
+        reasoning = {row["filename"]: row["analysis"]["reasoning"] for row in store.results_page(job_id, 0, 10)}
+        assert reasoning["a.pdf"] == "ok" and reasoning["r0.txt"] == "ok"
+        assert reasoning["broken.pdf"] == "Analysis failed: Could not load resume resumes/broken.pdf: connection reset"
+        assert reasoning["missing.pdf"] == "Analysis failed: Resume resumes/missing.pdf not found"
+
+    asyncio.run(scenario())
+
+
+def test_prefilter_waits_for_every_blob_text(tmp_path, monkeypatch):
+    monkeypatch.setattr("config.settings.ranking_batch_max_resumes", 4)
+    texts = FakeTexts({f"resumes/{i}.pdf": "python " * (i + 1) if i in (3, 5) else "java" for i in range(8)}, delay=0.05)
+
+    async def scenario():
+        store = RankingJobStore(str(tmp_path / "jobs.sqlite3"))
+        ai_client = FakeAIClient()
+        manager = RankingJobManager(
+            store, ResumeRanker(ai_client), workers=3, lease_seconds=5, resolve_text=texts, resolve_concurrency=2
+        )
+        await manager.start()
+        try:
+            job_id = await manager.submit([blob_resume(str(i)) for i in range(8)], JOB, prefilter_top_k=2, batch_mode=True)
+            assert store.get_job(job_id)["status"] == "resolving"
+            job = await wait_for_completion(store, job_id)
+        finally:
+            await manager.stop()
+        assert job["completed"] == 8 and job["failed"] == 0
+        # Only the two best keyword matches reached the AI, in one batch
+        assert ai_client.batch_calls == [2] and ai_client.single_calls == 0
+        assert [row["filename"] for row in store.results_page(job_id, 0, 2)] == ["5.pdf", "3.pdf"]
+        assert texts.max_active == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,61 @@
+from request_hedging import HedgeBudget, LatencyWindow, RequestHedger
+
+
+def test_latency_window_nearest_rank_percentile():
+    window = LatencyWindow(100)
+    assert window.percentile(95) is None
+    for ms in range(1, 101):
+        window.add(ms / 1000)
+    assert window.percentile(95) == 0.095
+    assert window.percentile(50) == 0.05
+    assert window.percentile(100) == 0.1
+
+
+def test_latency_window_keeps_the_most_recent_samples():
+    window = LatencyWindow(3)
+    for seconds in (9.0, 1.0, 2.0, 3.0):
+        window.add(seconds)
+    assert len(window) == 3
+    assert window.percentile(100) == 3.0
+
+
+def test_budget_earns_a_share_of_primary_cost_up_to_the_burst():
+    budget = HedgeBudget(ratio=0.1, burst_tokens=500)
+    budget.earn(2000)
+    assert not budget.try_spend(300)
+    assert budget.try_spend(200)
+    assert budget.credit == 0
+
+    for _ in range(100):
+        budget.earn(2000)
+    assert budget.credit == 500
+    assert not budget.try_spend(600)
+
+    assert budget.try_spend(400)
+    budget.refund(400)
+    assert budget.credit == 500
+
+
+def test_no_hedging_until_enough_samples():
+    hedger = RequestHedger(percentile=90, min_delay_seconds=0.0, min_samples=5)
+    for _ in range(4):
+        hedger.record_primary("rank", 1.0, 100)
+    assert hedger.delay_for("rank") is None
+    hedger.record_primary("rank", 3.0, 100)
+    assert hedger.delay_for("rank") == 3.0
+    # Operations keep separate histories
+    assert hedger.delay_for("screen") is None
+
+
+def test_delay_never_goes_below_the_minimum():
+    hedger = RequestHedger(percentile=95, min_delay_seconds=0.5, min_samples=1)
+    hedger.record_primary("rank", 0.1, 100)
+    assert hedger.delay_for("rank") == 0.5
+
+
+def test_stats_report_delays_and_budget():
+    hedger = RequestHedger(percentile=50, min_delay_seconds=0.0, min_samples=1, budget_ratio=0.5, budget_burst_tokens=1000)
+    hedger.record_primary("rank", 1.25, 400)
+    stats = hedger.stats()
+    assert stats["delay_seconds"] == {"rank": 1.25}
+    assert stats["budget_credit_tokens"] == 200
@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+import pytest
+
+from metrics import observe_stage
+from profiler import RequestProfiler
+from request_trace import TraceStore, current_trace, record_span, span, span_attributes, start_trace
+
+
+def run_traced(work):
+    """Run work() in a fresh context, like one request, and return its trace"""
+    async def request():
+        trace = start_trace("POST", "/api/v1/resume/rank")
+        await work()
+        trace.finish()
+        return trace
+    return asyncio.run(request())
+
+
+def test_spans_are_only_recorded_inside_a_traced_request():
+    record_span("ignored", 0.01)
+    assert current_trace() is None
+
+    async def work():
+        with span("prompt_build", operation="rank"):
+            pass
+        observe_stage("upstream", "rank", 0.25, attempt=1)
+
+    trace = run_traced(work).to_dict()
+    assert trace["complete"]
+    # Spans are ordered by start: the 250 ms upstream span began first
+    assert [(s["name"], s["operation"]) for s in trace["spans"]] == [("upstream", "rank"), ("prompt_build", "rank")]
+    assert trace["spans"][0]["duration_ms"] == 250.0
+    assert trace["spans"][0]["attempt"] == 1
+
+
+def test_span_attributes_reach_nested_calls_and_concurrent_tasks_stay_apart():
+    async def score(filename):
+        with span_attributes(resume=filename):
+            await asyncio.sleep(0)
+            record_span("parse", 0.001)
+
+    async def work():
+        await asyncio.gather(score("a.pdf"), score("b.pdf"))
+        record_span("summary", 0.001)
+
+    spans = run_traced(work).to_dict()["spans"]
+    assert sorted((s["name"], s.get("resume")) for s in spans) == [("parse", "a.pdf"), ("parse", "b.pdf"), ("summary", None)]
+
+
+def test_traces_cap_their_spans(monkeypatch):
+    monkeypatch.setattr("request_trace.MAX_SPANS_PER_TRACE", 3)
+
+    async def work():
+        for _ in range(5):
+            record_span("parse", 0.001)
+
+    trace = run_traced(work).to_dict()
+    assert len(trace["spans"]) == 3
+    assert trace["dropped_spans"] == 2
+
+
+def test_trace_store_keeps_the_most_recent_traces():
+    store = TraceStore(max_traces=2)
+    traces = [start_trace("GET", f"/{i}") for i in range(3)]
+    for trace in traces:
+        store.add(trace)
+    assert store.get(traces[0].trace_id) is None
+    assert store.get(traces[2].trace_id) is traces[2]
+
+
+def test_profiler_is_off_until_configured_and_validates_settings():
+    profiler = RequestProfiler()
+    assert not profiler.should_profile("/api/v1/resume/rank")
+    with pytest.raises(ValueError, match="Unknown profiler mode"):
+        profiler.configure(True, mode="perf")
+    assert not profiler.enabled
+
+    settings = profiler.configure(True, mode="cprofile", sample_rate=5, paths=["/api/v1/resume/screen"], interval_ms=0)
+    assert settings == {"enabled": True, "mode": "cprofile", "sample_rate": 1.0, "paths": ["/api/v1/resume/screen"], "interval_ms": 1.0}
+    assert profiler.should_profile("/api/v1/resume/screen/bulk")
+    assert not profiler.should_profile("/api/v1/resume/rank")
+
+
+@pytest.mark.parametrize("mode, marker", [("cprofile", "function calls"), ("stack", "samples every")])
+def test_profiler_captures_one_request_at_a_time(mode, marker):
+    profiler = RequestProfiler()
+    profiler.configure(True, mode=mode, interval_ms=1)
+
+    async def scenario():
+        async with profiler.capture("POST", "/api/v1/resume/rank"):
+            assert not profiler.should_profile("/api/v1/resume/rank")
+            # A second capture while one is running is skipped
+            async with profiler.capture("POST", "/api/v1/resume/rank"):
+                time.sleep(0.02)
+
+    asyncio.run(scenario())
+    profiles = profiler.list_profiles()
+    assert len(profiles) == 1
+    assert profiles[0]["mode"] == mode
+    assert "output" not in profiles[0]
+    assert marker in profiler.get_profile(profiles[0]["profile_id"])["output"]
+    assert profiler.should_profile("/api/v1/resume/rank")
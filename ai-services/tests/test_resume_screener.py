@@ -0,0 +1,84 @@
+import asyncio
+
+from models import ResumeData
+from resume_screener import ResumeScreener
+
+JOB = {
+    "title": "Backend Engineer",
+    "description": "Build APIs",
+    "required_skills": ["python"],
+    "preferred_skills": [],
+    "experience_years": 2,
+    "education_level": None
+}
+
+
+def screening(score, red_flags=False):
+    return {
+        "passed": False,
+        "overall_score": score,
+        "breakdown": {"red_flags": {"found": red_flags, "issues": []}},
+        "recommendations": [],
+        "red_flags": [],
+        "strengths": []
+    }
+
+
+class FakeScreeningClient:
+    """Screening answers keyed by the last word of the resume; exceptions are raised"""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.jobs = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def screen_resume(self, content, job):
+        self.jobs.add(id(job))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            answer = self.answers[content.split()[-1]]
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+        finally:
+            self.in_flight -= 1
+
+
+def resume(key, content=None):
+    return ResumeData(filename=f"{key}.txt", content=f"python {key}" if content is None else content, format="text")
+
+
+def test_bulk_screening_reports_failures_per_resume(monkeypatch):
+    monkeypatch.setattr("config.settings.screening_bulk_concurrency", 2)
+
+    async def scenario():
+        client = FakeScreeningClient({
+            "a": screening(80),
+            "b": screening(40),
+            "c": RuntimeError("429 Too Many Requests"),
+            "d": ValueError("unparseable answer"),
+            "e": screening(70, red_flags=True),
+        })
+        pool = [resume("a"), resume("b"), resume("c"), resume("d"), resume("e"), resume("f", content="  "), resume("g")]
+        response = await ResumeScreener(client).screen_resumes(pool, JOB, failed={6: "Resume resumes/g.pdf not found"})
+
+        items = {item.filename: item for item in response.results}
+        assert [item.index for item in response.results] == list(range(7))
+        assert items["a.txt"].result.passed and not items["b.txt"].result.passed
+        assert not items["e.txt"].result.passed
+        assert items["c.txt"].error == "Error screening resume: 429 Too Many Requests"
+        assert items["c.txt"].retryable
+        assert items["d.txt"].error == "Error screening resume: unparseable answer"
+        assert not items["d.txt"].retryable
+        assert items["f.txt"].error == "Resume content cannot be empty"
+        assert items["g.txt"].error == "Resume resumes/g.pdf not found"
+        assert (response.total_resumes, response.passed, response.failed) == (7, 1, 4)
+
+        # One compiled prompt for the whole request, bounded concurrency
+        assert len(client.jobs) == 1
+        assert client.max_in_flight == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,141 @@
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from search_index import ResumeSearchIndex, build_job_query, tokenize
+
+WORDS = ["python", "java", "docker", "kubernetes", "sql", "react", "aws", "go", "rust", "c++", "node.js", "team", "lead"]
+
+
+def reference_scores(docs, query, k1=1.2, b=0.75):
+    """Plain BM25 over every document, for comparison"""
+    tfs = {name: Counter(tokenize(text)) for name, text in docs.items()}
+    n_docs = len(tfs)
+    avgdl = (sum(sum(tf.values()) for tf in tfs.values()) / n_docs) or 1.0
+    df = Counter(term for tf in tfs.values() for term in tf)
+    scores = {}
+    for name, tf in tfs.items():
+        norm = k1 * (1 - b + b * sum(tf.values()) / avgdl)
+        score = 0.0
+        for term, weight in query.items():
+            if df[term] and tf[term]:
+                idf = math.log1p((n_docs - df[term] + 0.5) / (df[term] + 0.5))
+                score += weight * idf * tf[term] * (k1 + 1) / (tf[term] + norm)
+        if score > 0:
+            scores[name] = round(score, 4)
+    return scores
+
+
+def random_docs(rng, count, prefix="r"):
+    return {f"{prefix}{i}.pdf": " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 30))) for i in range(count)}
+
+
+def as_scores(results):
+    return {hit["blob_name"]: hit["score"] for hit in results}
+
+
+def assert_matches_reference(index, docs, query):
+    expected = reference_scores(docs, query)
+    actual = as_scores(index.search(query, top_n=len(docs) + 1))
+    assert actual.keys() == expected.keys()
+    for name, score in expected.items():
+        assert actual[name] == pytest.approx(score, rel=1e-4, abs=1e-4)
+
+
+def test_tokenize_keeps_tech_names():
+    assert tokenize("C++, C# and Node.js. Go!") == ["c++", "c#", "and", "node.js", "go"]
+
+
+def test_build_job_query_weights():
+    query = build_job_query({"required_skills": ["Kubernetes"], "preferred_skills": ["Python"], "title": "Platform Engineer", "description": "platform work"})
+    assert query["kubernetes"] == 3.0
+    assert query["k8s"] == 1.5
+    assert query["python"] == 1.5
+    assert query["python3"] == 0.75
+    assert query["platform"] == 1.0
+    assert query["work"] == 0.25
+
+
+def test_scores_match_plain_bm25_across_base_and_delta():
+    rng = random.Random(7)
+    docs = random_docs(rng, 60)
+    index = ResumeSearchIndex(merge_min_docs=10_000)
+    for name, text in list(docs.items())[:40]:
+        index.add(name, text)
+    index._merge()
+    for name, text in list(docs.items())[40:]:
+        index.add(name, text)
+
+    # Re-index some base documents and drop others
+    for name in list(docs)[:5]:
+        docs[name] = "python python docker lead"
+        index.add(name, docs[name])
+    for name in list(docs)[5:10]:
+        assert index.remove(name)
+        del docs[name]
+    assert not index.remove("missing.pdf")
+
+    query = {"python": 3.0, "docker": 1.5, "lead": 0.25, "unknown": 1.0}
+    assert len(index) == len(docs)
+    assert_matches_reference(index, docs, query)
+
+    index._merge()
+    assert not index._delta
+    assert_matches_reference(index, docs, query)
+
+
+def test_search_edge_cases():
+    index = ResumeSearchIndex()
+    assert index.search({"python": 1.0}) == []
+    index.add("a.pdf", "python")
+    index.add("b.pdf", "java")
+    assert index.search({"python": 1.0}, top_n=0) == []
+    assert index.search({"cobol": 1.0}) == []
+    assert [hit["blob_name"] for hit in index.search({"python": 1.0, "java": 2.0}, top_n=1)] == ["b.pdf"]
+
+
+def test_log_is_replayed_on_startup(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    index = ResumeSearchIndex(path)
+    index.add("a.pdf", "python docker")
+    index.add("b.pdf", "java")
+    index.add("a.pdf", "python rust")
+    index.remove("b.pdf")
+
+    reloaded = ResumeSearchIndex(path)
+    assert len(reloaded) == 1
+    assert reloaded.search({"rust": 1.0})[0]["blob_name"] == "a.pdf"
+    assert reloaded.search({"docker": 1.0}) == []
+
+
+def test_torn_log_tail_is_ignored(tmp_path):
+    path = tmp_path / "index.jsonl"
+    ResumeSearchIndex(str(path)).add("a.pdf", "python")
+    with open(path, "ab") as f:
+        f.write(b'{"op": "add", "blob_name": "b.pdf", "tf": {"ja')
+
+    index = ResumeSearchIndex(str(path))
+    assert len(index) == 1
+    index.add("c.pdf", "java")
+    assert len(ResumeSearchIndex(str(path))) == 2
+
+
+def test_workers_sharing_a_log_see_each_other(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    first = ResumeSearchIndex(path)
+    second = ResumeSearchIndex(path)
+
+    first.add("a.pdf", "python")
+    assert second.search({"python": 1.0})[0]["blob_name"] == "a.pdf"
+    second.add("b.pdf", "python python")
+    second.remove("a.pdf")
+    assert [hit["blob_name"] for hit in first.search({"python": 1.0})] == ["b.pdf"]
+
+    # A compaction by one worker replaces the file under the other
+    with second._lock, second._log_lock():
+        second._compact()
+    first.add("c.pdf", "java")
+    assert second.search({"java": 1.0})[0]["blob_name"] == "c.pdf"
+    assert len(first) == len(second) == 2
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from shared_limiter import RedisLimiterBackend, SharedRateLimiter, SqliteLimiterBackend
+
+
+@pytest.fixture
+def redis_backend(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    import redis.asyncio
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.asyncio, "from_url", lambda url: fakeredis.FakeAsyncRedis(server=server))
+    return RedisLimiterBackend("redis://test", "test-limiter")
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        return SqliteLimiterBackend(str(tmp_path / "limiter.sqlite3"))
+    return request.getfixturevalue("redis_backend")
+
+
+async def call(backend, method, *args):
+    result = getattr(backend, method)(*args)
+    if asyncio.iscoroutine(result):
+        result = await result
+    return result
+
+
+def test_concurrency_cap_and_release(backend):
+    async def scenario():
+        assert (await call(backend, "try_acquire", 2, 0, 100, "a", 60))[0]
+        assert (await call(backend, "try_acquire", 2, 0, 100, "b", 60))[0]
+        assert not (await call(backend, "try_acquire", 2, 0, 100, "c", 60))[0]
+        assert (await call(backend, "stats"))["in_flight"] == 2
+
+        await call(backend, "release", "a")
+        assert (await call(backend, "try_acquire", 2, 0, 100, "c", 60))[0]
+
+    asyncio.run(scenario())
+
+
+def test_expired_leases_free_their_slots(backend):
+    async def scenario():
+        assert (await call(backend, "try_acquire", 1, 0, 100, "crashed", 0.05))[0]
+        assert not (await call(backend, "try_acquire", 1, 0, 100, "next", 60))[0]
+        await asyncio.sleep(0.1)
+        assert (await call(backend, "try_acquire", 1, 0, 100, "next", 60))[0]
+
+    asyncio.run(scenario())
+
+
+def test_token_bucket_charges_and_reports_wait(backend):
+    async def scenario():
+        assert (await call(backend, "try_acquire", 0, 600, 500, "a", 60))[0]
+        granted, wait = await call(backend, "try_acquire", 0, 600, 500, "b", 60)
+        assert not granted
+        # 100 tokens left, 400 more at 10 tokens/second
+        assert 39 < wait <= 40
+
+        # The first call used less than estimated: the difference is refunded
+        await call(backend, "adjust_tokens", 450)
+        assert (await call(backend, "try_acquire", 0, 600, 500, "b", 60))[0]
+
+    asyncio.run(scenario())
+
+
+def test_pause_holds_every_admission(backend):
+    async def scenario():
+        assert (await call(backend, "try_acquire", 4, 0, 1, "a", 60))[0]
+        await call(backend, "pause", 2.0)
+        # A shorter pause never cuts a longer one short
+        await call(backend, "pause", 0.5)
+        granted, wait = await call(backend, "try_acquire", 4, 0, 1, "b", 60)
+        assert not granted
+        assert 1.5 < wait <= 2.0
+        assert (await call(backend, "stats"))["paused_for_seconds"] > 1.5
+
+    asyncio.run(scenario())
+
+
+def test_shared_limiter_caps_concurrent_calls(backend):
+    async def scenario():
+        limiter = SharedRateLimiter(backend, max_concurrency=3, tokens_per_minute=0, lease_seconds=60)
+        in_flight = 0
+        peak = 0
+
+        async def work():
+            nonlocal in_flight, peak
+            lease = await limiter.acquire(10)
+            try:
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.02)
+            finally:
+                in_flight -= 1
+                await limiter.release(lease)
+
+        await asyncio.gather(*[work() for _ in range(12)])
+        assert peak == 3
+        assert (await limiter.stats())["in_flight"] == 0
+        await limiter.close()
+
+    asyncio.run(scenario())
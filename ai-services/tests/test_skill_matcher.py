@@ -0,0 +1,74 @@
+from models import ResumeData
+from resume_ranker import ResumeRanker
+from skill_matcher import SkillMatcher, get_skill_matcher
+
+
+def test_finds_skills_and_synonyms_case_insensitively():
+    matcher = SkillMatcher(["Python", "Kubernetes", "Node.js"], ["Machine Learning"])
+    found = matcher.find_skills("Shipped PYTHON3 services on K8s with NodeJS; some ML work")
+    assert found == {"Python", "Kubernetes", "Node.js", "Machine Learning"}
+
+
+def test_only_whole_words_match():
+    matcher = SkillMatcher(["Go", "SQL", "Java"], [])
+    assert matcher.find_skills("Good with NoSQL, javascript and gopher tooling") == set()
+    assert matcher.find_skills("go, sql/java") == {"Go", "SQL", "Java"}
+
+
+def test_overlapping_terms_are_all_found():
+    # "react" ends inside "react.js", and "sql" ends inside "postgresql"
+    matcher = SkillMatcher(["React", "PostgreSQL", "SQL"], [])
+    assert matcher.find_skills("react.js frontends over postgresql") == {"React", "PostgreSQL", "SQL"}
+
+
+def test_blank_skills_are_ignored():
+    matcher = SkillMatcher(["Python", " ", ""], None)
+    assert matcher.required_skills == ["Python"]
+    assert matcher.preferred_skills == []
+
+
+def test_score_weights_required_preferred_and_experience():
+    matcher = SkillMatcher(["Python", "Docker"], ["AWS", "Terraform"])
+    result = matcher.score("Python and AWS, 3 years of experience", experience_years=6)
+    assert result["matched_required"] == ["Python"]
+    assert result["matched_preferred"] == ["AWS"]
+    assert result["years_found"] == 3
+    # skills: 0.75 * 0.5 + 0.25 * 0.5; experience: 3 / 6
+    assert result["skills_match"] == 50.0
+    assert result["experience"] == 50.0
+    assert result["score"] == 50.0
+
+
+def test_score_without_required_experience():
+    matcher = SkillMatcher(["Python"], [])
+    assert matcher.score("python, 10+ yrs")["experience"] == 100.0
+    assert matcher.score("python")["experience"] == 50.0
+    assert matcher.score("python")["skills_match"] == 75.0
+
+
+def test_matchers_are_cached_per_skill_set():
+    job = {"required_skills": ["Python"], "preferred_skills": ["AWS"], "title": "A"}
+    same_skills = {"required_skills": ["Python"], "preferred_skills": ["AWS"], "title": "B"}
+    assert get_skill_matcher(job) is get_skill_matcher(same_skills)
+    assert get_skill_matcher(job) is not get_skill_matcher({"required_skills": ["Go"]})
+
+
+def test_prefilter_keeps_top_k_in_original_order():
+    resumes = [
+        ResumeData(filename="none.txt", content="cooking", format="text"),
+        ResumeData(filename="both.txt", content="python docker", format="text"),
+        ResumeData(filename="one.txt", content="python", format="text"),
+    ]
+    job = {"required_skills": ["Python", "Docker"], "preferred_skills": []}
+    ranker = ResumeRanker(ai_client=object())
+
+    shortlisted, rejected = ranker._prefilter(resumes, job, top_k=2, min_score=None)
+    assert [r.filename for r in shortlisted] == ["both.txt", "one.txt"]
+    assert [i for i, _ in rejected] == [0]
+
+    shortlisted, rejected = ranker._prefilter(resumes, job, top_k=None, min_score=50)
+    assert [r.filename for r in shortlisted] == ["both.txt"]
+    assert [i for i, _ in rejected] == [2, 0]
+
+    shortlisted, rejected = ranker._prefilter(resumes, job, top_k=None, min_score=None)
+    assert len(shortlisted) == 3 and rejected == []
@@ -0,0 +1,64 @@
+import asyncio
+import base64
+import re
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from storage_client import AsyncAzureBlobStorageClient, generate_resume_sas_token
+
+ACCOUNT_KEY = base64.b64encode(b"not-a-real-key").decode("ascii")
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    monkeypatch.setattr("config.settings.azure_storage_connection_string", "")
+    monkeypatch.setattr("config.settings.azure_storage_account_name", "peoplenexus")
+    monkeypatch.setattr("config.settings.azure_storage_account_key", ACCOUNT_KEY)
+    monkeypatch.setattr("config.settings.azure_storage_container_name", "resumes")
+    return AsyncAzureBlobStorageClient()
+
+
+def test_credentials_are_required(monkeypatch):
+    monkeypatch.setattr("config.settings.azure_storage_connection_string", "")
+    monkeypatch.setattr("config.settings.azure_storage_account_name", "")
+    with pytest.raises(ValueError, match="connection string or account name/key"):
+        AsyncAzureBlobStorageClient()
+
+
+def test_blob_names_are_partitioned_by_upload_day(storage):
+    name = storage.new_resume_blob_name("Jane Doe.PDF")
+    assert re.fullmatch(rf"resumes/{datetime.now():%Y/%m/%d}/[0-9a-f-]{{36}}\.pdf", name)
+    assert storage.new_resume_blob_name("Jane Doe.PDF") != name
+
+
+def test_filenames_are_percent_encoded_for_blob_metadata():
+    metadata = AsyncAzureBlobStorageClient._resume_metadata("Renée Doe.pdf", {"content_sha256": "abc"})
+    assert metadata == {"content_sha256": "abc", "original_filename": "Ren%C3%A9e%20Doe.pdf"}
+
+
+def test_sas_token_is_read_only_and_computed_locally():
+    token = generate_resume_sas_token("peoplenexus", ACCOUNT_KEY, "resumes", "resumes/a.pdf", expires_in_hours=1)
+    query = parse_qs(token)
+    assert query["sp"] == ["r"]
+    assert query["sr"] == ["b"]
+    assert "sig" in query
+    assert generate_resume_sas_token("peoplenexus", "not base64!", "resumes", "resumes/a.pdf") is None
+
+
+def test_sdk_client_is_built_on_first_use_and_closed_with_its_session(storage):
+    async def scenario():
+        assert storage.container_client is None
+        url = urlsplit(storage.get_resume_url("resumes/2024/01/02/a.pdf"))
+        assert (url.netloc, url.path) == ("peoplenexus.blob.core.windows.net", "/resumes/resumes/2024/01/02/a.pdf")
+        assert parse_qs(url.query)["sp"] == ["r"]
+
+        session = storage._session
+        assert storage._ensure_client() is storage.container_client
+        assert storage._session is session
+        await storage.close()
+        assert session.closed
+        assert storage.container_client is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,131 @@
+import json
+
+import pytest
+
+from structured_output import (
+    RankingAnalysis, ScreeningAnalysis, StructuredOutputError, load_json, parse_batch_ranking, parse_model_output
+)
+
+ANALYSIS = {
+    "overall_score": 82,
+    "breakdown": {"skills_match": 90, "experience": 80, "education": 70, "overall_fit": 85},
+    "reasoning": "Strong backend background"
+}
+
+
+def batch_entry(resume_id, score):
+    return {**ANALYSIS, "resume_id": resume_id, "overall_score": score}
+
+
+def test_strict_json():
+    assert load_json(json.dumps(ANALYSIS)) == (ANALYSIS, "strict")
+
+
+def test_fenced_json_with_prose():
+    text = f"Here is the analysis:\n```json\n{json.dumps(ANALYSIS)}\n```\nLet me know if you need more."
+    assert load_json(text) == (ANALYSIS, "extracted")
+
+
+def test_stray_braces_before_the_object_are_skipped():
+    text = "Scores use the {0-100} scale. " + json.dumps(ANALYSIS)
+    assert load_json(text) == (ANALYSIS, "extracted")
+
+
+def test_repairs_python_style_output():
+    text = "{'passed': True, 'notes': None, 'tags': ['a', 'b',], 'quote': 'it\\'s \"fine\"',}"
+    value, method = load_json(text)
+    assert method == "repaired"
+    assert value == {"passed": True, "notes": None, "tags": ["a", "b"], "quote": "it's \"fine\""}
+
+
+def test_repairs_smart_quotes():
+    value, method = load_json("{“score”: 5}")
+    assert (value, method) == ({"score": 5}, "repaired")
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1, "b": [1, 2', {"a": 1, "b": [1, 2]}),
+    ('{"a": 1, "reasoning": "cut off mid', {"a": 1, "reasoning": "cut off mid"}),
+    ('{"a": 1, "b":', {"a": 1}),
+    ('{"a": 1, "bre', {"a": 1}),
+])
+def test_repairs_truncated_output(text, expected):
+    assert load_json(text) == (expected, "repaired")
+
+
+def test_damaged_outer_object_wins_over_a_clean_nested_one():
+    text = '{"overall_score": 70, "breakdown": {"skills_match": 1}, "reasoning": "ok",}'
+    value, method = load_json(text)
+    assert method == "repaired"
+    assert value["overall_score"] == 70
+
+
+@pytest.mark.parametrize("text", ["", "   ", "no json here", "[1, 2, 3]"])
+def test_unusable_output_raises(text):
+    with pytest.raises(StructuredOutputError):
+        load_json(text)
+
+
+def test_parse_model_output_validates_and_clamps():
+    raw = {**ANALYSIS, "overall_score": 140, "breakdown": {**ANALYSIS["breakdown"], "education": -5}}
+    analysis, method = parse_model_output(json.dumps(raw), RankingAnalysis)
+    assert method == "strict"
+    assert analysis.overall_score == 100.0
+    assert analysis.breakdown.education == 0.0
+
+
+def test_parse_model_output_reports_schema_errors():
+    with pytest.raises(StructuredOutputError, match="breakdown"):
+        parse_model_output('{"overall_score": 50, "reasoning": "x"}', RankingAnalysis)
+
+
+def test_screening_breakdown_keeps_extra_keys():
+    raw = {
+        "passed": True,
+        "overall_score": 75,
+        "breakdown": {
+            "skills_match": {"score": 80, "matched_skills": ["python"], "missing_skills": [], "certainty": "high"},
+            "experience": {"score": 70, "years_found": 5, "relevance": "backend"},
+            "education": {"score": 60, "level": "BSc", "relevance": "CS"}
+        }
+    }
+    analysis, _ = parse_model_output(json.dumps(raw), ScreeningAnalysis)
+    dumped = analysis.model_dump()
+    assert dumped["breakdown"]["skills_match"]["certainty"] == "high"
+    assert dumped["breakdown"]["red_flags"] == {"found": False, "issues": []}
+    assert dumped["recommendations"] == []
+
+
+def test_batch_ranking_maps_resume_ids_to_positions():
+    text = json.dumps({"results": [batch_entry(2, 40), batch_entry(1, 90)]})
+    entries, method = parse_batch_ranking(text, expected=2)
+    assert method == "strict"
+    assert entries[0]["overall_score"] == 90
+    assert entries[1]["overall_score"] == 40
+    assert "resume_id" not in entries[0]
+
+
+def test_batch_ranking_accepts_a_bare_array():
+    entries, _ = parse_batch_ranking(json.dumps([batch_entry(1, 55)]), expected=1)
+    assert entries[0]["overall_score"] == 55
+
+
+def test_batch_ranking_leaves_out_bad_entries():
+    results = [
+        batch_entry(1, 90),
+        batch_entry(2, 70),
+        batch_entry(1, 10),  # duplicate
+        batch_entry(1, 30),  # duplicate
+        batch_entry(0, 50),  # out of range
+        batch_entry(4, 50),  # out of range
+        {"resume_id": 3, "overall_score": 50},  # invalid
+    ]
+    entries, _ = parse_batch_ranking(json.dumps({"results": results}), expected=3)
+    # Every copy of a duplicated resume is left out for re-scoring
+    assert list(entries) == [1]
+    assert entries[1]["overall_score"] == 70
+
+
+def test_batch_ranking_without_results_raises():
+    with pytest.raises(StructuredOutputError, match="results array"):
+        parse_batch_ranking('{"answer": []}', expected=1)
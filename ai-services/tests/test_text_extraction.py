@@ -0,0 +1,120 @@
+import asyncio
+import io
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from text_extraction import DOCX_CONTENT_TYPE, ResumeTextService, content_hash, detect_format, extract_text
+
+DOCX_XML = (
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+    "<w:p><w:r><w:t>Jane Doe</w:t></w:r></w:p>"
+    "<w:p><w:r><w:t>Python</w:t><w:tab/><w:t>Docker</w:t></w:r></w:p>"
+    "</w:body></w:document>"
+)
+
+
+def docx_bytes():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("word/document.xml", DOCX_XML)
+    return buffer.getvalue()
+
+
+class FakeStorage:
+    """Resume blobs and extracted/ text blobs held in dicts"""
+
+    def __init__(self):
+        self.resumes = {}
+        self.texts = {}
+        self.downloads = 0
+
+    def add_resume(self, blob_name, content, content_type="text/plain", file_hash=None):
+        metadata = {"content_sha256": file_hash} if file_hash else {}
+        self.resumes[blob_name] = (content, {"content_type": content_type, "metadata": metadata})
+
+    async def get_resume_properties(self, blob_name):
+        stored = self.resumes.get(blob_name)
+        return stored[1] if stored else None
+
+    async def download_resume(self, blob_name):
+        self.downloads += 1
+        stored = self.resumes.get(blob_name)
+        return stored[0] if stored else None
+
+    async def download_text(self, blob_name):
+        return self.texts.get(blob_name)
+
+    async def upload_text(self, blob_name, text):
+        self.texts[blob_name] = text
+
+
+def text_service(storage):
+    service = ResumeTextService(storage)
+    # Threads instead of worker processes keep the test fast
+    service._executor = ThreadPoolExecutor(max_workers=1)
+    return service
+
+
+def test_detect_format_prefers_the_content_type():
+    assert detect_format("application/pdf", "cv.txt") == "pdf"
+    assert detect_format(DOCX_CONTENT_TYPE, None) == "docx"
+    assert detect_format(None, "CV.DOCX") == "docx"
+    assert detect_format("application/octet-stream", "cv.pdf") == "pdf"
+    assert detect_format(None, "cv.md") == "text"
+
+
+def test_extract_docx_keeps_paragraphs_and_tabs():
+    assert extract_text(docx_bytes(), "docx") == "Jane Doe\nPython\tDocker"
+
+
+def test_extracted_text_is_cached_by_content_hash():
+    async def scenario():
+        storage = FakeStorage()
+        service = text_service(storage)
+        file_hash, text = await service.extract(b"Python developer", "text/plain", "cv.txt")
+        assert (file_hash, text) == (content_hash(b"Python developer"), "Python developer")
+        assert storage.texts == {f"extracted/{file_hash}.txt": "Python developer"}
+
+        # The cached text wins over parsing the same content again
+        storage.texts[f"extracted/{file_hash}.txt"] = "cached"
+        assert await service.extract(b"Python developer", "text/plain", "cv.txt") == (file_hash, "cached")
+        service.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_text_for_blob_uses_the_hash_in_blob_metadata():
+    async def scenario():
+        storage = FakeStorage()
+        service = text_service(storage)
+        file_hash = content_hash(b"Go developer")
+        storage.add_resume("resumes/a.txt", b"Go developer", file_hash=file_hash)
+        storage.texts[f"extracted/{file_hash}.txt"] = "cached"
+        assert await service.text_for_blob("resumes/a.txt") == "cached"
+        assert storage.downloads == 0
+
+        # Without cached text the blob is downloaded, extracted and cached
+        storage.add_resume("resumes/b.docx", docx_bytes(), DOCX_CONTENT_TYPE)
+        assert await service.text_for_blob("resumes/b.docx") == "Jane Doe\nPython\tDocker"
+        assert storage.downloads == 1
+        assert storage.texts[f"extracted/{content_hash(docx_bytes())}.txt"] == "Jane Doe\nPython\tDocker"
+
+        assert await service.text_for_blob("resumes/missing.pdf") is None
+        service.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_cache_read_failures_fall_back_to_extraction():
+    async def scenario():
+        storage = FakeStorage()
+
+        async def broken_download_text(blob_name):
+            raise ConnectionError("storage unreachable")
+
+        storage.download_text = broken_download_text
+        service = text_service(storage)
+        assert await service.extract(b"Rust developer", "text/plain", "cv.txt") == (content_hash(b"Rust developer"), "Rust developer")
+        service.shutdown()
+
+    asyncio.run(scenario())
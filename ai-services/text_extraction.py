@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+from xml.etree import ElementTree
+
+logger = logging.getLogger(__name__)
+
+PDF_CONTENT_TYPE = "application/pdf"
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+TEXT_CONTENT_TYPE = "text/plain"
+
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def content_hash(file_content: bytes) -> str:
+    return hashlib.sha256(file_content).hexdigest()
+
+
+def detect_format(content_type: Optional[str], filename: Optional[str]) -> str:
+    """Map a MIME type (or, failing that, a file extension) to pdf, docx or text."""
+    if content_type == PDF_CONTENT_TYPE:
+        return "pdf"
+    if content_type == DOCX_CONTENT_TYPE:
+        return "docx"
+    if content_type == TEXT_CONTENT_TYPE:
+        return "text"
+    ext = os.path.splitext(filename or "")[1].lower()
+    return {".pdf": "pdf", ".docx": "docx"}.get(ext, "text")
+
+
+def extract_text(file_content: bytes, file_format: str) -> str:
+    """
+    Extract plain text from a resume file
+
+    Runs in a worker process; keep it a top-level function so it pickles.
+    """
+    if file_format == "pdf":
+        return _extract_pdf(file_content)
+    if file_format == "docx":
+        return _extract_docx(file_content)
+    return file_content.decode("utf-8", errors="ignore")
+
+
+def _extract_pdf(file_content: bytes) -> str:
+    # Imported here so the parser is only loaded inside extraction workers
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(file_content))
+    return "\n".join(page.extract_text() or "" for page in reader.pages).strip()
+
+
+def _extract_docx(file_content: bytes) -> str:
+    with zipfile.ZipFile(io.BytesIO(file_content)) as archive:
+        document = archive.read("word/document.xml")
+    root = ElementTree.fromstring(document)
+
+    paragraphs = []
+    for paragraph in root.iter(f"{_WORD_NS}p"):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f"{_WORD_NS}t" and node.text:
+                parts.append(node.text)
+            elif node.tag == f"{_WORD_NS}tab":
+                parts.append("\t")
+            elif node.tag in (f"{_WORD_NS}br", f"{_WORD_NS}cr"):
+                parts.append("\n")
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs).strip()
+
+
+class ResumeTextService:
+    """
+    Extracts resume text off the event loop and caches it in blob storage
+
+    Parsing runs in a process pool so CPU-heavy PDF work never blocks the
+    event loop. Extracted text is stored next to the resumes as
+    ``extracted/<sha256>.txt``, keyed by the hash of the original file, and
+    each resume blob records that hash in its metadata so later requests
+    can go straight from a blob name to its text.
+    """
+
+    EXTRACTED_PREFIX = "extracted/"
+
+    def __init__(self, storage_client, workers: int = 2):
+        self.storage_client = storage_client
+        self.workers = max(1, workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def extracted_blob_name(self, file_hash: str) -> str:
+        return f"{self.EXTRACTED_PREFIX}{file_hash}.txt"
+
+    async def extract(self, file_content: bytes, content_type: Optional[str], filename: Optional[str], file_hash: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Return (content hash, extracted text), parsing only if this content
+        has never been extracted before
+        """
+        file_hash = file_hash or content_hash(file_content)
+        cached = await self.cached_text(file_hash)
+        if cached is not None:
+            return file_hash, cached
+
+        loop = asyncio.get_running_loop()
+        text = await loop.run_in_executor(self.executor, extract_text, file_content, detect_format(content_type, filename))
+        try:
+            await self.storage_client.upload_text(self.extracted_blob_name(file_hash), text)
+        except Exception as e:
+            logger.warning(f"Failed to cache extracted text for {file_hash}: {e}")
+        return file_hash, text
+
+    async def cached_text(self, file_hash: str) -> Optional[str]:
+        try:
+            return await self.storage_client.download_text(self.extracted_blob_name(file_hash))
+        except Exception as e:
+            logger.warning(f"Failed to read cached extracted text for {file_hash}: {e}")
+            return None
+
+    async def text_for_blob(self, blob_name: str) -> Optional[str]:
+        """
+        Text of a stored resume, extracting (and caching) it if needed
+
+        Returns None if the resume blob does not exist.
+        """
+        properties = await self.storage_client.get_resume_properties(blob_name)
+        if properties is None:
+            return None
+        file_hash = properties["metadata"].get("content_sha256")
+        if file_hash:
+            cached = await self.cached_text(file_hash)
+            if cached is not None:
+                return cached
+
+        file_content = await self.storage_client.download_resume(blob_name)
+        if file_content is None:
+            return None
+        _, text = await self.extract(file_content, properties["content_type"], blob_name, file_hash)
+        return text
@@ -323,9 +323,15 @@ export const uploadResume = async (file) => {
   }
 };
 
-export const listResumes = async () => {
+export const listResumes = async ({ limit, cursor, uploadedFrom, uploadedTo } = {}) => {
   try {
-    const response = await fetch(`${AI_API_BASE_URL}/api/v1/resume/list`);
+    const params = new URLSearchParams();
+    if (limit) params.set('limit', limit);
+    if (cursor) params.set('cursor', cursor);
+    if (uploadedFrom) params.set('uploaded_from', uploadedFrom);
+    if (uploadedTo) params.set('uploaded_to', uploadedTo);
+    const query = params.toString();
+    const response = await fetch(`${AI_API_BASE_URL}/api/v1/resume/list${query ? `?${query}` : ''}`);
     
     if (!response.ok) {
       const error = await response.json();